@@ -33,6 +33,19 @@ void cpu_matrix_mul(const VALUE* A, const VALUE* B, VALUE* C, int n) {
 	}
 }
 
+#ifdef DUMP
+// raw row-major N x N VALUEs, checked by python -m gpubench.matmul --validate
+static void dump(const char* matrix, const VALUE* data) {
+	char path[64];
+	snprintf(path, sizeof(path), "matrix_mul_N%d_%s_%s.bin", N, PRECISION_STR, matrix);
+	FILE* f = fopen(path, "wb");
+	if(!f || fwrite(data, sizeof(VALUE), (size_t)N * N, f) != (size_t)N * N)
+		fprintf(stderr, "Failed to write '%s'\n", path);
+	if(f)
+		fclose(f);
+}
+#endif
+
 // ---------------- Load kernel ----------------
 static char* load_kernel(const char* path, size_t* out_size) {
 	char* src = clu_load_kernel_source(path, out_size);
@@ -168,6 +181,12 @@ int main(void) {
 		}
 	}
 
+#ifdef DUMP
+	dump("A", A);
+	dump("B", B);
+	dump("C", C);
+#endif
+
 	// ---------------- Output CSV ----------------
 	printf("%s,%d,%.3f\n", PRECISION_STR, N, elapsed_ms);
 
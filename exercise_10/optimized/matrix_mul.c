@@ -7,6 +7,14 @@
 #define N 1024
 #endif
 
+// edge length of the square work-group / local memory tile
+#ifndef TILE_SIZE
+#define TILE_SIZE 16
+#endif
+
+#define STR_(x) #x
+#define STR(x) STR_(x)
+
 #if defined(USE_DOUBLE)
 #define VALUE double
 #define PRECISION_STR "double"
@@ -28,6 +36,19 @@ void cpu_matrix_mul(const VALUE* A, const VALUE* B, VALUE* C, int n) {
 		}
 }
 
+#ifdef DUMP
+// raw row-major N x N VALUEs, checked by python -m gpubench.matmul --validate
+static void dump(const char* matrix, const VALUE* data) {
+	char path[64];
+	snprintf(path, sizeof(path), "matrix_mul_N%d_%s_%s.bin", N, PRECISION_STR, matrix);
+	FILE* f = fopen(path, "wb");
+	if(!f || fwrite(data, sizeof(VALUE), (size_t)N * N, f) != (size_t)N * N)
+		fprintf(stderr, "Failed to write '%s'\n", path);
+	if(f)
+		fclose(f);
+}
+#endif
+
 // ---------------- Load Kernel ----------------
 static char* load_kernel(const char* path, size_t* out_size) {
 	char* src = clu_load_kernel_source(path, out_size);
@@ -73,9 +94,9 @@ int main(void) {
 
 	const char* build_opts =
 #if defined(USE_DOUBLE)
-	    "-DUSE_DOUBLE";
+	    "-DUSE_DOUBLE -DTILE_SIZE=" STR(TILE_SIZE);
 #else
-	    "-DFLOAT";
+	    "-DFLOAT -DTILE_SIZE=" STR(TILE_SIZE);
 #endif
 
 	cl_program program = clu_create_program(env.context, env.device_id, kernel_src, kernel_size, build_opts);
@@ -108,7 +129,7 @@ int main(void) {
 	CLU_ERRCHECK(clSetKernelArg(kernel, 3, sizeof(cl_int), &n));
 	CLU_ERRCHECK(clSetKernelArg(kernel, 4, sizeof(cl_int), &n));
 
-	size_t TSX = 16, TSY = 16;
+	size_t TSX = TILE_SIZE, TSY = TILE_SIZE;
 	size_t local[2] = {TSX, TSY};
 	size_t global[2] = {((N + TSX - 1) / TSX) * TSX, ((N + TSY - 1) / TSY) * TSY};
 
@@ -133,6 +154,12 @@ int main(void) {
 			break;
 		}
 
+#ifdef DUMP
+	dump("A", A);
+	dump("B", B);
+	dump("C", C);
+#endif
+
 	printf("%s,%d,%.3f,%.2f\n", PRECISION_STR, N, elapsed_ms, gflops);
 
 	CLU_ERRCHECK(clReleaseMemObject(bufA));
@@ -2,8 +2,12 @@
 #pragma OPENCL EXTENSION cl_khr_fp64 : enable
 #endif
 
-#define TSX 16
-#define TSY 16
+#ifndef TILE_SIZE
+#define TILE_SIZE 16
+#endif
+
+#define TSX TILE_SIZE
+#define TSY TILE_SIZE
 
 #ifdef cl_khr_fp64
 __kernel void matrix_mul_tiled_double(
@@ -13,21 +13,30 @@ precision,N,time_ms
 
 Generates:
 - Boxplots for Original vs Optimized (with platform & precision)
-- Improvement factors
+- Improvement factors (median Original / median Optimized)
 - GFLOPS vs HW Peak (separate plots for float/double & AMD/NVIDIA)
+
+raw -> median -> gflops / improvement are nodes of a gpubench.dataflow
+graph, computed once per run.
 """
 
 import os
+import sys
 import csv
 from collections import defaultdict
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.patches import Patch
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from gpubench import dataflow, overlay, plotting
 
 PLOTS_DIR = "plots"
-os.makedirs(PLOTS_DIR, exist_ok=True)
 
 SHOW_POINTS = True
+# above this many samples per panel the overlay is subsampled / drawn as density strips
+MAX_POINTS = overlay.MAX_POINTS
+
+build = None  # gpubench.manifest.FigureBuild, set in main()
 
 # Input files
 FILES_INFO = [
@@ -74,49 +83,53 @@ def collect_buckets(rows):
         buckets[key].append(r["time_ms"])
     return buckets
 
-def collect_improvements(rows):
-    """
-    improvements[(platform, N, precision)] = [Original/Optimized,...]
-    """
-    orig_map = {}
-    opt_map = {}
-    for r in rows:
-        key = (r["platform"], r["N"], r.get("run",0), r["precision"])
-        if r["version"] == "Original":
-            orig_map[key] = r["time_ms"]
-        elif r["version"] == "Optimized":
-            opt_map[key] = r["time_ms"]
-
-    improvements = defaultdict(list)
-    for key, orig_ms in orig_map.items():
-        if key in opt_map and opt_map[key] > 0:
-            platform, N, _run, prec = key
-            improvements[(platform, N, prec)].append(orig_ms / opt_map[key])
-    return improvements
+def median_times(raw):
+    """Median time_ms per platform, version, precision and N"""
+    return (raw.groupby(["platform", "version", "precision", "N"])["time_ms"]
+            .median().reset_index())
+
+def median_gflops(median):
+    """The medians with their GFLOPS (2 N^3 flops)"""
+    out = median.copy()
+    out["gflops"] = dataflow.gflops(2.0 * out["N"] ** 3, out["time_ms"])
+    return out
+
+def median_improvement(median):
+    """Optimized rows with improvement = median Original / median Optimized"""
+    return dataflow.improvement(median, "time_ms", "Original", "Optimized",
+                                keys=("platform", "precision", "N"))
+
+def build_flow(rows):
+    """raw -> median -> gflops / improvement; each table is computed once per run"""
+    flow = dataflow.Graph()
+    flow.add("raw", lambda: pd.DataFrame(rows), inputs=[], stage="raw")
+    flow.add("median", median_times, inputs=["raw"], stage="aggregated")
+    flow.add("gflops", median_gflops, inputs=["median"])
+    flow.add("improvement", median_improvement, inputs=["median"])
+    return flow
 
 # ---------- Plot helpers ----------
 
 def _apply_style():
+    plt = plotting.pyplot()
     try:
         plt.style.use("seaborn-v0_8-whitegrid")
     except Exception:
         pass
 
-def _add_jitter_points(ax, ys_list, positions, jitter=0.06, alpha=0.35, markersize=3):
-    import random
-    rnd = random.Random(42)
-    for vals, pos in zip(ys_list, positions):
-        for v in vals:
-            x = pos + (rnd.random() * 2 - 1) * jitter
-            ax.plot(x, v, marker="o", linestyle="None", alpha=alpha, markersize=markersize)
-
 # ---------- Plot 1: Boxplots Original vs Optimized ----------
 def plot_matrix_mul_simple(buckets, Ns):
     """
     Original-style boxplots: Log scale, AMD & NVIDIA separate, Original vs Optimized,
     mit fein gestrichelten Linien für log-scale Abschnitte (1,2,3,...)
     """
+    name = "boxplots_matrix_mul_simple.png"
+    if not build.needs(name, data=(buckets, Ns)):
+        return
+
+    plt = plotting.pyplot()
     import matplotlib.ticker as mticker
+    from matplotlib.patches import Patch
 
     _apply_style()
     fig, axes = plt.subplots(1, 2, figsize=(14,6), sharey=True)
@@ -146,7 +159,7 @@ def plot_matrix_mul_simple(buckets, Ns):
                 patch.set_facecolor(color)
                 patch.set_alpha(0.6)
             if SHOW_POINTS:
-                _add_jitter_points(ax, data, positions, jitter=0.05)
+                overlay.jitter_points(ax, data, positions, jitter=0.05, max_points=MAX_POINTS)
 
         # X-axis ticks
         tick_positions = [i*1.5 + 0.2 for i in range(len(Ns))]
@@ -166,17 +179,26 @@ def plot_matrix_mul_simple(buckets, Ns):
     fig.legend(handles=legend_elements, loc='upper center', ncol=2, bbox_to_anchor=(0.5, 1.02))
     fig.suptitle("Matrix Multiplication Benchmark: Original vs Optimized", y=1.08, fontsize=14, fontweight='bold')
     fig.tight_layout()
-    out_file = os.path.join(PLOTS_DIR,"boxplots_matrix_mul_simple.png")
+    out_file = build.path(name)
     fig.savefig(out_file, dpi=200, bbox_inches='tight')
+    build.done(name)
     print(f"[DONE] Wrote {out_file}")
 
 # ---------- Plot 3: GFLOPS vs HW Peak (separate plots) ----------
 
 def plot_gflops_vs_hw_separate(buckets, Ns, platforms, hw_peak_gflops):
+    plt = plotting.pyplot()
+    from matplotlib.patches import Patch
+
     _apply_style()
     colors = {"Original":"#3498db", "Optimized":"#e74c3c"}
     for prec in ["float","double"]:
         for platform in platforms:
+            name = f"gflops_{platform}_{prec}.png"
+            data_slice = {k: v for k, v in buckets.items() if k[0] == platform and k[3] == prec}
+            if not build.needs(name, data=(data_slice, Ns, hw_peak_gflops[platform][prec])):
+                continue
+
             fig, ax = plt.subplots(figsize=(10,5))
             positions, data, box_colors, labels = [], [], [], []
 
@@ -185,7 +207,7 @@ def plot_gflops_vs_hw_separate(buckets, Ns, platforms, hw_peak_gflops):
                 for j, version in enumerate(["Original","Optimized"]):
                     times = buckets.get((platform, version, N, prec), [])
                     if not times: continue
-                    gflops_vals = [2*N**3/(t*1e6) for t in times]  # GFLOPS
+                    gflops_vals = [dataflow.gflops(2 * N**3, t) for t in times]
                     pos = base + j*0.5
                     positions.append(pos)
                     data.append(gflops_vals)
@@ -200,7 +222,7 @@ def plot_gflops_vs_hw_separate(buckets, Ns, platforms, hw_peak_gflops):
                     patch.set_facecolor(color)
                     patch.set_alpha(0.6)
                 if SHOW_POINTS:
-                    _add_jitter_points(ax, data, positions, jitter=0.05)
+                    overlay.jitter_points(ax, data, positions, jitter=0.05, max_points=MAX_POINTS)
 
             tick_positions = [i*2.0+0.25 for i in range(len(Ns))]
             ax.set_xticks(tick_positions)
@@ -216,13 +238,60 @@ def plot_gflops_vs_hw_separate(buckets, Ns, platforms, hw_peak_gflops):
             ax.legend(handles=legend_elements, loc='upper left', fontsize=8)
             ax.grid(True, alpha=0.3)
             fig.tight_layout()
-            out_file = os.path.join(PLOTS_DIR,f"gflops_{platform}_{prec}.png")
+            out_file = build.path(name)
             fig.savefig(out_file, dpi=200)
+            build.done(name)
             print(f"[DONE] Wrote {out_file}")
 
+# ---------- Plot 2: Improvement factors ----------
+
+def plot_improvement(improvement, Ns, platforms):
+    """
+    Bars of median Original time / median Optimized time per N,
+    one bar per platform and precision.
+    """
+    name = "improvement_matrix_mul.png"
+    if not build.needs(name, data=(improvement, Ns, platforms)):
+        return
+
+    plt = plotting.pyplot()
+    _apply_style()
+    fig, ax = plt.subplots(figsize=(10,5))
+    groups = [(platform, prec) for platform in platforms for prec in ["float","double"]]
+    width = 0.8 / len(groups)
+    colors = plotting.color_palette("tab10", len(groups))
+    x = np.arange(len(Ns))
+    for k, (platform, prec) in enumerate(groups):
+        sub = improvement[(improvement["platform"] == platform) &
+                          (improvement["precision"] == prec)].set_index("N")
+        heights = [sub["improvement"].get(N, np.nan) for N in Ns]
+        bars = ax.bar(x + (k - (len(groups) - 1) / 2) * width, heights, width,
+                      color=colors[k], alpha=0.8, label=f"{platform} {prec}")
+        for rect, h in zip(bars, heights):
+            if not np.isnan(h):
+                ax.text(rect.get_x() + rect.get_width() / 2, h, f"{h:.1f}x",
+                        ha="center", va="bottom", fontsize=7)
+
+    ax.axhline(y=1, color='red', linestyle='--', alpha=0.5, linewidth=1, label='No improvement')
+    ax.set_xticks(x)
+    ax.set_xticklabels([str(n) for n in Ns])
+    ax.set_xlabel("Matrix size N")
+    ax.set_ylabel("Improvement (Original / Optimized)")
+    ax.set_title("Matrix Multiplication: Improvement of the Optimized Kernel (median times)")
+    ax.legend(fontsize=8)
+    ax.grid(True, axis="y", alpha=0.3)
+    fig.tight_layout()
+    out_file = build.path(name)
+    fig.savefig(out_file, dpi=200)
+    build.done(name)
+    print(f"[DONE] Wrote {out_file}")
+
 # ---------- Main ----------
 
 def main():
+    global build
+    args = plotting.parse_args("Plot GPU matrix multiplication benchmark results")
+
     rows = []
     platforms_set = set()
     for platform, fname, version in FILES_INFO:
@@ -240,12 +309,27 @@ def main():
     platforms = sorted(platforms_set)
 
     buckets = collect_buckets(rows)
-    improvements = collect_improvements(rows)
+    flow = build_flow(rows)
+
+    plotting.exit_if_check(args, rows=rows, buckets=buckets,
+                           improvement=flow["improvement"])
 
     # Generate plots
-    plot_matrix_mul_simple(buckets, Ns)
-    plot_improvement(improvements, Ns, platforms)
-    plot_gflops_vs_hw_separate(buckets, Ns, platforms, HW_PEAK_GFLOPS)
+    build = plotting.figure_build(args, PLOTS_DIR, show_points=SHOW_POINTS,
+                                  max_points=MAX_POINTS)
+    build.run([
+        (plot_matrix_mul_simple, dict(buckets=buckets, Ns=Ns)),
+        (plot_gflops_vs_hw_separate, dict(buckets=buckets, Ns=Ns, platforms=platforms,
+                                          hw_peak_gflops=HW_PEAK_GFLOPS)),
+        (plot_improvement, dict(improvement=flow["improvement"], Ns=Ns, platforms=platforms)),
+    ], jobs=args.jobs)
+    build.report()
+
+    for row in flow["gflops"].itertuples(index=False):
+        peak = HW_PEAK_GFLOPS[row.platform][row.precision]
+        print(f"[SUMMARY] {row.platform} {row.version} {row.precision} N={row.N}: "
+              f"{row.gflops:.1f} GFLOPS ({row.gflops / peak:.1%} of peak)")
+    flow.report()
 
     print("\n[DONE] All plots generated successfully!")
 
@@ -1,9 +1,12 @@
 import os
+import sys
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from matplotlib.lines import Line2D
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from gpubench import plotting
+
+args = plotting.parse_args("Plot exercise 2 Jacobi results")
 
 FILES = ["results_paul.csv", "results_jonas.csv", "results_ifi.csv"]
 OUT_DIR = "plots"
@@ -31,6 +34,11 @@ df["mode"] = df["mode"].astype(str)
 mode_order = ["serial", "openmp", "opencl_V1", "opencl_V2"]
 devices = ["paul", "jonas", "ifi"]
 
+plotting.exit_if_check(args, df=df)
+
+plt = plotting.pyplot()
+from matplotlib.lines import Line2D
+
 # 1) Graph: N=2048 IT=1000 precision=float, one line per device across modes
 sel = df[(df["N"] == 2048) & (df["IT"] == 1000) & (df["precision"] == "float")]
 plt.figure(figsize=(7,4))
@@ -79,7 +87,7 @@ for prec in precision_vals:
     x = np.arange(len(mode_order))
 
     fig, ax = plt.subplots(figsize=(9,5))
-    colors = sns.color_palette("tab10", n_colors=max(1, len(ITs)))
+    colors = plotting.color_palette("tab10", n_colors=max(1, len(ITs)))
     linestyles = ['-', '--', '-.', ':']  # different line styles for different N values
     linewidth = 2.0
 
@@ -1,9 +1,14 @@
+import glob
 import os
+import re
+import sys
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from matplotlib.lines import Line2D
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from gpubench import downsample, plotting
+
+args = plotting.parse_args("Plot exercise 3 Jacobi timings")
 
 # Updated file paths and device list
 FILES = ["results/results_paul.csv", "results/results_jonas.csv", 
@@ -48,6 +53,11 @@ df = df.groupby(group_cols).mean().reset_index()
 
 devices = ["paul", "jonas", "peter", "ifi"]
 
+plotting.exit_if_check(args, df=df)
+
+plt = plotting.pyplot()
+from matplotlib.lines import Line2D
+
 # 1) Graph: N=2048 IT=1000 precision=float
 sel = df[(df["N"] == 2048) & (df["IT"] == 1000) & (df["precision"] == "float")]
 plt.figure(figsize=(10,6))
@@ -93,7 +103,7 @@ for prec in precision_vals:
     x = np.arange(len(TIME_COLS))
 
     fig, ax = plt.subplots(figsize=(12,7))
-    colors = sns.color_palette("tab10", n_colors=max(1, len(ITs)))
+    colors = plotting.color_palette("tab10", n_colors=max(1, len(ITs)))
     linestyles = ['-', '--', '-.', ':']
     linewidth = 2.0
 
@@ -138,177 +148,89 @@ for prec in precision_vals:
 
 
 
-# 4) Graph: kernel time over iterations for each device - float
-Ns = [1024, 2048]
-devices = ["paul", "jonas", "peter", "ifi"]
-
-for N in Ns:
-    fig, ax = plt.subplots(figsize=(10,6))
+# 4)-8) Per-iteration traces. Long traces (large IT) are reduced to
+# TRACE_POINTS points with LTTB and drawn over their min/max envelope, so the
+# figures cost the same for IT=1000 and IT=10^6.
+TRACE_POINTS = downsample.TRACE_POINTS
 
-    colors = sns.color_palette("tab10", n_colors=len(devices))
-    for i, dev in enumerate(devices):
-        filepath = f"results/kernel_times_N{N}_IT1000_float_{dev}.csv"
-        if not os.path.exists(filepath):
-            print(f"⚠️ Missing file: {filepath}")
-            continue
 
-        dfk = pd.read_csv(filepath)
-        ax.plot(
-            dfk["iteration"], dfk["kernel_time_ms"],
-            label=DEVICE_INFO.get(dev, dev),
-            color=colors[i],
-            linewidth=2.0,
-            alpha=0.9
-        )
+def trace_iterations(N):
+    """IT values with a per-iteration trace of size N in results/, ascending."""
+    pattern = re.compile(rf"kernel_times_N{N}_IT(\d+)_")
+    names = glob.glob(f"results/kernel_times_N{N}_IT*_*_*.csv")
+    return sorted({int(m.group(1)) for m in map(pattern.match, map(os.path.basename, names)) if m})
 
-    ax.set_title(f"Kernel time per iteration — N={N}, IT=1000, precision=float")
-    ax.set_xlabel("Iteration")
-    ax.set_ylabel("Kernel Time (ms)")
-    ax.grid(alpha=0.25)
-    ax.legend(title="device")
-    plt.tight_layout()
 
-    outpath = os.path.join(OUT_DIR, f"kernel_times_N{N}_IT1000_float_all.png")
-    plt.savefig(outpath, dpi=150)
-    plt.close(fig)
-
-# 5) Graph: kernel time over iterations for each device - float (without paul)
-Ns = [1024, 2048]
-devices = ["jonas", "peter", "ifi"]
-
-for N in Ns:
+def plot_iteration_trace(N, IT, precision, devices, column, title, ylabel, outname, log_y=False):
     fig, ax = plt.subplots(figsize=(10,6))
 
-    colors = sns.color_palette("tab10", n_colors=len(devices))
+    colors = plotting.color_palette("tab10", n_colors=len(devices))
     for i, dev in enumerate(devices):
-        filepath = f"results/kernel_times_N{N}_IT1000_float_{dev}.csv"
+        filepath = f"results/kernel_times_N{N}_IT{IT}_{precision}_{dev}.csv"
         if not os.path.exists(filepath):
             print(f"⚠️ Missing file: {filepath}")
             continue
 
-        dfk = pd.read_csv(filepath)
-        ax.plot(
-            dfk["iteration"], dfk["kernel_time_ms"],
-            label=DEVICE_INFO.get(dev, dev),
-            color=colors[i],
-            linewidth=2.0,
-            alpha=0.9
+        dfk = pd.read_csv(filepath, usecols=["iteration", column])
+        xs, ys, envelope = downsample.downsample_trace(
+            dfk["iteration"].to_numpy(), dfk[column].to_numpy(), TRACE_POINTS
         )
-
-    ax.set_title(f"Kernel time per iteration — N={N}, IT=1000, precision=float")
-    ax.set_xlabel("Iteration")
-    ax.set_ylabel("Kernel Time (ms)")
-    ax.grid(alpha=0.25)
-    ax.legend(title="device")
-    plt.tight_layout()
-
-    outpath = os.path.join(OUT_DIR, f"kernel_times_N{N}_IT1000_float.png")
-    plt.savefig(outpath, dpi=150)
-    plt.close(fig)
-
-# 6) Graph: kernel time over iterations for each device - double
-Ns = [1024, 2048]
-devices = ["jonas", "peter", "ifi"]
-
-for N in Ns:
-    fig, ax = plt.subplots(figsize=(10,6))
-
-    colors = sns.color_palette("tab10", n_colors=len(devices))
-    for i, dev in enumerate(devices):
-        filepath = f"results/kernel_times_N{N}_IT1000_double_{dev}.csv"
-        if not os.path.exists(filepath):
-            print(f"⚠️ Missing file: {filepath}")
-            continue
-
-        dfk = pd.read_csv(filepath)
+        if envelope is not None:
+            env_x, env_min, env_max = envelope
+            ax.fill_between(env_x, env_min, env_max, color=colors[i], alpha=0.2, linewidth=0)
         ax.plot(
-            dfk["iteration"], dfk["kernel_time_ms"],
+            xs, ys,
             label=DEVICE_INFO.get(dev, dev),
             color=colors[i],
             linewidth=2.0,
             alpha=0.9
         )
 
-    ax.set_title(f"Kernel time per iteration — N={N}, IT=1000, precision=double")
+    ax.set_title(title)
     ax.set_xlabel("Iteration")
-    ax.set_ylabel("Kernel Time (ms)")
+    if log_y:
+        ax.set_yscale('log')
+    ax.set_ylabel(ylabel)
     ax.grid(alpha=0.25)
     ax.legend(title="device")
     plt.tight_layout()
 
-    outpath = os.path.join(OUT_DIR, f"kernel_times_N{N}_IT1000_double.png")
+    outpath = os.path.join(OUT_DIR, outname)
     plt.savefig(outpath, dpi=150)
     plt.close(fig)
 
-# 7) Graph: queue time over iterations for each device - float
-Ns = [1024, 2048]
-devices = ["paul", "jonas", "peter", "ifi"]
-
-for N in Ns:
-    fig, ax = plt.subplots(figsize=(10,6))
-
-    colors = sns.color_palette("tab10", n_colors=len(devices))
-    for i, dev in enumerate(devices):
-        filepath = f"results/kernel_times_N{N}_IT1000_float_{dev}.csv"
-        if not os.path.exists(filepath):
-            print(f"⚠️ Missing file: {filepath}")
-            continue
-
-        dfk = pd.read_csv(filepath)
-        ax.plot(
-            dfk["iteration"], dfk["queue_time_ms"],
-            label=DEVICE_INFO.get(dev, dev),
-            color=colors[i],
-            linewidth=2.0,
-            alpha=0.9
-        )
-
-    ax.set_title(f"Queue time per iteration — N={N}, IT=1000, precision=float")
-    ax.set_xlabel("Iteration")
-    ax.set_yscale('log')
-    ax.set_ylabel("Queue Time (ms) [log scale]")
-    ax.grid(alpha=0.25)
-    ax.legend(title="device")
-    plt.tight_layout()
 
-    outpath = os.path.join(OUT_DIR, f"queue_times_N{N}_IT1000_float.png")
-    plt.savefig(outpath, dpi=150)
-    plt.close(fig)
-
-# 8) Graph: queue time over iterations for each device - double
 Ns = [1024, 2048]
-devices = ["jonas", "peter", "ifi"]
+devices_all = ["paul", "jonas", "peter", "ifi"]
+devices_no_paul = ["jonas", "peter", "ifi"]
 
 for N in Ns:
-    fig, ax = plt.subplots(figsize=(10,6))
-
-    colors = sns.color_palette("tab10", n_colors=len(devices))
-    for i, dev in enumerate(devices):
-        filepath = f"results/kernel_times_N{N}_IT1000_double_{dev}.csv"
-        if not os.path.exists(filepath):
-            print(f"⚠️ Missing file: {filepath}")
-            continue
-
-        dfk = pd.read_csv(filepath)
-        ax.plot(
-            dfk["iteration"], dfk["queue_time_ms"],
-            label=DEVICE_INFO.get(dev, dev),
-            color=colors[i],
-            linewidth=2.0,
-            alpha=0.9
-        )
-
-    ax.set_title(f"Queue time per iteration — N={N}, IT=1000, precision=double")
-    ax.set_xlabel("Iteration")
-    ax.set_yscale('log')
-    ax.set_ylabel("Queue Time (ms) [log scale]")
-    ax.grid(alpha=0.25)
-    ax.legend(title="device")
-    plt.tight_layout()
-
-    outpath = os.path.join(OUT_DIR, f"queue_times_N{N}_IT1000_double.png")
-    plt.savefig(outpath, dpi=150)
-    plt.close(fig)
-
+    for IT in trace_iterations(N):
+        # 4) kernel time over iterations for each device - float
+        plot_iteration_trace(N, IT, "float", devices_all, "kernel_time_ms",
+                             f"Kernel time per iteration — N={N}, IT={IT}, precision=float",
+                             "Kernel Time (ms)", f"kernel_times_N{N}_IT{IT}_float_all.png")
+
+        # 5) kernel time over iterations for each device - float (without paul)
+        plot_iteration_trace(N, IT, "float", devices_no_paul, "kernel_time_ms",
+                             f"Kernel time per iteration — N={N}, IT={IT}, precision=float",
+                             "Kernel Time (ms)", f"kernel_times_N{N}_IT{IT}_float.png")
+
+        # 6) kernel time over iterations for each device - double
+        plot_iteration_trace(N, IT, "double", devices_no_paul, "kernel_time_ms",
+                             f"Kernel time per iteration — N={N}, IT={IT}, precision=double",
+                             "Kernel Time (ms)", f"kernel_times_N{N}_IT{IT}_double.png")
+
+        # 7) queue time over iterations for each device - float
+        plot_iteration_trace(N, IT, "float", devices_all, "queue_time_ms",
+                             f"Queue time per iteration — N={N}, IT={IT}, precision=float",
+                             "Queue Time (ms) [log scale]", f"queue_times_N{N}_IT{IT}_float.png",
+                             log_y=True)
+
+        # 8) queue time over iterations for each device - double
+        plot_iteration_trace(N, IT, "double", devices_no_paul, "queue_time_ms",
+                             f"Queue time per iteration — N={N}, IT={IT}, precision=double",
+                             "Queue Time (ms) [log scale]", f"queue_times_N{N}_IT{IT}_double.png",
+                             log_y=True)
 
 print("Plots written to:", OUT_DIR)
\ No newline at end of file
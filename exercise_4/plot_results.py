@@ -1,16 +1,17 @@
 import os
+import sys
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from matplotlib.lines import Line2D
-from matplotlib.patches import Patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from gpubench import plotting, trace
+
+args = plotting.parse_args("Plot exercise 4 Jacobi workgroup results")
 
 # Configuration
 FILES = ["results/results_paul.csv", "results/results_jonas.csv", 
          "results/results_peter.csv", "results/results_ifi.csv"]
 OUT_DIR = "plots"
-os.makedirs(OUT_DIR, exist_ok=True)
 
 # Device info
 DEVICE_INFO = {
@@ -21,44 +22,53 @@ DEVICE_INFO = {
 }
 
 # Load and prepare data
-dfs = []
-for f in FILES:
-    if not os.path.exists(f):
-        print(f"⚠️ Missing file: {f}")
-        continue
-    df = pd.read_csv(f)
-    dev = os.path.splitext(os.path.basename(f))[0].replace("results_", "")
-    df["device"] = dev
-    dfs.append(df)
+with trace.span("load", files=len(FILES)):
+    dfs = []
+    for f in FILES:
+        if not os.path.exists(f):
+            print(f"⚠️ Missing file: {f}")
+            continue
+        df = pd.read_csv(f)
+        dev = os.path.splitext(os.path.basename(f))[0].replace("results_", "")
+        df["device"] = dev
+        dfs.append(df)
 
-if not dfs:
-    raise SystemExit("No data files found!")
+    if not dfs:
+        raise SystemExit("No data files found!")
 
-df = pd.concat(dfs, ignore_index=True)
+    df = pd.concat(dfs, ignore_index=True)
 
-# Ensure proper types
-df["N"] = df["N"].astype(int)
-df["IT"] = df["IT"].astype(int)
-df["LOCAL_WORKGROUP_DIM_1"] = df["LOCAL_WORKGROUP_DIM_1"].astype(int)
-df["LOCAL_WORKGROUP_DIM_2"] = df["LOCAL_WORKGROUP_DIM_2"].astype(int)
-df["precision"] = df["precision"].astype(str)
-df["elapsed_ms"] = df["elapsed_ms"].astype(float)
+with trace.span("coerce"):
+    # Ensure proper types
+    df["N"] = df["N"].astype(int)
+    df["IT"] = df["IT"].astype(int)
+    df["LOCAL_WORKGROUP_DIM_1"] = df["LOCAL_WORKGROUP_DIM_1"].astype(int)
+    df["LOCAL_WORKGROUP_DIM_2"] = df["LOCAL_WORKGROUP_DIM_2"].astype(int)
+    df["precision"] = df["precision"].astype(str)
+    df["elapsed_ms"] = df["elapsed_ms"].astype(float)
 
-# Extract version number from "opencl_V2" format
-df["version_num"] = df["version"].str.extract(r'V(\d+)').astype(int)
-df["version"] = "V" + df["version_num"].astype(str)
+    # Extract version number from "opencl_V2" format
+    df["version_num"] = df["version"].str.extract(r'V(\d+)').astype(int)
+    df["version"] = "V" + df["version_num"].astype(str)
 
-# Create workgroup dimension label for plotting
-df["workgroup"] = df["LOCAL_WORKGROUP_DIM_1"].astype(str) + "x" + df["LOCAL_WORKGROUP_DIM_2"].astype(str)
+    # Create workgroup dimension label for plotting
+    df["workgroup"] = df["LOCAL_WORKGROUP_DIM_1"].astype(str) + "x" + df["LOCAL_WORKGROUP_DIM_2"].astype(str)
 
-# Calculate mean of 5 runs for each configuration
-group_cols = ["version", "precision", "N", "IT", "LOCAL_WORKGROUP_DIM_1", "LOCAL_WORKGROUP_DIM_2", "device", "workgroup"]
-df_mean = df.groupby(group_cols)["elapsed_ms"].mean().reset_index()
+with trace.span("groupby"):
+    # Calculate mean of 5 runs for each configuration
+    group_cols = ["version", "precision", "N", "IT", "LOCAL_WORKGROUP_DIM_1", "LOCAL_WORKGROUP_DIM_2", "device", "workgroup"]
+    df_mean = df.groupby(group_cols)["elapsed_ms"].mean().reset_index()
 
 print(f"Loaded data with {len(df_mean)} unique configurations")
 print(f"Versions found: {df_mean['version'].unique()}")
 print(f"Sample data:\n{df_mean.head()}")
 
+plotting.exit_if_check(args, df_mean=df_mean)
+
+plt = plotting.pyplot()
+from matplotlib.lines import Line2D
+from matplotlib.patches import Patch
+
 # Filter for N=4096, IT=1000 for the main comparisons
 df_filtered = df_mean[
     (df_mean["N"] == 4096) & 
@@ -77,6 +87,13 @@ def plot_workgroup_performance_bar_v3_only(precision_val, log_scale=False):
         print(f"No V3 data for precision={precision_val} with N=4096, IT=1000")
         return
     
+    if log_scale:
+        filename = f"v3_performance_N4096_IT1000_{precision_val}_log.png"
+    else:
+        filename = f"v3_performance_N4096_IT1000_{precision_val}_linear.png"
+    if not build.needs(filename, data=data, style=dict(log_scale=log_scale)):
+        return
+    
     plt.figure(figsize=(14, 8))
     
     # Get unique devices and workgroups
@@ -84,7 +101,7 @@ def plot_workgroup_performance_bar_v3_only(precision_val, log_scale=False):
     workgroups = sorted(data["workgroup"].unique())
     
     # Color palette for devices
-    colors = sns.color_palette("tab10", n_colors=len(devices))
+    colors = plotting.color_palette("tab10", n_colors=len(devices))
     
     # Set up bar positions
     x = np.arange(len(workgroups))
@@ -138,14 +155,9 @@ def plot_workgroup_performance_bar_v3_only(precision_val, log_scale=False):
     # Adjust layout to prevent label cutoff
     plt.tight_layout()
     
-    # Save plot with appropriate filename
-    if log_scale:
-        filename = f"v3_performance_N4096_IT1000_{precision_val}_log.png"
-    else:
-        filename = f"v3_performance_N4096_IT1000_{precision_val}_linear.png"
-    
-    plt.savefig(os.path.join(OUT_DIR, filename), dpi=150, bbox_inches='tight')
+    plt.savefig(build.path(filename), dpi=150, bbox_inches='tight')
     plt.close()
+    build.done(filename)
     
     print(f"Plot saved: {filename}")
 
@@ -158,6 +170,13 @@ def plot_workgroup_performance_bar_v2_v3(precision_val, log_scale=False):
         print(f"No data for precision={precision_val} with N=4096, IT=1000")
         return
     
+    if log_scale:
+        filename = f"v2_v3_performance_N4096_IT1000_{precision_val}_log.png"
+    else:
+        filename = f"v2_v3_performance_N4096_IT1000_{precision_val}_linear.png"
+    if not build.needs(filename, data=data, style=dict(log_scale=log_scale)):
+        return
+    
     plt.figure(figsize=(16, 8))
     
     # Get unique devices, workgroups, and versions
@@ -166,7 +185,7 @@ def plot_workgroup_performance_bar_v2_v3(precision_val, log_scale=False):
     versions = sorted(data["version"].unique())
     
     # Color palette for devices
-    colors = sns.color_palette("tab10", n_colors=len(devices))
+    colors = plotting.color_palette("tab10", n_colors=len(devices))
     
     # Set up bar positions
     x = np.arange(len(workgroups))
@@ -251,14 +270,9 @@ def plot_workgroup_performance_bar_v2_v3(precision_val, log_scale=False):
     # Adjust layout to prevent label cutoff
     plt.tight_layout()
     
-    # Save plot with appropriate filename
-    if log_scale:
-        filename = f"v2_v3_performance_N4096_IT1000_{precision_val}_log.png"
-    else:
-        filename = f"v2_v3_performance_N4096_IT1000_{precision_val}_linear.png"
-    
-    plt.savefig(os.path.join(OUT_DIR, filename), dpi=150, bbox_inches='tight')
+    plt.savefig(build.path(filename), dpi=150, bbox_inches='tight')
     plt.close()
+    build.done(filename)
     
     print(f"Plot saved: {filename}")
 
@@ -277,6 +291,13 @@ def plot_device_details_bar(device_name):
     
     # Create both linear and log scale plots
     for log_scale in [False, True]:
+        if log_scale:
+            filename = f"{device_name}_v3_comparison_log.png"
+        else:
+            filename = f"{device_name}_v3_comparison_linear.png"
+        if not build.needs(filename, data=device_data, style=dict(log_scale=log_scale)):
+            continue
+        
         plt.figure(figsize=(16, 8))
         
         # Get unique N and IT values
@@ -285,7 +306,7 @@ def plot_device_details_bar(device_name):
         workgroups = sorted(device_data["workgroup"].unique())
         
         # Color palette for IT values
-        colors = sns.color_palette("tab10", n_colors=len(IT_values))
+        colors = plotting.color_palette("tab10", n_colors=len(IT_values))
         
         # Hatch patterns for N values
         hatch_patterns = ['', '//', '\\\\', 'xx', '..', '**']
@@ -367,37 +388,37 @@ def plot_device_details_bar(device_name):
         # Adjust layout to prevent label cutoff
         plt.tight_layout()
         
-        # Save plot
-        if log_scale:
-            filename = f"{device_name}_v3_comparison_log.png"
-        else:
-            filename = f"{device_name}_v3_comparison_linear.png"
-        
-        plt.savefig(os.path.join(OUT_DIR, filename), dpi=150, bbox_inches='tight')
+        plt.savefig(build.path(filename), dpi=150, bbox_inches='tight')
         plt.close()
+        build.done(filename)
         
         print(f"Plot saved: {filename}")
 
 # GENERATE ALL PLOTS
+build = plotting.figure_build(args, OUT_DIR)
+calls = []
 
 # 1. V3 Only plots
 for precision in ["float", "double"]:
     # Linear scale
-    plot_workgroup_performance_bar_v3_only(precision, log_scale=False)
+    calls.append((plot_workgroup_performance_bar_v3_only, dict(precision_val=precision, log_scale=False)))
     # Log scale
-    plot_workgroup_performance_bar_v3_only(precision, log_scale=True)
+    calls.append((plot_workgroup_performance_bar_v3_only, dict(precision_val=precision, log_scale=True)))
 
 # 2. V2 vs V3 Comparison plots
 for precision in ["float", "double"]:
     # Linear scale
-    plot_workgroup_performance_bar_v2_v3(precision, log_scale=False)
+    calls.append((plot_workgroup_performance_bar_v2_v3, dict(precision_val=precision, log_scale=False)))
     # Log scale
-    plot_workgroup_performance_bar_v2_v3(precision, log_scale=True)
+    calls.append((plot_workgroup_performance_bar_v2_v3, dict(precision_val=precision, log_scale=True)))
 
 # 3. Individual device details plots for all devices
 devices = ["paul", "jonas", "peter", "ifi"]
 for device in devices:
-    plot_device_details_bar(device)
+    calls.append((plot_device_details_bar, dict(device_name=device)))
+
+build.run(calls, jobs=args.jobs)
+build.report()
 
 print(f"\nAll plots generated in '{OUT_DIR}' directory!")
 print("Graphs created:")
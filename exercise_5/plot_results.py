@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 import os
+import sys
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import matplotlib.ticker as ticker
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from gpubench import dataflow, plotting
 
 # -------------------------------------------------------
 # Configuration
@@ -17,7 +18,6 @@ FILES = [
 ]
 
 OUT_DIR = "plots"
-os.makedirs(OUT_DIR, exist_ok=True)
 
 DEVICE_INFO = {
     "paul": "Intel Iris Xe Graphics",
@@ -40,26 +40,42 @@ VERSION_MARKERS = {
     "multistage_reduction": "X",  # cross
 }
 
-sns.set_theme(style="whitegrid", context="talk")
+plotting.set_theme(style="whitegrid", context="talk")
 
 
 # -------------------------------------------------------
 # Load & prepare data
 # -------------------------------------------------------
 
-dfs = []
-for f in FILES:
-    if not os.path.exists(f):
-        print(f"⚠️ Missing file: {f}")
-        continue
+flow = dataflow.Graph()
+
+
+@flow.node(stage="raw")
+def raw() -> pd.DataFrame:
+    dfs = []
+    for f in FILES:
+        if not os.path.exists(f):
+            print(f"⚠️ Missing file: {f}")
+            continue
+
+        df = pd.read_csv(f)
+
+        # Strip whitespace from column names (e.g. "elapsed_ms ")
+        df.columns = df.columns.str.strip()
 
-    df = pd.read_csv(f)
+        dev = os.path.splitext(os.path.basename(f))[0].replace("results_", "")
+        df["device"] = dev
+        dfs.append(df)
 
-    # Strip whitespace from column names (e.g. "elapsed_ms ")
-    df.columns = df.columns.str.strip()
+    if not dfs:
+        raise SystemExit("No data files found!")
 
-    dev = os.path.splitext(os.path.basename(f))[0].replace("results_", "")
-    df["device"] = dev
+    return pd.concat(dfs, ignore_index=True)
+
+
+@flow.node(stage="validated")
+def validated(raw: pd.DataFrame) -> pd.DataFrame:
+    df = raw.copy()
 
     # Clean string columns defensively
     if "precision" in df.columns:
@@ -67,31 +83,22 @@ for f in FILES:
     if "version" in df.columns:
         df["version"] = df["version"].astype(str).str.strip()
 
-    dfs.append(df)
-
-if not dfs:
-    raise SystemExit("No data files found!")
-
-df = pd.concat(dfs, ignore_index=True)
-
-# Type conversions
-df["N"] = df["N"].astype(int)
-df["elapsed_ms"] = df["elapsed_ms"].astype(float)
+    # Type conversions
+    df["N"] = df["N"].astype(int)
+    df["elapsed_ms"] = df["elapsed_ms"].astype(float)
 
-df = df.sort_values("N")
+    return df.sort_values("N")
 
-group_cols = ["device", "version", "precision", "N"]
-df_mean = (
-    df.groupby(group_cols)["elapsed_ms"]
-    .agg(["mean", "std", "count"])
-    .reset_index()
-    .rename(columns={"mean": "elapsed_ms_mean", "std": "elapsed_ms_std"})
-)
 
-print(f"Loaded data with {len(df_mean)} unique configurations")
-print("Devices:", df_mean["device"].unique())
-print("Versions:", df_mean["version"].unique())
-print("Precisions:", df_mean["precision"].unique())
+@flow.node(stage="aggregated")
+def df_mean(validated: pd.DataFrame) -> pd.DataFrame:
+    group_cols = ["device", "version", "precision", "N"]
+    return (
+        validated.groupby(group_cols)["elapsed_ms"]
+        .agg(["mean", "std", "count"])
+        .reset_index()
+        .rename(columns={"mean": "elapsed_ms_mean", "std": "elapsed_ms_std"})
+    )
 
 
 # -------------------------------------------------------
@@ -133,6 +140,13 @@ def plot_runtime_vs_N_per_device(precision_val: str, log_y: bool = False) -> Non
         if dev_data.empty:
             continue
 
+        fname = f"runtime_vs_N_{dev}_{precision_val}"
+        if log_y:
+            fname += "_logy"
+        fname += ".png"
+        if not build.needs(fname, data=dev_data, style=dict(log_y=log_y)):
+            continue
+
         plt.figure(figsize=(10, 6))
 
         Ns = sorted(dev_data["N"].unique())
@@ -191,13 +205,9 @@ def plot_runtime_vs_N_per_device(precision_val: str, log_y: bool = False) -> Non
         plt.legend(title="Algorithm")
         plt.tight_layout()
 
-        fname = f"runtime_vs_N_{dev}_{precision_val}"
-        if log_y:
-            fname += "_logy"
-        fname += ".png"
-
-        plt.savefig(os.path.join(OUT_DIR, fname), dpi=150, bbox_inches="tight")
+        plt.savefig(build.path(fname), dpi=150, bbox_inches="tight")
         plt.close()
+        build.done(fname)
         print(f"Saved plot: {fname}")
 
 
@@ -225,6 +235,13 @@ def plot_comparison_largest_N(precision_val: str, log_y: bool = False) -> None:
         print(f"No data for precision={precision_val} with N={max_N}")
         return
 
+    fname = f"comparison_largestN_{precision_val}"
+    if log_y:
+        fname += "_logy"
+    fname += ".png"
+    if not build.needs(fname, data=data_N, style=dict(log_y=log_y)):
+        return
+
     plt.figure(figsize=(10, 6))
     ax = plt.gca()
 
@@ -315,13 +332,9 @@ def plot_comparison_largest_N(precision_val: str, log_y: bool = False) -> None:
     plt.legend(title="Algorithm")
     plt.tight_layout()
 
-    fname = f"comparison_largestN_{precision_val}"
-    if log_y:
-        fname += "_logy"
-    fname += ".png"
-
-    plt.savefig(os.path.join(OUT_DIR, fname), dpi=150, bbox_inches="tight")
+    plt.savefig(build.path(fname), dpi=150, bbox_inches="tight")
     plt.close()
+    build.done(fname)
     print(f"Saved plot: {fname}")
 
 
@@ -329,13 +342,17 @@ def plot_comparison_largest_N(precision_val: str, log_y: bool = False) -> None:
 # Plot 3: Speedup relative to sequential_reduction (points only, markers)
 # -------------------------------------------------------
 
-def compute_speedup_df() -> pd.DataFrame | None:
+@flow.node("speedup")
+def compute_speedup_df(df_mean: pd.DataFrame) -> pd.DataFrame | None:
     """
     Create a pivot table:
       index: device, precision, N
       columns: version
       values: elapsed_ms_mean
     Then add speedup columns: sequential_time / algo_time
+
+    Computed once per run through the dataflow graph and shared by all
+    speedup figures (both precisions, every device).
     """
     pivot = df_mean.pivot_table(
         index=["device", "precision", "N"],
@@ -363,7 +380,7 @@ def plot_speedup_vs_N_per_device(precision_val: str) -> None:
       y-axis: speedup vs sequential
       markers only, different marker per algorithm
     """
-    pivot = compute_speedup_df()
+    pivot = flow["speedup"]
     if pivot is None:
         return
 
@@ -379,6 +396,10 @@ def plot_speedup_vs_N_per_device(precision_val: str) -> None:
         if dev_data.empty:
             continue
 
+        fname = f"speedup_vs_N_{dev}_{precision_val}.png"
+        if not build.needs(fname, data=dev_data):
+            continue
+
         plt.figure(figsize=(10, 6))
 
         Ns = sorted(dev_data["N"].unique())
@@ -425,9 +446,9 @@ def plot_speedup_vs_N_per_device(precision_val: str) -> None:
         plt.legend()
         plt.tight_layout()
 
-        fname = f"speedup_vs_N_{dev}_{precision_val}.png"
-        plt.savefig(os.path.join(OUT_DIR, fname), dpi=150, bbox_inches="tight")
+        plt.savefig(build.path(fname), dpi=150, bbox_inches="tight")
         plt.close()
+        build.done(fname)
         print(f"Saved plot: {fname}")
 
 
@@ -436,19 +457,34 @@ def plot_speedup_vs_N_per_device(precision_val: str) -> None:
 # -------------------------------------------------------
 
 if __name__ == "__main__":
-    # 1) Runtime vs N – per device and precision (linear y + log y), points only
-    for prec in ["int", "float"]:
-        plot_runtime_vs_N_per_device(prec, log_y=False)
-        plot_runtime_vs_N_per_device(prec, log_y=True)
+    args = plotting.parse_args("Plot exercise 5 reduction results")
 
-    # 2) Device comparison for largest N (bars, with fine log ticks & labels)
-    for prec in ["int", "float"]:
-        plot_comparison_largest_N(prec, log_y=False)
-        plot_comparison_largest_N(prec, log_y=True)
+    df_mean = flow["df_mean"]
+    print(f"Loaded data with {len(df_mean)} unique configurations")
+    print("Devices:", df_mean["device"].unique())
+    print("Versions:", df_mean["version"].unique())
+    print("Precisions:", df_mean["precision"].unique())
 
-    # 3) Speedup vs sequential (points only)
-    for prec in ["int", "float"]:
-        plot_speedup_vs_N_per_device(prec)
+    plotting.exit_if_check(args, df_mean=df_mean)
 
+    plt = plotting.pyplot()
+    import matplotlib.ticker as ticker
+    build = plotting.figure_build(args, OUT_DIR)
+    flow.warm("speedup")  # shared by every speedup figure, also in --jobs workers
+
+    calls = []
+    for prec in ["int", "float"]:
+        # 1) Runtime vs N – per device and precision (linear y + log y), points only
+        calls.append((plot_runtime_vs_N_per_device, dict(precision_val=prec, log_y=False)))
+        calls.append((plot_runtime_vs_N_per_device, dict(precision_val=prec, log_y=True)))
+        # 2) Device comparison for largest N (bars, with fine log ticks & labels)
+        calls.append((plot_comparison_largest_N, dict(precision_val=prec, log_y=False)))
+        calls.append((plot_comparison_largest_N, dict(precision_val=prec, log_y=True)))
+        # 3) Speedup vs sequential (points only)
+        calls.append((plot_speedup_vs_N_per_device, dict(precision_val=prec)))
+    build.run(calls, jobs=args.jobs)
+
+    build.report()
+    flow.report()
     print(f"\nAll plots generated in '{OUT_DIR}' directory.")
 
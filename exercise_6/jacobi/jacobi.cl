@@ -34,6 +34,50 @@ __kernel void jacobi_step_double_local(
 	tmp[idx] = 0.25 * (tile[local_idx - pitch] + tile[local_idx + pitch] + tile[local_idx - 1] + tile[local_idx + 1] - factor * f[idx]);
 }
 
+/* jacobi_step_double_local plus the squared update summed per work-group
+ * into partial[group], for the convergence checks of -DTOL builds.
+ * Work-groups have to be a power of two in size. */
+__kernel void jacobi_step_double_local_norm(const __global double* u, __global double* tmp, const __global double* f, __local double* tile,
+    const int pitch, const int N, const double factor, __local double* sums, __global double* partial) {
+	int i = get_global_id(0);
+	int j = get_global_id(1);
+
+	int li = get_local_id(0) + 1;
+	int lj = get_local_id(1) + 1;
+
+	int idx = i * N + j;
+	int local_idx = li * pitch + lj;
+	int lid = get_local_id(0) * get_local_size(1) + get_local_id(1);
+
+	/* No early return: every work-item takes part in the reduction */
+	if(i < N && j < N) {
+		tile[local_idx] = u[idx];
+
+		if(get_local_id(0) == 0 && i > 0) { tile[local_idx - pitch] = u[idx - N]; }
+		if(get_local_id(0) == get_local_size(0) - 1 && i < N - 1) { tile[local_idx + pitch] = u[idx + N]; }
+		if(get_local_id(1) == 0 && j > 0) { tile[local_idx - 1] = u[idx - 1]; }
+		if(get_local_id(1) == get_local_size(1) - 1 && j < N - 1) { tile[local_idx + 1] = u[idx + 1]; }
+	}
+
+	barrier(CLK_LOCAL_MEM_FENCE);
+
+	double d = 0.0;
+	if(i > 0 && i < N - 1 && j > 0 && j < N - 1) {
+		double v = 0.25 * (tile[local_idx - pitch] + tile[local_idx + pitch] + tile[local_idx - 1] + tile[local_idx + 1] - factor * f[idx]);
+		tmp[idx] = v;
+		d = v - tile[local_idx];
+	}
+	sums[lid] = d * d;
+
+	barrier(CLK_LOCAL_MEM_FENCE);
+
+	for(int s = get_local_size(0) * get_local_size(1) / 2; s > 0; s >>= 1) {
+		if(lid < s) { sums[lid] += sums[lid + s]; }
+		barrier(CLK_LOCAL_MEM_FENCE);
+	}
+	if(lid == 0) { partial[get_group_id(0) * get_num_groups(1) + get_group_id(1)] = sums[0]; }
+}
+
 __kernel void jacobi_step_double(const __global double* u, __global double* tmp, const __global double* f, const double factor) {
 	int i = get_global_id(0);
 	int j = get_global_id(1);
@@ -79,6 +123,46 @@ __kernel void jacobi_step_float_local(
 	tmp[idx] = 0.25 * (tile[local_idx - pitch] + tile[local_idx + pitch] + tile[local_idx - 1] + tile[local_idx + 1] - factor * f[idx]);
 }
 
+__kernel void jacobi_step_float_local_norm(const __global float* u, __global float* tmp, const __global float* f, __local float* tile,
+    const int pitch, const int N, const float factor, __local float* sums, __global float* partial) {
+	int i = get_global_id(0);
+	int j = get_global_id(1);
+
+	int li = get_local_id(0) + 1;
+	int lj = get_local_id(1) + 1;
+
+	int idx = i * N + j;
+	int local_idx = li * pitch + lj;
+	int lid = get_local_id(0) * get_local_size(1) + get_local_id(1);
+
+	if(i < N && j < N) {
+		tile[local_idx] = u[idx];
+
+		if(get_local_id(0) == 0 && i > 0) { tile[local_idx - pitch] = u[idx - N]; }
+		if(get_local_id(0) == get_local_size(0) - 1 && i < N - 1) { tile[local_idx + pitch] = u[idx + N]; }
+		if(get_local_id(1) == 0 && j > 0) { tile[local_idx - 1] = u[idx - 1]; }
+		if(get_local_id(1) == get_local_size(1) - 1 && j < N - 1) { tile[local_idx + 1] = u[idx + 1]; }
+	}
+
+	barrier(CLK_LOCAL_MEM_FENCE);
+
+	float d = 0.0f;
+	if(i > 0 && i < N - 1 && j > 0 && j < N - 1) {
+		float v = 0.25 * (tile[local_idx - pitch] + tile[local_idx + pitch] + tile[local_idx - 1] + tile[local_idx + 1] - factor * f[idx]);
+		tmp[idx] = v;
+		d = v - tile[local_idx];
+	}
+	sums[lid] = d * d;
+
+	barrier(CLK_LOCAL_MEM_FENCE);
+
+	for(int s = get_local_size(0) * get_local_size(1) / 2; s > 0; s >>= 1) {
+		if(lid < s) { sums[lid] += sums[lid + s]; }
+		barrier(CLK_LOCAL_MEM_FENCE);
+	}
+	if(lid == 0) { partial[get_group_id(0) * get_num_groups(1) + get_group_id(1)] = sums[0]; }
+}
+
 __kernel void jacobi_step_float(const __global float* u, __global float* tmp, const __global float* f, const float factor) {
 	int i = get_global_id(0);
 	int j = get_global_id(1);
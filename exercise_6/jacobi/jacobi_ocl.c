@@ -39,6 +39,25 @@
 #define LOCAL_WORKGROUP_DIM_2 128
 #endif
 
+// Convergence mode: with -DTOL=1e-3 the loop stops once the relative update
+// norm ||u_k+1 - u_k|| / ||u_1 - u_0|| (equal to the relative residual) is
+// at most TOL. It is summed inside the kernel of every CHECK_EVERY-th
+// iteration and printed as a checkpoint row; IT is the iteration limit.
+#ifdef TOL
+#if VERSION != 3
+#error "TOL needs VERSION=3 (the norm is fused into the local-memory kernel)"
+#endif
+#ifdef DETAILED_TIMING
+#error "TOL and DETAILED_TIMING cannot be combined"
+#endif
+#if (LOCAL_WORKGROUP_DIM_1 * LOCAL_WORKGROUP_DIM_2) & (LOCAL_WORKGROUP_DIM_1 * LOCAL_WORKGROUP_DIM_2 - 1)
+#error "TOL needs a power-of-two work-group size for the reduction"
+#endif
+#ifndef CHECK_EVERY
+#define CHECK_EVERY 500
+#endif
+#endif
+
 VALUE u[N][N], tmp[N][N], f[N][N];
 
 VALUE init_func(int x, int y) {
@@ -88,6 +107,10 @@ int main(void) {
 	cl_int err = CL_SUCCESS;
 	cl_kernel kernel = clCreateKernel(program, KERNEL_NAME, &err);
 	CLU_ERRCHECK(err);
+#ifdef TOL
+	cl_kernel kernel_norm = clCreateKernel(program, KERNEL_NAME "_norm", &err);
+	CLU_ERRCHECK(err);
+#endif
 
 	// ========== Initialize host matrices ==========
 	memset(u, 0, sizeof(u));
@@ -110,6 +133,17 @@ int main(void) {
 	CLU_ERRCHECK(err);
 	cl_mem buf_f = clCreateBuffer(env.context, CL_MEM_READ_ONLY, bytes, NULL, &err);
 	CLU_ERRCHECK(err);
+#ifdef TOL
+	// one partial sum of squared updates per work-group
+	const size_t groups = (N / LOCAL_WORKGROUP_DIM_1) * (N / LOCAL_WORKGROUP_DIM_2);
+	cl_mem buf_partial = clCreateBuffer(env.context, CL_MEM_WRITE_ONLY, groups * sizeof(VALUE), NULL, &err);
+	CLU_ERRCHECK(err);
+	VALUE* partial = (VALUE*)malloc(groups * sizeof(VALUE));
+	if(partial == NULL) {
+		fprintf(stderr, "Failed to allocate memory for partial sums\n");
+		return EXIT_FAILURE;
+	}
+#endif
 
 	// ========== Write data to device ==========
 	const double start_time = omp_get_wtime();
@@ -158,6 +192,15 @@ int main(void) {
 	CLU_ERRCHECK(clSetKernelArg(kernel, 4, sizeof(cl_int), &pitch));
 	CLU_ERRCHECK(clSetKernelArg(kernel, 5, sizeof(cl_int), &dim));
 	CLU_ERRCHECK(clSetKernelArg(kernel, 6, sizeof(VALUE), (void*)&factor));
+#ifdef TOL
+	CLU_ERRCHECK(clSetKernelArg(kernel_norm, 2, sizeof(cl_mem), (void*)&buf_f));
+	CLU_ERRCHECK(clSetKernelArg(kernel_norm, 3, local_mem_size, NULL));
+	CLU_ERRCHECK(clSetKernelArg(kernel_norm, 4, sizeof(cl_int), &pitch));
+	CLU_ERRCHECK(clSetKernelArg(kernel_norm, 5, sizeof(cl_int), &dim));
+	CLU_ERRCHECK(clSetKernelArg(kernel_norm, 6, sizeof(VALUE), (void*)&factor));
+	CLU_ERRCHECK(clSetKernelArg(kernel_norm, 7, local_work_size[0] * local_work_size[1] * sizeof(VALUE), NULL));
+	CLU_ERRCHECK(clSetKernelArg(kernel_norm, 8, sizeof(cl_mem), (void*)&buf_partial));
+#endif
 #endif
 
 #ifdef DETAILED_TIMING
@@ -185,20 +228,57 @@ int main(void) {
 	}
 #endif
 
+#ifdef FLOAT
+	const char* prec = "float";
+#else
+	const char* prec = "double";
+#endif
+
 	// ========== Enqueue kernels ==========
+#ifndef DETAILED_TIMING
+	int iterations = IT;
+#endif
+#ifdef TOL
+	double norm0 = 0.0;
+#endif
 	for(int it = 0; it < IT; it++) {
-		CLU_ERRCHECK(clSetKernelArg(kernel, 0, sizeof(cl_mem), (void*)&buf_u));
-		CLU_ERRCHECK(clSetKernelArg(kernel, 1, sizeof(cl_mem), (void*)&buf_tmp));
+#ifdef TOL
+		const int check = it == 0 || (it + 1) % CHECK_EVERY == 0;
+		cl_kernel step = check ? kernel_norm : kernel;
+#else
+		cl_kernel step = kernel;
+#endif
+		CLU_ERRCHECK(clSetKernelArg(step, 0, sizeof(cl_mem), (void*)&buf_u));
+		CLU_ERRCHECK(clSetKernelArg(step, 1, sizeof(cl_mem), (void*)&buf_tmp));
 
 #ifdef DETAILED_TIMING
-		CLU_ERRCHECK(clEnqueueNDRangeKernel(env.command_queue, kernel, 2, NULL, global_work_size, local_work_size, 0, NULL, &kernel_events[it]));
+		CLU_ERRCHECK(clEnqueueNDRangeKernel(env.command_queue, step, 2, NULL, global_work_size, local_work_size, 0, NULL, &kernel_events[it]));
 #else
-		CLU_ERRCHECK(clEnqueueNDRangeKernel(env.command_queue, kernel, 2, NULL, global_work_size, local_work_size, 0, NULL, NULL));
+		CLU_ERRCHECK(clEnqueueNDRangeKernel(env.command_queue, step, 2, NULL, global_work_size, local_work_size, 0, NULL, NULL));
 #endif
 
 		cl_mem temp = buf_u;
 		buf_u = buf_tmp;
 		buf_tmp = temp;
+
+#ifdef TOL
+		if(check) {
+			CLU_ERRCHECK(clEnqueueReadBuffer(env.command_queue, buf_partial, CL_TRUE, 0, groups * sizeof(VALUE), partial, 0, NULL, NULL));
+			double sum = 0.0;
+			for(size_t g = 0; g < groups; g++) {
+				sum += partial[g];
+			}
+			const double norm = sqrt(sum);
+			if(it == 0) norm0 = norm;
+			const double residual = norm0 > 0.0 ? norm / norm0 : 0.0;
+			// checkpoint: mode,precision,N,iterations,residual,time_ms
+			printf("opencl_V3,%s,%d,%d,%.6e,%.3f\n", prec, N, it + 1, residual, (omp_get_wtime() - start_time) * 1000.0);
+			if(residual <= TOL) {
+				iterations = it + 1;
+				break;
+			}
+		}
+#endif
 	}
 
 #ifdef DETAILED_TIMING
@@ -228,13 +308,6 @@ int main(void) {
 	}
 #endif
 
-#ifdef FLOAT
-	const char* prec = "float";
-#else
-	const char* prec = "double";
-#endif
-
-
 #ifdef DETAILED_TIMING
 	// ========== Write timing data to CSV file ==========
 	char detail_filename[256];
@@ -307,9 +380,9 @@ int main(void) {
 #endif
 #else
 #if VERSION == 2
-	printf("opencl_V2,%s,%d,%d,%d,%d,%.3f\n", prec, N, IT, LOCAL_WORKGROUP_DIM_1, LOCAL_WORKGROUP_DIM_2, elapsed_ms);
+	printf("opencl_V2,%s,%d,%d,%d,%d,%.3f\n", prec, N, iterations, LOCAL_WORKGROUP_DIM_1, LOCAL_WORKGROUP_DIM_2, elapsed_ms);
 #else
-	printf("opencl_V3,%s,%d,%d,%d,%d,%.3f\n", prec, N, IT, LOCAL_WORKGROUP_DIM_1, LOCAL_WORKGROUP_DIM_2, elapsed_ms);
+	printf("opencl_V3,%s,%d,%d,%d,%d,%.3f\n", prec, N, iterations, LOCAL_WORKGROUP_DIM_1, LOCAL_WORKGROUP_DIM_2, elapsed_ms);
 #endif
 #endif
 
@@ -321,6 +394,11 @@ int main(void) {
 	CLU_ERRCHECK(clReleaseMemObject(buf_u));
 	CLU_ERRCHECK(clReleaseMemObject(buf_tmp));
 	CLU_ERRCHECK(clReleaseMemObject(buf_f));
+#ifdef TOL
+	CLU_ERRCHECK(clReleaseKernel(kernel_norm));
+	CLU_ERRCHECK(clReleaseMemObject(buf_partial));
+	free(partial);
+#endif
 	free(source_str);
 	clu_release(&env);
 
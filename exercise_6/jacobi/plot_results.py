@@ -1,15 +1,16 @@
 import os
+import sys
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from matplotlib.lines import Line2D
-from matplotlib.patches import Patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from gpubench import plotting, trace
+
+args = plotting.parse_args("Plot exercise 6 Jacobi V3 results")
 
 # Configuration
 FILES = ["results/results_2070.csv", "results/results_amd.csv"]
 OUT_DIR = "plots"
-os.makedirs(OUT_DIR, exist_ok=True)
 
 # Device info
 DEVICE_INFO = {
@@ -18,45 +19,54 @@ DEVICE_INFO = {
 }
 
 # Load and prepare data
-dfs = []
-for f in FILES:
-    if not os.path.exists(f):
-        print(f"⚠️ Missing file: {f}")
-        continue
-    df = pd.read_csv(f)
-    dev = os.path.splitext(os.path.basename(f))[0].replace("results_", "")
-    df["device"] = dev
-    dfs.append(df)
+with trace.span("load", files=len(FILES)):
+    dfs = []
+    for f in FILES:
+        if not os.path.exists(f):
+            print(f"⚠️ Missing file: {f}")
+            continue
+        df = pd.read_csv(f)
+        dev = os.path.splitext(os.path.basename(f))[0].replace("results_", "")
+        df["device"] = dev
+        dfs.append(df)
 
-if not dfs:
-    raise SystemExit("No data files found!")
+    if not dfs:
+        raise SystemExit("No data files found!")
 
-df = pd.concat(dfs, ignore_index=True)
+    df = pd.concat(dfs, ignore_index=True)
 
-# Ensure proper types
-df["N"] = df["N"].astype(int)
-df["IT"] = df["IT"].astype(int)
-df["LOCAL_WORKGROUP_DIM_1"] = df["LOCAL_WORKGROUP_DIM_1"].astype(int)
-df["LOCAL_WORKGROUP_DIM_2"] = df["LOCAL_WORKGROUP_DIM_2"].astype(int)
-df["precision"] = df["precision"].astype(str)
-df["elapsed_ms"] = df["elapsed_ms"].astype(float)
+with trace.span("coerce"):
+    # Ensure proper types
+    df["N"] = df["N"].astype(int)
+    df["IT"] = df["IT"].astype(int)
+    df["LOCAL_WORKGROUP_DIM_1"] = df["LOCAL_WORKGROUP_DIM_1"].astype(int)
+    df["LOCAL_WORKGROUP_DIM_2"] = df["LOCAL_WORKGROUP_DIM_2"].astype(int)
+    df["precision"] = df["precision"].astype(str)
+    df["elapsed_ms"] = df["elapsed_ms"].astype(float)
 
-# Extract version number from "opencl_V3" format
-df["version_num"] = df["version"].str.extract(r'V(\d+)').astype(int)
-df["version"] = "V" + df["version_num"].astype(str)
+    # Extract version number from "opencl_V3" format
+    df["version_num"] = df["version"].str.extract(r'V(\d+)').astype(int)
+    df["version"] = "V" + df["version_num"].astype(str)
 
-# Create workgroup dimension label for plotting
-df["workgroup"] = df["LOCAL_WORKGROUP_DIM_1"].astype(str) + "x" + df["LOCAL_WORKGROUP_DIM_2"].astype(str)
+    # Create workgroup dimension label for plotting
+    df["workgroup"] = df["LOCAL_WORKGROUP_DIM_1"].astype(str) + "x" + df["LOCAL_WORKGROUP_DIM_2"].astype(str)
 
-# Calculate mean of 5 runs for each configuration
-group_cols = ["version", "precision", "N", "IT", "LOCAL_WORKGROUP_DIM_1", "LOCAL_WORKGROUP_DIM_2", "device", "workgroup"]
-df_mean = df.groupby(group_cols)["elapsed_ms"].mean().reset_index()
+with trace.span("groupby"):
+    # Calculate mean of 5 runs for each configuration
+    group_cols = ["version", "precision", "N", "IT", "LOCAL_WORKGROUP_DIM_1", "LOCAL_WORKGROUP_DIM_2", "device", "workgroup"]
+    df_mean = df.groupby(group_cols)["elapsed_ms"].mean().reset_index()
 
 print(f"Loaded data with {len(df_mean)} unique configurations")
 print(f"Versions found: {df_mean['version'].unique()}")
 print(f"Devices found: {df_mean['device'].unique()}")
 print(f"Sample data:\n{df_mean.head()}")
 
+plotting.exit_if_check(args, df_mean=df_mean)
+
+plt = plotting.pyplot()
+from matplotlib.lines import Line2D
+from matplotlib.patches import Patch
+
 # Filter for V3 only
 df_v3 = df_mean[df_mean["version"] == "V3"]
 
@@ -82,6 +92,13 @@ def plot_n_it_comparison_for_workgroup(workgroup_dim1, workgroup_dim2, log_scale
             print(f"No {precision} data for workgroup {workgroup_dim1}x{workgroup_dim2}")
             continue
         
+        if log_scale:
+            filename = f"device_comparison_wg{workgroup_dim1}x{workgroup_dim2}_{precision}_log.png"
+        else:
+            filename = f"device_comparison_wg{workgroup_dim1}x{workgroup_dim2}_{precision}_linear.png"
+        if not build.needs(filename, data=precision_data, style=dict(log_scale=log_scale)):
+            continue
+        
         plt.figure(figsize=(14, 8))
         
         # Get unique values
@@ -90,7 +107,7 @@ def plot_n_it_comparison_for_workgroup(workgroup_dim1, workgroup_dim2, log_scale
         IT_values = sorted(precision_data["IT"].unique())
         
         # Color palette for devices
-        colors = sns.color_palette("tab10", n_colors=len(devices))
+        colors = plotting.color_palette("tab10", n_colors=len(devices))
         
         # Create x-axis labels combining N and IT
         configs = []
@@ -147,13 +164,9 @@ def plot_n_it_comparison_for_workgroup(workgroup_dim1, workgroup_dim2, log_scale
         
         plt.tight_layout()
         
-        if log_scale:
-            filename = f"device_comparison_wg{workgroup_dim1}x{workgroup_dim2}_{precision}_log.png"
-        else:
-            filename = f"device_comparison_wg{workgroup_dim1}x{workgroup_dim2}_{precision}_linear.png"
-        
-        plt.savefig(os.path.join(OUT_DIR, filename), dpi=150, bbox_inches='tight')
+        plt.savefig(build.path(filename), dpi=150, bbox_inches='tight')
         plt.close()
+        build.done(filename)
         
         print(f"Plot saved: {filename}")
 
@@ -171,12 +184,19 @@ def plot_workgroup_comparison_bar(N_val, IT_val, precision_val, log_scale=False)
         print(f"No data for N={N_val}, IT={IT_val}, precision={precision_val}")
         return
     
+    if log_scale:
+        filename = f"workgroup_comparison_N{N_val}_IT{IT_val}_{precision_val}_log.png"
+    else:
+        filename = f"workgroup_comparison_N{N_val}_IT{IT_val}_{precision_val}_linear.png"
+    if not build.needs(filename, data=data, style=dict(log_scale=log_scale)):
+        return
+    
     plt.figure(figsize=(14, 8))
     
     devices = sorted(data["device"].unique())
     workgroups = sorted(data["workgroup"].unique())
     
-    colors = sns.color_palette("tab10", n_colors=len(devices))
+    colors = plotting.color_palette("tab10", n_colors=len(devices))
     
     x = np.arange(len(workgroups))
     bar_width = 0.8 / len(devices)
@@ -223,13 +243,9 @@ def plot_workgroup_comparison_bar(N_val, IT_val, precision_val, log_scale=False)
     
     plt.tight_layout()
     
-    if log_scale:
-        filename = f"workgroup_comparison_N{N_val}_IT{IT_val}_{precision_val}_log.png"
-    else:
-        filename = f"workgroup_comparison_N{N_val}_IT{IT_val}_{precision_val}_linear.png"
-    
-    plt.savefig(os.path.join(OUT_DIR, filename), dpi=150, bbox_inches='tight')
+    plt.savefig(build.path(filename), dpi=150, bbox_inches='tight')
     plt.close()
+    build.done(filename)
     
     print(f"Plot saved: {filename}")
 
@@ -252,13 +268,20 @@ def plot_device_details_bar(device_name):
             continue
         
         for log_scale in [False, True]:
+            if log_scale:
+                filename = f"{device_name}_v3_comparison_{precision}_log.png"
+            else:
+                filename = f"{device_name}_v3_comparison_{precision}_linear.png"
+            if not build.needs(filename, data=precision_data, style=dict(log_scale=log_scale)):
+                continue
+            
             plt.figure(figsize=(16, 8))
             
             N_values = sorted(precision_data["N"].unique())
             IT_values = sorted(precision_data["IT"].unique())
             workgroups = sorted(precision_data["workgroup"].unique())
             
-            colors = sns.color_palette("tab10", n_colors=len(IT_values))
+            colors = plotting.color_palette("tab10", n_colors=len(IT_values))
             hatch_patterns = ['', '//', '\\\\', 'xx', '..', '**']
             
             x = np.arange(len(workgroups))
@@ -327,36 +350,36 @@ def plot_device_details_bar(device_name):
             
             plt.tight_layout()
             
-            if log_scale:
-                filename = f"{device_name}_v3_comparison_{precision}_log.png"
-            else:
-                filename = f"{device_name}_v3_comparison_{precision}_linear.png"
-            
-            plt.savefig(os.path.join(OUT_DIR, filename), dpi=150, bbox_inches='tight')
+            plt.savefig(build.path(filename), dpi=150, bbox_inches='tight')
             plt.close()
+            build.done(filename)
             
             print(f"Plot saved: {filename}")
 
 # GENERATE ALL PLOTS
 
 print("\n=== Generating Plots ===\n")
+build = plotting.figure_build(args, OUT_DIR)
+calls = []
 
 # 1. Device comparison for workgroup 1x256 (N and IT variations)
-print("1. Device comparison for workgroup 1x256...")
 for log_scale in [False, True]:
-    plot_n_it_comparison_for_workgroup(1, 256, log_scale=log_scale)
+    calls.append((plot_n_it_comparison_for_workgroup,
+                  dict(workgroup_dim1=1, workgroup_dim2=256, log_scale=log_scale)))
 
 # 2. Workgroup comparison for fixed N and IT
-print("\n2. Workgroup comparison for N=4096, IT=1000...")
 for precision in ["float", "double"]:
     for log_scale in [False, True]:
-        plot_workgroup_comparison_bar(4096, 1000, precision, log_scale=log_scale)
+        calls.append((plot_workgroup_comparison_bar,
+                      dict(N_val=4096, IT_val=1000, precision_val=precision, log_scale=log_scale)))
 
 # 3. Individual device details for all devices
-print("\n3. Individual device details...")
 devices = df_v3["device"].unique()
 for device in devices:
-    plot_device_details_bar(device)
+    calls.append((plot_device_details_bar, dict(device_name=device)))
+
+build.run(calls, jobs=args.jobs)
+build.report()
 
 print(f"\n=== All plots generated in '{OUT_DIR}' directory! ===")
 print("\nPlots created:")
@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 import os
+import sys
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import matplotlib.ticker as ticker
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+from gpubench import dataflow, plotting
 
 # -------------------------------------------------------
 # Configuration
@@ -19,7 +20,6 @@ FILES = [
 ]
 
 OUT_DIR = "plots"
-os.makedirs(OUT_DIR, exist_ok=True)
 
 DEVICE_INFO = {
     "peter": "RTX 2070 Laptop",
@@ -29,65 +29,80 @@ DEVICE_INFO = {
     "ifi_amd_optimised_v2": "ifi – AMD GPU (optimised v2)",  # neu
 }
 
-sns.set_theme(style="whitegrid", context="talk")
+plotting.set_theme(style="whitegrid", context="talk")
 
 
 # -------------------------------------------------------
 # Load & prepare data
 # -------------------------------------------------------
 
-dfs = []
-for f in FILES:
-    if not os.path.exists(f):
-        print(f"⚠️ Missing file: {f}")
-        continue
+flow = dataflow.Graph()
+
 
-    df_part = pd.read_csv(f)
+@flow.node(stage="raw")
+def raw() -> pd.DataFrame:
+    dfs = []
+    for f in FILES:
+        if not os.path.exists(f):
+            print(f"⚠️ Missing file: {f}")
+            continue
 
-    # Strip whitespace from column names
-    df_part.columns = df_part.columns.str.strip()
+        df_part = pd.read_csv(f)
 
-    # Derive device key from filename: results_peter.csv -> "peter"
-    dev = os.path.splitext(os.path.basename(f))[0].replace("results_", "")
-    df_part["device"] = dev
+        # Strip whitespace from column names
+        df_part.columns = df_part.columns.str.strip()
 
-    # Clean string columns defensively
-    if "precision" in df_part.columns:
-        df_part["precision"] = df_part["precision"].astype(str).str.strip()
-    if "impl" in df_part.columns:
-        df_part["impl"] = df_part["impl"].astype(str).str.strip()
+        # Derive device key from filename: results_peter.csv -> "peter"
+        dev = os.path.splitext(os.path.basename(f))[0].replace("results_", "")
+        df_part["device"] = dev
+        dfs.append(df_part)
+
+    if not dfs:
+        raise SystemExit("No data files found!")
+
+    return pd.concat(dfs, ignore_index=True)
+
+
+@flow.node(stage="validated")
+def validated(raw: pd.DataFrame) -> pd.DataFrame:
+    df = raw.copy()
 
-    dfs.append(df_part)
+    # Clean string columns defensively
+    if "precision" in df.columns:
+        df["precision"] = df["precision"].astype(str).str.strip()
+    if "impl" in df.columns:
+        df["impl"] = df["impl"].astype(str).str.strip()
 
-if not dfs:
-    raise SystemExit("No data files found!")
+    # Type conversions
+    df["N"] = df["N"].astype(int)
+    df["elapsed_ms"] = df["elapsed_ms"].astype(float)
 
-df = pd.concat(dfs, ignore_index=True)
+    # We ONLY care about opencl here (falls du später noch openmp etc. drin hast)
+    if "impl" in df.columns:
+        df = df[df["impl"] == "opencl"]
 
-# Type conversions
-df["N"] = df["N"].astype(int)
-df["elapsed_ms"] = df["elapsed_ms"].astype(float)
+    # sort for nicer plots
+    return df.sort_values(["device", "precision", "N"])
 
-# We ONLY care about opencl here (falls du später noch openmp etc. drin hast)
-if "impl" in df.columns:
-    df = df[df["impl"] == "opencl"]
 
-# sort for nicer plots
-df = df.sort_values(["device", "precision", "N"])
+@flow.node("df_mean", stage="aggregated")
+def mean_times(validated: pd.DataFrame) -> pd.DataFrame:
+    # Aggregierte Daten für Mittelwert + Std
+    group_cols = ["device", "precision", "N"]
+    return (
+        validated.groupby(group_cols)["elapsed_ms"]
+        .agg(["mean", "std", "count"])
+        .reset_index()
+        .rename(columns={"mean": "elapsed_ms_mean", "std": "elapsed_ms_std"})
+    )
 
-# Aggregierte Daten für Mittelwert + Std
-group_cols = ["device", "precision", "N"]
-df_mean = (
-    df.groupby(group_cols)["elapsed_ms"]
-    .agg(["mean", "std", "count"])
-    .reset_index()
-    .rename(columns={"mean": "elapsed_ms_mean", "std": "elapsed_ms_std"})
-)
 
-print(f"Loaded data with {len(df_mean)} unique configurations")
-print("Devices:", df_mean["device"].unique())
-print("Precisions:", df_mean["precision"].unique())
-print("N values:", sorted(df_mean["N"].unique()))
+@flow.node("gflops")
+def mean_gflops(df_mean: pd.DataFrame) -> pd.DataFrame:
+    # GFLOPS der mittleren Zeit: 2 N^3 Operationen
+    out = df_mean.copy()
+    out["gflops"] = dataflow.gflops(2.0 * out["N"] ** 3, out["elapsed_ms_mean"])
+    return out
 
 
 # -------------------------------------------------------
@@ -121,6 +136,13 @@ def plot_runtime_vs_N_per_device(log_y: bool = False) -> None:
         Ns_all = sorted(dev_mean_dev["N"].unique())
         index_of = {n: i for i, n in enumerate(Ns_all)}  # N -> Position 0,1,2,...
 
+        fname = f"runtime_vs_N_errorbars_{dev}"
+        if log_y:
+            fname += "_logy"
+        fname += ".png"
+        if not build.needs(fname, data=dev_mean_dev, style=dict(log_y=log_y)):
+            continue
+
         plt.figure(figsize=(10, 6))
 
         for prec, marker in zip(["float", "double"], ["o", "s"]):
@@ -166,13 +188,9 @@ def plot_runtime_vs_N_per_device(log_y: bool = False) -> None:
         plt.legend(title="Precision")
         plt.tight_layout()
 
-        fname = f"runtime_vs_N_errorbars_{dev}"
-        if log_y:
-            fname += "_logy"
-        fname += ".png"
-
-        plt.savefig(os.path.join(OUT_DIR, fname), dpi=150, bbox_inches="tight")
+        plt.savefig(build.path(fname), dpi=150, bbox_inches="tight")
         plt.close()
+        build.done(fname)
         print(f"Saved plot: {fname}")
 
 
@@ -193,6 +211,13 @@ def plot_device_comparison_per_precision(log_y: bool = False) -> None:
             print(f"No data for precision={prec}")
             continue
 
+        fname = f"device_comparison_errorbars_{prec}"
+        if log_y:
+            fname += "_logy"
+        fname += ".png"
+        if not build.needs(fname, data=data_prec_mean, style=dict(log_y=log_y)):
+            continue
+
         plt.figure(figsize=(10, 6))
 
         # Alle N-Werte für diese Precision
@@ -240,13 +265,9 @@ def plot_device_comparison_per_precision(log_y: bool = False) -> None:
         plt.legend(title="Device")
         plt.tight_layout()
 
-        fname = f"device_comparison_errorbars_{prec}"
-        if log_y:
-            fname += "_logy"
-        fname += ".png"
-
-        plt.savefig(os.path.join(OUT_DIR, fname), dpi=150, bbox_inches="tight")
+        plt.savefig(build.path(fname), dpi=150, bbox_inches="tight")
         plt.close()
+        build.done(fname)
         print(f"Saved plot: {fname}")
 
 
@@ -273,6 +294,10 @@ def plot_bar_largest_N() -> None:
             print(f"No data for precision={prec} at N={max_N}")
             continue
 
+        fname = f"bar_largestN_{prec}_N{max_N}.png"
+        if not build.needs(fname, data=data_prec):
+            continue
+
         plt.figure(figsize=(8, 6))
         ax = plt.gca()
 
@@ -315,26 +340,91 @@ def plot_bar_largest_N() -> None:
         plt.xticks(rotation=15, ha="right")
         plt.tight_layout()
 
-        fname = f"bar_largestN_{prec}_N{max_N}.png"
-        plt.savefig(os.path.join(OUT_DIR, fname), dpi=150, bbox_inches="tight")
+        plt.savefig(build.path(fname), dpi=150, bbox_inches="tight")
         plt.close()
+        build.done(fname)
         print(f"Saved plot: {fname}")
 
 
 # -------------------------------------------------------
-# Generate all plots
+# Plot 4: GFLOPS vs N per precision – all devices
 # -------------------------------------------------------
 
-if __name__ == "__main__":
-    # 1) pro Device: float vs double – Mean ± Std
-    plot_runtime_vs_N_per_device(log_y=False)
-    plot_runtime_vs_N_per_device(log_y=True)
+def plot_gflops_per_precision() -> None:
+    """
+    Für jede Precision:
+      x: N (als Kategorien), y: GFLOPS der mittleren Zeit, eine Linie pro Device
+    """
+    gflops = flow["gflops"]
+    for prec in ["float", "double"]:
+        data_prec = gflops[gflops["precision"] == prec]
+        if data_prec.empty:
+            continue
 
-    # 2) pro Precision: alle Devices – Mean ± Std
-    plot_device_comparison_per_precision(log_y=False)
-    plot_device_comparison_per_precision(log_y=True)
+        fname = f"gflops_{prec}.png"
+        if not build.needs(fname, data=data_prec):
+            continue
 
-    # 3) Balken für größtes N
-    plot_bar_largest_N()
+        plt.figure(figsize=(10, 6))
+        Ns_all = sorted(data_prec["N"].unique())
+        index_of = {n: i for i, n in enumerate(Ns_all)}
 
+        markers = ["o", "s", "D", "^", "v", "P", "X"]
+        for dev, marker in zip(sorted(data_prec["device"].unique()), markers):
+            dev_data = data_prec[data_prec["device"] == dev].sort_values("N")
+            plt.plot(
+                dev_data["N"].map(index_of).values.astype(float),
+                dev_data["gflops"].values.astype(float),
+                marker=marker,
+                markersize=8,
+                label=DEVICE_INFO.get(dev, dev),
+            )
+
+        plt.xticks(range(len(Ns_all)), [format_N_label(n) for n in Ns_all])
+        plt.xlabel("Matrix size N (N×N)")
+        plt.ylabel("GFLOPS (2N³ / mean time)")
+        plt.title(f"Device comparison – {prec} – GFLOPS")
+        plt.legend(title="Device")
+        plt.tight_layout()
+
+        plt.savefig(build.path(fname), dpi=150, bbox_inches="tight")
+        plt.close()
+        build.done(fname)
+        print(f"Saved plot: {fname}")
+
+
+# -------------------------------------------------------
+# Generate all plots
+# -------------------------------------------------------
+
+if __name__ == "__main__":
+    args = plotting.parse_args("Plot exercise 6 matrix multiplication results")
+
+    df_mean = flow["df_mean"]
+    print(f"Loaded data with {len(df_mean)} unique configurations")
+    print("Devices:", df_mean["device"].unique())
+    print("Precisions:", df_mean["precision"].unique())
+    print("N values:", sorted(df_mean["N"].unique()))
+
+    plotting.exit_if_check(args, df_mean=df_mean)
+
+    plt = plotting.pyplot()
+    build = plotting.figure_build(args, OUT_DIR)
+    flow.warm("gflops")  # also in --jobs workers
+
+    build.run([
+        # 1) pro Device: float vs double – Mean ± Std
+        (plot_runtime_vs_N_per_device, dict(log_y=False)),
+        (plot_runtime_vs_N_per_device, dict(log_y=True)),
+        # 2) pro Precision: alle Devices – Mean ± Std
+        (plot_device_comparison_per_precision, dict(log_y=False)),
+        (plot_device_comparison_per_precision, dict(log_y=True)),
+        # 3) Balken für größtes N
+        (plot_bar_largest_N, dict()),
+        # 4) GFLOPS pro Precision: alle Devices
+        (plot_gflops_per_precision, dict()),
+    ], jobs=args.jobs)
+
+    build.report()
+    flow.report()
     print(f"\nAll plots generated in '{OUT_DIR}' directory.")
@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 
+import os
+import sys
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from gpubench import dataflow, plotting
+
+OUT_DIR = 'plots'
 
 def load_results(nvidia_file='results_nvidia.csv', amd_file='results_amd.csv'):
     """Load benchmark results from CSV files"""
@@ -29,45 +33,29 @@ def calculate_statistics(df):
 
 def calculate_speedup(stats):
     """Calculate speedup factors"""
-    # Baseline: sequential on each platform
-    baseline_nvidia = stats[(stats['platform'] == 'IFIgpu2070 (NVIDIA)') & 
-                           (stats['version'] == 'sequential_reduction')]
-    baseline_amd = stats[(stats['platform'] == 'IFIAMD (AMD)') & 
-                        (stats['version'] == 'sequential_reduction')]
-    
-    results = []
-    
-    for platform in stats['platform'].unique():
-        platform_data = stats[stats['platform'] == platform]
-        baseline = baseline_nvidia if 'NVIDIA' in platform else baseline_amd
-        
-        for _, row in platform_data.iterrows():
-            if row['version'] != 'sequential_reduction':
-                base = baseline[(baseline['precision'] == row['precision']) & 
-                               (baseline['N'] == row['N'])]
-                
-                if not base.empty:
-                    speedup = base['mean_ms'].values[0] / row['mean_ms']
-                    results.append({
-                        'platform': platform,
-                        'version': row['version'],
-                        'precision': row['precision'],
-                        'N': row['N'],
-                        'speedup': speedup,
-                        'mean_ms': row['mean_ms']
-                    })
-    
-    return pd.DataFrame(results)
+    # Baseline: sequential on the same platform, precision and N
+    speedup = dataflow.speedup(stats, 'mean_ms', 'sequential_reduction',
+                               keys=['platform', 'precision', 'N'])
+    return speedup[['platform', 'version', 'precision', 'N', 'speedup', 'mean_ms']]
 
-def plot_performance_comparison(stats, output_dir='plots'):
+def build_flow():
+    """raw -> aggregated -> derived; each table is computed once per run"""
+    flow = dataflow.Graph()
+    flow.add('raw', load_results, inputs=[], stage='raw')
+    flow.add('stats', calculate_statistics, inputs=['raw'], stage='aggregated')
+    flow.add('speedup_df', calculate_speedup, inputs=['stats'])
+    return flow
+
+def plot_performance_comparison(stats):
     """Create performance comparison plots"""
-    Path(output_dir).mkdir(exist_ok=True)
-    
-    sns.set_style("whitegrid")
+    plt = plotting.pyplot()
     
     # 1. Absolute performance comparison
     for precision in stats['precision'].unique():
         data = stats[stats['precision'] == precision]
+        fname = f'comparison_{precision}.png'
+        if not build.needs(fname, data=data):
+            continue
         
         fig, axes = plt.subplots(1, 3, figsize=(18, 5))
         fig.suptitle(f'Performance Comparison - {precision} precision', fontsize=16)
@@ -100,17 +88,19 @@ def plot_performance_comparison(stats, output_dir='plots'):
             ax.set_yscale('log')
         
         plt.tight_layout()
-        plt.savefig(f'{output_dir}/comparison_{precision}.png', dpi=300, bbox_inches='tight')
+        plt.savefig(build.path(fname), dpi=300, bbox_inches='tight')
         plt.close()
-    
-    print(f"Plots saved to {output_dir}/")
+        build.done(fname)
 
-def plot_speedup_analysis(speedup_df, output_dir='plots'):
+def plot_speedup_analysis(speedup_df):
     """Create speedup comparison plots"""
-    Path(output_dir).mkdir(exist_ok=True)
+    plt = plotting.pyplot()
     
     for precision in speedup_df['precision'].unique():
         data = speedup_df[speedup_df['precision'] == precision]
+        fname = f'speedup_{precision}.png'
+        if not build.needs(fname, data=data):
+            continue
         
         fig, ax = plt.subplots(figsize=(12, 6))
         
@@ -136,8 +126,9 @@ def plot_speedup_analysis(speedup_df, output_dir='plots'):
         ax.grid(True, alpha=0.3)
         
         plt.tight_layout()
-        plt.savefig(f'{output_dir}/speedup_{precision}.png', dpi=300, bbox_inches='tight')
+        plt.savefig(build.path(fname), dpi=300, bbox_inches='tight')
         plt.close()
+        build.done(fname)
 
 def generate_report(stats, speedup_df, output_file='performance_report.txt'):
     """Generate text report with key findings"""
@@ -225,24 +216,35 @@ def generate_report(stats, speedup_df, output_file='performance_report.txt'):
     print(f"\nReport saved to {output_file}")
 
 def main():
+    global build
+    args = plotting.parse_args("Plot exercise 6 reduction results (NVIDIA vs AMD)")
+
+    flow = build_flow()
+
     print("Loading benchmark results...")
-    df = load_results()
-    
     print("Calculating statistics...")
-    stats = calculate_statistics(df)
+    stats = flow['stats']
     
     print("Calculating speedups...")
-    speedup_df = calculate_speedup(stats)
+    speedup_df = flow['speedup_df']
     
+    plotting.exit_if_check(args, stats=stats, speedup_df=speedup_df)
+
     print("Generating plots...")
-    plot_performance_comparison(stats)
-    plot_speedup_analysis(speedup_df)
+    plotting.set_style("whitegrid")
+    build = plotting.figure_build(args, OUT_DIR)
+    build.run([
+        (plot_performance_comparison, dict(stats=stats)),
+        (plot_speedup_analysis, dict(speedup_df=speedup_df)),
+    ], jobs=args.jobs)
+    build.report()
     
     print("Generating report...")
     generate_report(stats, speedup_df)
+    flow.report()
     
     print("\n✓ Analysis complete!")
-    print("  - Plots saved in plots/")
+    print(f"  - Plots saved in {OUT_DIR}/")
     print("  - Report saved as performance_report.txt")
 
 if __name__ == '__main__':
@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 import os
+import sys
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns  # optional, nur für hübsches Styling
-from matplotlib.ticker import LogLocator, LogFormatter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from gpubench import plotting
 
 # -------------------------------------------------------
 # Konfiguration
@@ -17,7 +18,6 @@ FILES = [
 ]
 
 OUT_DIR = "plots"
-os.makedirs(OUT_DIR, exist_ok=True)
 
 DEVICE_INFO = {
     "local": "Local machine (RTX 2070 Laptop GPU)",
@@ -25,8 +25,8 @@ DEVICE_INFO = {
     "amd": "IFI – AMD GPU",
 }
 
-# hübsches Theme (kannst du auch weglassen)
-sns.set_theme(style="whitegrid", context="talk")
+# hübsches Theme (kannst du auch weglassen), wird erst beim Plotten geladen
+plotting.set_theme(style="whitegrid", context="talk")
 
 
 # -------------------------------------------------------
@@ -102,6 +102,11 @@ pivot_mean = stats.pivot(index="device", columns="impl", values="mean")
 # -------------------------------------------------------
 
 def plot_serial_vs_opencl_bar(log_y: bool = False):
+    suffix = "_logy" if log_y else ""
+    fname = f"auto_levels_serial_vs_opencl{suffix}.png"
+    if not build.needs(fname, data=stats, style=dict(log_y=log_y)):
+        return
+
     devices = sorted(stats["device"].unique())
     x = np.arange(len(devices))
     width = 0.35
@@ -208,10 +213,10 @@ def plot_serial_vs_opencl_bar(log_y: bool = False):
         )
 
     plt.tight_layout()
-    suffix = "_logy" if log_y else ""
-    out_path = os.path.join(OUT_DIR, f"auto_levels_serial_vs_opencl{suffix}.png")
+    out_path = build.path(fname)
     plt.savefig(out_path, dpi=150, bbox_inches="tight")
     plt.close()
+    build.done(fname)
     print(f"Saved plot: {out_path}")
 
 
@@ -220,10 +225,21 @@ def plot_serial_vs_opencl_bar(log_y: bool = False):
 # -------------------------------------------------------
 
 if __name__ == "__main__":
-    # normaler Plot (linear)
-    plot_serial_vs_opencl_bar(log_y=False)
-    # feingranularer Log-Plot mit 1–10 pro Dekade
-    plot_serial_vs_opencl_bar(log_y=True)
+    args = plotting.parse_args("Plot exercise 7 auto_levels results")
+    plotting.exit_if_check(args, stats=stats)
+
+    plt = plotting.pyplot()
+    from matplotlib.ticker import LogLocator, LogFormatter
+    build = plotting.figure_build(args, OUT_DIR)
+
+    build.run([
+        # normaler Plot (linear)
+        (plot_serial_vs_opencl_bar, dict(log_y=False)),
+        # feingranularer Log-Plot mit 1–10 pro Dekade
+        (plot_serial_vs_opencl_bar, dict(log_y=True)),
+    ], jobs=args.jobs)
+
+    build.report()
 
     print(f"\nAll plots generated in '{OUT_DIR}' directory.")
 
@@ -16,6 +16,10 @@
 # Optional overrides:
 #   RUNS=5 sh benchmark.sh
 #   SKIP_HUGE=1 sh benchmark.sh
+#
+# The same sweep from the Python harness, which parses the output while it
+# streams and records failed validations and garbage output as errors:
+#   python -m gpubench.sweep exercise_8
 
 set -eu
 
@@ -19,14 +19,18 @@ Outputs (written into ./plots/):
   - compare_all_overview.png            (complete overview)
 
 Run:
-  python3 plot.py
+  python3 plot_results.py           (add --check to only validate the CSVs)
 """
 
 import csv
 import os
+import sys
 from collections import defaultdict
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from gpubench import overlay, plotting
+
 FILES = [
     ("AMD", "scan_benchmark_int_amd.csv"),
     ("RTX", "scan_benchmark_int_rtx.csv"),
@@ -42,6 +46,10 @@ OUT_BAR_OPENCL_ONLY = os.path.join(PLOTS_DIR, "compare_bar_opencl_only.png")
 OUT_ALL = os.path.join(PLOTS_DIR, "compare_all_overview.png")
 
 SHOW_POINTS = True
+# above this many samples per panel the overlay is subsampled / drawn as density strips
+MAX_POINTS = overlay.MAX_POINTS
+
+build = None  # gpubench.manifest.FigureBuild, set in main()
 
 
 # ---------- Data loading ----------
@@ -133,29 +141,24 @@ def collect_improvements(rows):
 # ---------- Plot helpers ----------
 
 def _apply_style():
-    import matplotlib.pyplot as plt
+    plt = plotting.pyplot()
     try:
         plt.style.use("seaborn-v0_8-whitegrid")
     except Exception:
         pass
 
 
-def _add_jitter_points(ax, ys_list, positions, jitter=0.06, alpha=0.35, markersize=3):
-    import random
-    rnd = random.Random(42)
-    for vals, pos in zip(ys_list, positions):
-        for v in vals:
-            x = pos + (rnd.random() * 2 - 1) * jitter
-            ax.plot(x, v, marker="o", linestyle="None", alpha=alpha, markersize=markersize)
-
-
 # ---------- Plot 1: OpenCL vs OpenCL Optimized ----------
 
 def plot_opencl_comparison(buckets, Ns, platforms):
     """
     Compare opencl vs opencl_optimized for each platform
     """
-    import matplotlib.pyplot as plt
+    name = os.path.basename(OUT_OPENCL_COMPARE)
+    if not build.needs(name, data=(buckets, Ns, platforms)):
+        return
+
+    plt = plotting.pyplot()
     
     _apply_style()
     
@@ -198,7 +201,7 @@ def plot_opencl_comparison(buckets, Ns, platforms):
                 patch.set_alpha(0.6)
             
             if SHOW_POINTS:
-                _add_jitter_points(ax, data, positions, jitter=0.05)
+                overlay.jitter_points(ax, data, positions, jitter=0.05, max_points=MAX_POINTS)
         
         # X-axis ticks
         tick_positions = []
@@ -229,6 +232,7 @@ def plot_opencl_comparison(buckets, Ns, platforms):
     fig.suptitle("OpenCL Scan: Original vs Optimized", y=1.08, fontsize=14, fontweight='bold')
     fig.tight_layout()
     fig.savefig(OUT_OPENCL_COMPARE, dpi=200, bbox_inches='tight')
+    build.done(name)
     print(f"[DONE] Wrote {OUT_OPENCL_COMPARE}")
 
 
@@ -238,7 +242,11 @@ def plot_speedup_comparison(speedups, Ns, platforms):
     """
     Show speedup for both opencl and opencl_optimized
     """
-    import matplotlib.pyplot as plt
+    name = os.path.basename(OUT_SPEEDUP)
+    if not build.needs(name, data=(speedups, Ns, platforms)):
+        return
+
+    plt = plotting.pyplot()
     
     _apply_style()
     
@@ -280,7 +288,7 @@ def plot_speedup_comparison(speedups, Ns, platforms):
                 patch.set_alpha(0.6)
             
             if SHOW_POINTS:
-                _add_jitter_points(ax, data, positions, jitter=0.05)
+                overlay.jitter_points(ax, data, positions, jitter=0.05, max_points=MAX_POINTS)
         
         # X-axis ticks
         tick_positions = []
@@ -310,6 +318,7 @@ def plot_speedup_comparison(speedups, Ns, platforms):
     fig.suptitle("Speedup: Sequential vs OpenCL (Original & Optimized)", y=1.08, fontsize=14, fontweight='bold')
     fig.tight_layout()
     fig.savefig(OUT_SPEEDUP, dpi=200, bbox_inches='tight')
+    build.done(name)
     print(f"[DONE] Wrote {OUT_SPEEDUP}")
 
 
@@ -319,7 +328,11 @@ def plot_improvement(improvements, Ns, platforms):
     """
     Show improvement: opencl_time / opencl_optimized_time
     """
-    import matplotlib.pyplot as plt
+    name = os.path.basename(OUT_IMPROVEMENT)
+    if not build.needs(name, data=(improvements, Ns, platforms)):
+        return
+
+    plt = plotting.pyplot()
     
     _apply_style()
     
@@ -361,7 +374,7 @@ def plot_improvement(improvements, Ns, platforms):
             patch.set_alpha(0.6)
         
         if SHOW_POINTS:
-            _add_jitter_points(ax, data, positions)
+            overlay.jitter_points(ax, data, positions, max_points=MAX_POINTS)
     
     # X-axis ticks
     tick_positions = []
@@ -389,6 +402,7 @@ def plot_improvement(improvements, Ns, platforms):
     
     fig.tight_layout()
     fig.savefig(OUT_IMPROVEMENT, dpi=200)
+    build.done(name)
     print(f"[DONE] Wrote {OUT_IMPROVEMENT}")
 
 
@@ -398,7 +412,11 @@ def plot_bar_times(buckets, Ns, platforms):
     """
     Bar chart showing sequential, opencl, and opencl_optimized times
     """
-    import matplotlib.pyplot as plt
+    name = os.path.basename(OUT_BAR_TIMES)
+    if not build.needs(name, data=(buckets, Ns, platforms)):
+        return
+
+    plt = plotting.pyplot()
     
     _apply_style()
     
@@ -457,13 +475,18 @@ def plot_bar_times(buckets, Ns, platforms):
                  y=1.02, fontsize=14, fontweight='bold')
     fig.tight_layout()
     fig.savefig(OUT_BAR_TIMES, dpi=200, bbox_inches='tight')
+    build.done(name)
     print(f"[DONE] Wrote {OUT_BAR_TIMES}")
 
 def plot_bar_times_opencl_only(buckets, Ns, platforms):
     """
     Bar chart showing ONLY opencl and opencl_optimized times
     """
-    import matplotlib.pyplot as plt
+    name = os.path.basename(OUT_BAR_OPENCL_ONLY)
+    if not build.needs(name, data=(buckets, Ns, platforms)):
+        return
+
+    plt = plotting.pyplot()
     
     _apply_style()
     
@@ -537,6 +560,7 @@ def plot_bar_times_opencl_only(buckets, Ns, platforms):
     )
     fig.tight_layout()
     fig.savefig(OUT_BAR_OPENCL_ONLY, dpi=200, bbox_inches="tight")
+    build.done(name)
     print(f"[DONE] Wrote {OUT_BAR_OPENCL_ONLY}")
 
 
@@ -547,7 +571,11 @@ def plot_complete_overview(buckets, speedups, improvements, Ns, platforms):
     """
     3-panel overview: Times, Speedups, Improvements
     """
-    import matplotlib.pyplot as plt
+    name = os.path.basename(OUT_ALL)
+    if not build.needs(name, data=(buckets, speedups, improvements, Ns, platforms)):
+        return
+
+    plt = plotting.pyplot()
     
     _apply_style()
     
@@ -673,12 +701,16 @@ def plot_complete_overview(buckets, speedups, improvements, Ns, platforms):
     
     fig.suptitle("Complete Performance Overview", y=1.02, fontsize=15, fontweight='bold')
     fig.savefig(OUT_ALL, dpi=200, bbox_inches='tight')
+    build.done(name)
     print(f"[DONE] Wrote {OUT_ALL}")
 
 
 # ---------- Main ----------
 
 def main():
+    global build
+    args = plotting.parse_args("Compare original vs optimized OpenCL scan benchmarks")
+
     missing = []
     for _, fname in FILES:
         if not os.path.exists(fname):
@@ -707,13 +739,22 @@ def main():
     speedups = collect_speedups(rows)
     improvements = collect_improvements(rows)
 
+    plotting.exit_if_check(args, rows=rows, buckets=buckets)
+
     # Generate all plots
-    plot_opencl_comparison(buckets, Ns, platforms)
-    plot_speedup_comparison(speedups, Ns, platforms)
-    plot_improvement(improvements, Ns, platforms)
-    plot_bar_times(buckets, Ns, platforms)
-    plot_bar_times_opencl_only(buckets, Ns, platforms)
-    plot_complete_overview(buckets, speedups, improvements, Ns, platforms)
+    build = plotting.figure_build(args, PLOTS_DIR, show_points=SHOW_POINTS,
+                                  max_points=MAX_POINTS)
+    common = dict(Ns=Ns, platforms=platforms)
+    build.run([
+        (plot_opencl_comparison, dict(buckets=buckets, **common)),
+        (plot_speedup_comparison, dict(speedups=speedups, **common)),
+        (plot_improvement, dict(improvements=improvements, **common)),
+        (plot_bar_times, dict(buckets=buckets, **common)),
+        (plot_bar_times_opencl_only, dict(buckets=buckets, **common)),
+        (plot_complete_overview, dict(buckets=buckets, speedups=speedups,
+                                      improvements=improvements, **common)),
+    ], jobs=args.jobs)
+    build.report()
 
     print("\n[DONE] All plots generated successfully!")
     print(f"  - {OUT_OPENCL_COMPARE}")
@@ -0,0 +1,12 @@
+"""
+Shared Python helpers for the exercise plot scripts and benchmark tooling.
+
+The plot_results.py scripts live in the exercise directories and are run from
+there, so they put the repository root on sys.path before importing from here:
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    from gpubench import plotting
+
+Keep this file free of imports - several scripts are started in tight loops
+after every sweep and only pay for the modules they actually use.
+"""
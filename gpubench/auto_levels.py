@@ -0,0 +1,271 @@
+"""
+Streaming auto-levels for exercise_7, with one lookup table per channel.
+
+auto_levels.c walks the image column by column (x outer, y inner, a stride
+of width x components bytes per access) and redoes the float arithmetic
+for every pixel, although a channel only has 256 possible values. AutoLevels
+produces the same output bytes in two passes over row strips that fit in
+the L2 cache, on a thread pool:
+
+  stats  per channel min, max and sum of every strip (strided 1-D views
+         of the channel, the sum in uint64), combined over the strips
+  luts   for every channel and each of the 256 values, the float
+         arithmetic of auto_levels.c done once: the same float32
+         operations in the same order and the same truncating conversion
+         to unsigned char (x86: through int32, so NaN and out-of-range
+         values become 0)
+  apply  np.take of the channel's table, strip by strip
+
+The decoded image is a memory-mapped .npy file under
+.gpubench_cache/auto_levels/ (height x width x components, components as
+stbi_load reports them, e.g. 3 for the palette PNG earth-huge.png), so
+only one strip per worker is in memory while the passes run. --scale k
+builds a k times larger image (every pixel repeated k x k) row by row,
+which gets beyond RAM without a decoder that can stream. An output
+ending in .npy stays memory-mapped; PNG output needs the image in memory.
+
+    python -m gpubench.auto_levels exercise_7/earth-huge.png /tmp/out.png --compare exercise_7/auto_levels
+    python -m gpubench.auto_levels exercise_7/earth-huge.png /tmp/out.npy --scale 8 --runs 3
+
+Every run prints a row in the layout of auto_levels.c (numpy,<ms>, the
+time of both passes without decoding and writing).
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from gpubench.bands import BandPool, cache_size
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(REPO_ROOT, ".gpubench_cache", "auto_levels")
+
+# PIL mode -> mode with the components of stbi_load(..., 0)
+_STB_MODES = {"1": "L", "L": "L", "LA": "LA", "RGB": "RGB", "RGBA": "RGBA", "PA": "RGBA"}
+_MODES = {1: "L", 2: "LA", 3: "RGB", 4: "RGBA"}
+
+
+# -------------------------------------------------------
+# Images
+# -------------------------------------------------------
+
+def decode(path, directory=CACHE_DIR):
+    """The pixels of an image file as stbi_load returns them, as a read-only memmap."""
+    from PIL import Image
+
+    stem = os.path.splitext(os.path.basename(path))[0]
+    out = os.path.join(directory, f"{stem}_{os.path.getsize(path)}.npy")
+    if os.path.exists(out) and os.path.getmtime(out) >= os.path.getmtime(path):
+        return np.load(out, mmap_mode="r")
+    with Image.open(path) as im:
+        if im.mode == "P":
+            pixels = np.asarray(im.convert("RGBA" if "transparency" in im.info else "RGB"))
+        elif im.mode.startswith("I"):  # 16-bit gray: stb keeps the high byte
+            pixels = (np.asarray(im).astype(np.uint32) >> 8).astype(np.uint8)
+        elif im.mode in _STB_MODES:
+            pixels = np.asarray(im.convert(_STB_MODES[im.mode]))
+        else:
+            raise ValueError(f"{path}: unsupported image mode {im.mode}")
+    if pixels.ndim == 2:
+        pixels = pixels[:, :, None]
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{out}.{os.getpid()}.tmp.npy"
+    np.save(tmp, pixels)
+    os.replace(tmp, out)
+    return np.load(out, mmap_mode="r")
+
+
+def upscale(image, factor, path):
+    """image with every pixel repeated factor x factor times, written row by row to path (.npy)."""
+    H, W, C = image.shape
+    out = np.lib.format.open_memmap(path, "w+", np.uint8, (H * factor, W * factor, C))
+    for y in range(H):
+        out[y * factor:(y + 1) * factor] = np.repeat(image[y], factor, axis=0)
+    out.flush()
+    return out
+
+
+def save(image, path):
+    """Write an H x W x C array as PNG (or any format PIL knows from the extension)."""
+    from PIL import Image
+
+    pixels = np.asarray(image)
+    Image.fromarray(pixels[:, :, 0] if pixels.shape[2] == 1 else pixels,
+                    _MODES[pixels.shape[2]]).save(path)
+
+
+# -------------------------------------------------------
+# Engine
+# -------------------------------------------------------
+
+def _to_uchar(x):
+    """(unsigned char)x of gcc on x86-64: cvttss2si to int32, then the low byte."""
+    ok = np.isfinite(x) & (np.abs(x) < 2.0**31)
+    return (np.where(ok, np.trunc(np.where(ok, x, 0)), -2**31).astype(np.int64) & 0xFF).astype(np.uint8)
+
+
+def luts(mins, maxs, sums, pixels):
+    """components x 256 table of the adjusted value of every input value."""
+    f = np.float32
+    values = np.arange(256)
+    out = np.empty((len(mins), 256), np.uint8)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for c in range(len(mins)):
+            avg = int(sums[c]) // pixels
+            min_fac = f(avg) / (f(avg) - f(mins[c]))
+            max_fac = (f(255.0) - f(avg)) / (f(maxs[c]) - f(avg))
+            v = values.astype(f) - f(avg)
+            v *= np.where(values < avg, min_fac, max_fac).astype(f)
+            out[c] = _to_uchar(v + f(avg))
+    return out
+
+
+class AutoLevels(BandPool):
+    """
+    The two passes over one H x W x C image, on `workers` threads. Every
+    worker takes a contiguous band of row strips.
+    """
+
+    def __init__(self, image, workers=None, rows=None):
+        self.image = image
+        H, W, C = image.shape
+        super().__init__(workers)
+        # input, output and index temporaries of a strip in the L2 cache
+        self.rows = rows or max(1, cache_size() // (4 * W * C))
+        strips = [(y, min(y + self.rows, H)) for y in range(0, H, self.rows)]
+        self.bands = [[strips[k] for k in band] for band in self.split(len(strips))]
+
+    def _map(self, func):
+        return self.map(func, self.bands)
+
+    def stats(self):
+        """(min, max, sum) per channel, as lists of ints."""
+        C = self.image.shape[2]
+
+        def band(strips):
+            mins, maxs, sums = [255] * C, [0] * C, [0] * C
+            for y0, y1 in strips:
+                pixels = self.image[y0:y1].reshape(-1, C)
+                for c in range(C):
+                    v = pixels[:, c]
+                    mins[c] = min(mins[c], int(v.min()))
+                    maxs[c] = max(maxs[c], int(v.max()))
+                    sums[c] += int(np.add.reduce(v, dtype=np.uint64))
+            return mins, maxs, sums
+
+        parts = self._map(band)
+        return ([min(p[0][c] for p in parts) for c in range(C)],
+                [max(p[1][c] for p in parts) for c in range(C)],
+                [sum(p[2][c] for p in parts) for c in range(C)])
+
+    def apply(self, tables, out):
+        """out = tables[c][image] per channel (out may be the image itself)."""
+        C = self.image.shape[2]
+
+        def band(strips):
+            for y0, y1 in strips:
+                src, dst = self.image[y0:y1], out[y0:y1]
+                for c in range(C):
+                    np.take(tables[c], src[..., c], out=dst[..., c])
+
+        self._map(band)
+        return out
+
+    def run(self, out):
+        """Both passes into out; returns the tables."""
+        H, W, _ = self.image.shape
+        tables = luts(*self.stats(), H * W)
+        self.apply(tables, out)
+        return tables
+
+
+# -------------------------------------------------------
+# Benchmark
+# -------------------------------------------------------
+
+def compare(binary, path, pixels):
+    """Number of bytes in which the serial binary's output for `path` differs from pixels."""
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "serial.png")
+        proc = subprocess.run([os.path.abspath(binary), os.path.abspath(path), out],
+                              capture_output=True, text=True)
+        if proc.returncode != 0 or not os.path.exists(out):
+            raise RuntimeError(f"{binary} failed: {proc.stdout.strip()} {proc.stderr.strip()}")
+        print(f"[INFO] {os.path.basename(binary)}: {proc.stdout.strip()}")
+        reference = np.asarray(decode(out, tmp))
+    if reference.shape != pixels.shape:
+        return pixels.size
+    return int(np.count_nonzero(reference != pixels))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streaming auto-levels of exercise_7")
+    parser.add_argument("input", help="image file (e.g. exercise_7/earth-huge.png)")
+    parser.add_argument("output", help="adjusted image (.png, or .npy to keep it memory-mapped)")
+    parser.add_argument("--scale", type=int, default=1,
+                        help="repeat every pixel k x k times first (images beyond RAM)")
+    parser.add_argument("--workers", type=int, help="threads (default: all cores)")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--in-place", action="store_true",
+                        help="adjust a copy of the image in place, as auto_levels.c does")
+    parser.add_argument("--compare", metavar="BINARY",
+                        help="check the output bytes against the serial auto_levels binary")
+    args = parser.parse_args(argv)
+
+    image = decode(args.input)
+    scratch = []
+    if args.scale > 1:
+        stem = os.path.splitext(os.path.basename(args.input))[0]
+        path = os.path.join(CACHE_DIR, f"{stem}_x{args.scale}_{os.getpid()}.npy")
+        scratch.append(path)
+        image = upscale(image, args.scale, path)
+    H, W, C = image.shape
+    print(f"[INFO] {args.input}: {W} x {H}, {C} component(s), {image.nbytes / 1e9:.2f} GB")
+
+    if args.output.endswith(".npy"):
+        out = np.lib.format.open_memmap(args.output, "w+", np.uint8, image.shape)
+    else:
+        path = os.path.join(CACHE_DIR, f"out_{os.getpid()}.npy")
+        scratch.append(path)
+        out = np.lib.format.open_memmap(path, "w+", np.uint8, image.shape)
+    try:
+        times = []
+        with AutoLevels(out if args.in_place else image, args.workers) as engine:
+            for _ in range(args.runs):
+                if args.in_place:
+                    out[:] = image
+                t0 = time.perf_counter()
+                engine.run(out)
+                ms = (time.perf_counter() - t0) * 1000.0
+                times.append(ms)
+                print(f"numpy,{ms:.6f}")
+        ms = float(np.median(times))
+        print(f"[SUMMARY] numpy {W} x {H}: {ms:.1f} ms, {image.nbytes / ms / 1e6:.2f} GB/s "
+              f"on {engine.workers} thread(s), strips of {engine.rows} row(s)")
+
+        if not args.output.endswith(".npy"):
+            save(out, args.output)
+        print(f"[DONE] {args.output}")
+
+        if args.compare:
+            if args.scale > 1:
+                print("[INFO] --compare skipped: the binary only reads the unscaled image")
+            else:
+                bad = compare(args.compare, args.input, np.asarray(out))
+                if bad:
+                    print(f"[ERROR] {bad} byte(s) differ from {args.compare}")
+                    sys.exit(1)
+                print(f"[DONE] output bytes identical to {args.compare}")
+    finally:
+        del out, image
+        for path in scratch:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
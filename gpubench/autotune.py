@@ -0,0 +1,323 @@
+"""
+Workgroup / tile size autotuning with successive halving.
+
+Finding the best LOCAL_WORKGROUP_DIM_1 x DIM_2 for a new device used to mean
+running the whole grid at full size. Here every candidate first gets a cheap
+probe (few iterations, one run); only the best 1/eta of them advance to the
+next, more expensive rung, and the finalists get full runs:
+
+    rung 0   IT=10,   1 run    all 24 workgroup shapes
+    rung 1   IT=100,  3 runs   best 8
+    rung 2   IT=1000, 5 runs   best 3  -> winner
+
+Candidates that fail (unsupported work-group size, wrong result, timeout)
+are dropped at the rung they fail in. Binaries of each rung are built
+through gpubench.build, so only the survivors' binaries are compiled.
+
+    python -m gpubench.autotune exercise_6/jacobi --device amd
+    python -m gpubench.autotune exercise_10/optimized --device nvidia --N 2048
+
+The winner per (device, N, precision) goes to <exercise>/tuning.json. Sweeps
+and builds use it with --tuned: the workgroup axes of each point are replaced
+by the tuned ones, points without an entry keep the grid.
+
+    python -m gpubench.build exercise_6/jacobi --tuned amd
+    python -m gpubench.sweep exercise_6/jacobi --device amd --tuned
+
+Every probe is appended to <exercise>/results/tune_<device>.csv (rows in
+the sweep's layout), with sampling records and errors next to it. Its
+journal makes an interrupted tuning resume at the probe it stopped in.
+"""
+
+import argparse
+import datetime
+import json
+import math
+import os
+
+from gpubench import build, provenance
+from gpubench import sweep as sweeps
+from gpubench.sampling import Sampling
+
+# -------------------------------------------------------
+# Tuning problems
+# -------------------------------------------------------
+
+
+def workgroup_shapes(sizes=(64, 128, 256), max_dim=256, min_dim=1):
+    """All power-of-two (D1, D2) with D1 * D2 in `sizes`."""
+    dims = [2**k for k in range(12) if min_dim <= 2**k <= max_dim]
+    return [{"D1": d1, "D2": d2} for d1 in dims for d2 in dims if d1 * d2 in sizes]
+
+
+class Tuning:
+    """
+    exercise:  sweep whose binaries are tuned
+    target:    template of the tuned binary (one of the sweep's targets or a variant)
+    knobs:     candidate dicts, e.g. {"D1": 4, "D2": 64}
+    rungs:     (axis overrides, runs) per rung: cheap probes first, the full run last
+    eta:       keep the best 1/eta of the candidates after each rung
+    """
+
+    def __init__(self, exercise, target, knobs, rungs, eta=3):
+        self.exercise = exercise
+        self.target = target
+        self.knobs = list(knobs)
+        self.rungs = list(rungs)
+        self.eta = eta
+
+    @property
+    def sweep(self):
+        return sweeps.SWEEPS[self.exercise]
+
+    @property
+    def axes(self):
+        return sorted({axis for knob in self.knobs for axis in knob})
+
+    def problems(self):
+        """(N, precision) pairs of the sweep's space, in sweep order."""
+        seen = []
+        for point in self.sweep.space:
+            key = (point["N"], point["precision"])
+            if key not in seen:
+                seen.append(key)
+        return seen
+
+
+_JACOBI_RUNGS = [({"IT": 10}, 1), ({"IT": 100}, 3), ({"IT": 1000}, 5)]
+
+TUNINGS = {
+    t.exercise: t
+    for t in [
+        Tuning(
+            "exercise_4",
+            "jacobi_ocl_N{N}_IT{IT}_DIM1-{D1}_DIM2-{D2}{float}_V3",
+            workgroup_shapes(),
+            _JACOBI_RUNGS,
+        ),
+        Tuning(
+            "exercise_6/jacobi",
+            "jacobi_ocl_N{N}_IT{IT}_DIM1-{D1}_DIM2-{D2}{float}_V3",
+            workgroup_shapes(),
+            _JACOBI_RUNGS,
+        ),
+        Tuning(
+            "exercise_10/optimized",
+            "matrix_mul_N{N}_{precision}_TS{TS}",
+            [{"TS": ts} for ts in (4, 8, 16, 32)],
+            [({}, 1), ({}, 3), ({}, 9)],
+            eta=2,
+        ),
+    ]
+}
+
+
+# -------------------------------------------------------
+# Tuning database
+# -------------------------------------------------------
+
+class TuningDB:
+    """
+    <exercise>/tuning.json: {device: {"<N>/<precision>": {knobs..., "score": ...}}}.
+    Writes go through a temporary file and os.replace.
+    """
+
+    def __init__(self, exercise):
+        self.path = os.path.join(sweeps.REPO_ROOT, exercise, "tuning.json")
+        self.data = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.data = json.load(f)
+
+    @staticmethod
+    def key(N, precision):
+        return f"{N}/{precision}"
+
+    def get(self, device, N, precision):
+        return self.data.get(device, {}).get(self.key(N, precision))
+
+    def put(self, device, N, precision, entry):
+        self.data.setdefault(device, {})[self.key(N, precision)] = entry
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.data, f, indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp, self.path)
+
+
+def tuned(sweep, device):
+    """
+    `sweep` with the tuned knobs of `device` substituted into every point;
+    points whose (N, precision) has no entry keep their grid values.
+    """
+    tuning = TUNINGS.get(sweep.exercise)
+    if tuning is None:
+        raise SystemExit(f"no tuning for {sweep.exercise} (known: {', '.join(TUNINGS)})")
+    db = TuningDB(sweep.exercise)
+    points, missing = [], set()
+    for point in sweep.space:
+        entry = db.get(device, point["N"], point["precision"])
+        if entry is None:
+            missing.add((point["N"], point["precision"]))
+        else:
+            point = {**point, **{axis: entry[axis] for axis in tuning.axes}}
+        if point not in points:
+            points.append(point)
+    for N, precision in sorted(missing, key=str):
+        print(f"[INFO] No tuned {'/'.join(tuning.axes)} for {device} N={N} {precision}; using the grid")
+    axes = list(points[0]) if points else []
+    return sweep.with_space(sweeps.Space().zip(**{a: [p[a] for p in points] for a in axes}))
+
+
+# -------------------------------------------------------
+# Successive halving
+# -------------------------------------------------------
+
+def successive_halving(candidates, rungs, evaluate, eta=3, log=None):
+    """
+    evaluate(candidates, rung) -> one score per candidate (lower is better,
+    None for failed). Returns the survivors of the last rung as (score, candidate),
+    best first.
+    """
+    alive = list(candidates)
+    ranked = []
+    for i, rung in enumerate(rungs):
+        scores = evaluate(alive, rung)
+        ranked = sorted(
+            ((s, c) for s, c in zip(scores, alive) if s is not None and math.isfinite(s)),
+            key=lambda sc: sc[0],
+        )
+        if log:
+            log(i, rung, len(alive), ranked)
+        if i == len(rungs) - 1 or not ranked:
+            break
+        keep = max(1, math.ceil(len(alive) / eta))
+        alive = [c for _, c in ranked[:keep]]
+    return ranked
+
+
+def tune(tuning, device, N, precision, bin_dir=None, timeout=None, do_build=True,
+         jobs=1, out=None):
+    """Tune one (N, precision); returns the database entry of the winner or None."""
+    sweep = tuning.sweep
+    out = out or os.path.join(sweep.directory, "results", f"tune_{device}.csv")
+    env = provenance.record(os.path.dirname(os.path.abspath(out)), sweep.directory)
+    writer = sweeps.ResultWriter(out, sweep.columns, env=env)
+    target = sweeps.Target(tuning.target)
+    timeout = sweep.timeout if timeout is None else timeout
+    bin_path = os.path.join(sweep.directory, bin_dir or sweep.bin_dir)
+    total_runs = [0]
+
+    def evaluate(knobs, rung):
+        overrides, runs = rung
+        base = next(p for p in sweep.space if (p["N"], p["precision"]) == (N, precision))
+        points = [{**base, **overrides, **knob} for knob in knobs]
+        rung_sweep = sweeps.Sweep(
+            sweep.exercise,
+            space=sweeps.Space().zip(**{a: [p[a] for p in points] for a in points[0]}),
+            targets=[target], columns=sweep.columns, bin_dir=bin_dir or sweep.bin_dir,
+        )
+        if do_build:
+            build.build_sweep(rung_sweep, jobs=jobs)
+        scores = []
+        for point in points:
+            binary = target.binary(point)
+            record, _ = sweeps.run_config(sweep, point, target, os.path.join(bin_path, binary),
+                                          Sampling.fixed(runs), timeout, writer,
+                                          key=f"rung{tuning.rungs.index(rung)}/{binary}")
+            total_runs[0] += record["runs"]
+            medians = [s["median"] for s in record["series"] if "median" in s]
+            ok = medians and record["failed"] == 0
+            scores.append(max(medians) if ok else None)
+        return scores
+
+    def log(i, rung, n, ranked):
+        overrides, runs = rung
+        what = " ".join(f"{k}={v}" for k, v in overrides.items()) or "full size"
+        best = (f", best {_knob_str(ranked[0][1])} {ranked[0][0]:.3f} {sweep.metric}"
+                if ranked else "")
+        print(f"[INFO] rung {i}: {n} candidate(s) at {what} x{runs}, "
+              f"{n - len(ranked)} failed{best}")
+
+    print(f"[INFO] Tuning {tuning.exercise} for {device} N={N} {precision}: "
+          f"{len(tuning.knobs)} candidates, {len(tuning.rungs)} rungs")
+    ranked = successive_halving(tuning.knobs, tuning.rungs, evaluate, tuning.eta, log)
+    if not ranked:
+        print(f"[ERROR] every candidate failed for N={N} {precision}")
+        return None
+    score, knob = ranked[0]
+    return {
+        **knob,
+        "score": score,
+        "metric": sweep.metric,
+        "rung": tuning.rungs[-1][0],
+        "runs": total_runs[0],
+        "candidates": len(tuning.knobs),
+        "finalists": [dict(k, score=s) for s, k in ranked],
+        "host": sweeps.HOST,
+        "env": env,
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def _knob_str(knob):
+    return " ".join(f"{k}={v}" for k, v in knob.items())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Autotune workgroup / tile sizes with successive halving")
+    parser.add_argument("exercise", help=f"one of {', '.join(TUNINGS)}")
+    parser.add_argument("--device", default=sweeps.HOST.split(".")[0],
+                        help="device label in the tuning database (default: host name)")
+    parser.add_argument("--N", type=int, action="append", help="only these sizes (repeatable)")
+    parser.add_argument("--precision", action="append", choices=["float", "double"],
+                        help="only these precisions (repeatable)")
+    parser.add_argument("--bin-dir", help="directory for the binaries (default: per sweep)")
+    parser.add_argument("--eta", type=int, help="keep 1/eta candidates per rung (default: per tuning)")
+    parser.add_argument("--timeout", type=float, help="seconds before a run is killed")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="parallel compiler processes")
+    parser.add_argument("--no-build", action="store_true",
+                        help="use existing binaries instead of building through the cache")
+    parser.add_argument("--dry-run", action="store_true", help="list candidates and rungs only")
+    args = parser.parse_args(argv)
+
+    key = os.path.relpath(os.path.abspath(args.exercise), sweeps.REPO_ROOT).replace(os.sep, "/")
+    tuning = TUNINGS.get(key) or TUNINGS.get(args.exercise.strip("/"))
+    if tuning is None:
+        raise SystemExit(f"no tuning for '{args.exercise}' (known: {', '.join(TUNINGS)})")
+    if args.eta:
+        tuning.eta = args.eta
+
+    problems = [
+        (N, p) for N, p in tuning.problems()
+        if (not args.N or N in args.N) and (not args.precision or p in args.precision)
+    ]
+    if args.dry_run:
+        n = len(tuning.knobs)
+        for i, (overrides, runs) in enumerate(tuning.rungs):
+            print(f"[INFO] rung {i}: <= {n} candidate(s), {overrides or 'full size'} x{runs}")
+            n = max(1, math.ceil(n / tuning.eta))
+        print(f"[INFO] candidates: {', '.join(_knob_str(k) for k in tuning.knobs)}")
+        print(f"[INFO] problems: {', '.join(f'N={N} {p}' for N, p in problems)}")
+        return
+
+    db = TuningDB(tuning.exercise)
+    failed = 0
+    for N, precision in problems:
+        entry = tune(tuning, args.device, N, precision, args.bin_dir, args.timeout,
+                     not args.no_build, args.jobs)
+        if entry is None:
+            failed += 1
+            continue
+        db.put(args.device, N, precision, entry)
+        print(f"[DONE] {args.device} N={N} {precision}: "
+              f"{_knob_str({a: entry[a] for a in tuning.axes})} "
+              f"({entry['score']:.3f} {entry['metric']}, {entry['runs']} runs)")
+    print(f"[SUMMARY] {len(problems) - failed}/{len(problems)} tuned -> {db.path}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Worker threads over contiguous bands of cache-sized pieces.
+
+The NumPy engines (jacobi, reduction, scan, list_sort, auto_levels) cut
+their input into pieces sized from cache_size() and give every worker one
+contiguous band of them. NumPy's kernels release the GIL, so the bands
+run in parallel on plain threads:
+
+    class Reducer(BandPool):
+        def sums(self, chunks):
+            def band(ks):                      # a range of piece indices
+                return [data[lo:hi].sum() for lo, hi in (chunks[k] for k in ks)]
+            return self.map(band, self.split(len(chunks)))
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def cache_size(level=2, default=1 << 20):
+    """Bytes of the level-`level` data cache of cpu0 (sysfs), or `default`."""
+    base = "/sys/devices/system/cpu/cpu0/cache"
+    try:
+        for index in sorted(os.listdir(base)):
+            path = os.path.join(base, index)
+            with open(os.path.join(path, "level")) as f:
+                if int(f.read()) != level:
+                    continue
+            with open(os.path.join(path, "type")) as f:
+                if f.read().strip() == "Instruction":
+                    continue
+            with open(os.path.join(path, "size")) as f:
+                text = f.read().strip()
+            return int(text[:-1]) * {"K": 1 << 10, "M": 1 << 20}[text[-1]]
+    except (OSError, ValueError, KeyError):
+        pass
+    return default
+
+
+def split(count, parts):
+    """range(count) as at most `parts` contiguous, non-empty, near-equal ranges."""
+    if count <= 0:
+        return []
+    return [range(int(p[0]), int(p[-1]) + 1)
+            for p in np.array_split(np.arange(count), min(parts, count))]
+
+
+class BandPool:
+    """
+    `workers` threads (default: one per CPU; none for a single worker).
+    Close it, or use it as a context manager.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.pool = ThreadPoolExecutor(self.workers) if self.workers > 1 else None
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def split(self, count):
+        """range(count) as one band per worker."""
+        return split(count, self.workers)
+
+    def map(self, func, bands):
+        """[func(band) for band in bands], the bands on the worker threads."""
+        bands = list(bands)
+        if self.pool is None or len(bands) < 2:
+            return [func(band) for band in bands]
+        return [f.result() for f in [self.pool.submit(func, band) for band in bands]]
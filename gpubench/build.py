@@ -0,0 +1,375 @@
+"""
+Content-addressed build cache for the per-configuration binaries.
+
+The sweeps in gpubench.sweep need one binary per N x IT x workgroup x
+precision x version, because all of them are compile-time defines. Instead of
+`make clean && make all ...` for every combination, each binary is built from
+a key over everything that affects the output:
+
+  - the contents of the main source, $(SRC) and $(DEPS)
+  - the compiler (resolved path and `--version`)
+  - CFLAGS, LDFLAGS and LIBS as make sees them after reading the exercise
+    Makefile (=, :=, ?=, += and ifdef/ifeq blocks; --set DUMP=1 is a
+    variable given on the make command line)
+  - the defines of the configuration (-DN=..., -DFLOAT, -DVERSION=3, ...)
+
+Compiled binaries live in .gpubench_cache/build/<key>/ and are hard-linked
+(or copied) into the sweep's binary directory. Only keys that are not in the
+cache are compiled, in parallel over --jobs processes, so adding one
+workgroup shape to a sweep compiles exactly the new binaries.
+
+    python -m gpubench.build exercise_6/jacobi --jobs 8
+    python -m gpubench.build exercise_8 --dry-run
+    python -m gpubench.build exercise_10/optimized --set DUMP=1
+
+There are recipes for the exercises with a sweep. exercise_6/matrix_mul has
+none: each device directory there is its own copy of the sources, built by
+run_benchmark.sh one `make N=...` at a time, and prints "C[0,0] = ..., time
+= ... ms" instead of rows a parser of gpubench.parsers reads.
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from gpubench import sweep as sweeps
+from gpubench import trace
+
+CACHE_DIR = os.path.join(sweeps.REPO_ROOT, ".gpubench_cache", "build")
+
+# space axis -> preprocessor define, as in the Makefiles
+DEFINES = {
+    "N": "N",
+    "IT": "IT",
+    "TOL": "TOL",
+    "D1": "LOCAL_WORKGROUP_DIM_1",
+    "D2": "LOCAL_WORKGROUP_DIM_2",
+    "TS": "TILE_SIZE",
+}
+
+
+# -------------------------------------------------------
+# Recipes
+# -------------------------------------------------------
+
+_ASSIGN = re.compile(r"^([A-Za-z_][A-Za-z0-9_]*)\s*(::?=|\?=|\+=|=)\s*(.*)$")
+_REF = re.compile(r"\$[({]([A-Za-z_][A-Za-z0-9_]*)[)}]")
+_CALL = re.compile(r"\$[({][a-z-]+\s")  # $(foreach ...), $(wildcard ...)
+
+
+def _condition(directive, arg, defined, expand):
+    if directive in ("ifdef", "ifndef"):
+        return defined(arg.strip()) == (directive == "ifdef")
+    arg = expand(arg).strip()
+    if arg.startswith("(") and arg.endswith(")"):
+        a, _, b = arg[1:-1].partition(",")
+    else:
+        quoted = re.findall(r"\"([^\"]*)\"|'([^']*)'", arg)
+        a, b = ("".join(q) for q in (quoted + [("", ""), ("", "")])[:2])
+    return (a.strip() == b.strip()) == (directive == "ifeq")
+
+
+def makefile_vars(path, overrides=None):
+    """
+    Variables of a Makefile as make sees them after reading it: =, :=, ?=
+    and += assignments in the branches ifdef/ifndef/ifeq/ifneq take, with
+    $(VAR) references expanded. `overrides` are command-line variables
+    (make DUMP=1), which win over assignments in the file.
+    """
+    overrides = {name: str(value) for name, value in (overrides or {}).items()}
+    raw = dict(overrides)
+    expanded = set(overrides)  # := and command-line values, not expanded again
+
+    def expand(text, seen=()):
+        if _CALL.search(text):  # functions are left to make
+            return text
+        def ref(m):
+            name = m.group(1)
+            if name in seen:
+                return ""
+            value = raw.get(name, "")
+            return value if name in expanded else expand(value, seen + (name,))
+        return _REF.sub(ref, text)
+
+    def defined(name):
+        return raw.get(name, "") != ""
+
+    # per open conditional: [enclosing branch read, a branch taken, this branch read]
+    stack = []
+    with open(path) as f:
+        for line in f:
+            if line.startswith("\t"):  # recipe
+                continue
+            line = line.split("#", 1)[0].strip()
+            directive, _, arg = line.partition(" ")
+            if directive == "else" and stack:
+                outer, taken, _ = stack[-1]
+                cond, _, rest = arg.strip().partition(" ")
+                now = not taken and (cond not in ("ifdef", "ifndef", "ifeq", "ifneq")
+                                     or _condition(cond, rest, defined, expand))
+                stack[-1] = [outer, taken or now, outer and now]
+                continue
+            if directive == "endif" and stack:
+                stack.pop()
+                continue
+            reading = all(level[2] for level in stack)
+            if directive in ("ifdef", "ifndef", "ifeq", "ifneq"):
+                now = reading and _condition(directive, arg, defined, expand)
+                stack.append([reading, now, now])
+                continue
+            m = _ASSIGN.match(line)
+            if not m or not reading or m.group(1) in overrides:
+                continue
+            name, op, value = m.groups()
+            if op == "?=" and name in raw:
+                continue
+            if op == "+=" and name in raw:
+                value = raw[name] + " " + (expand(value) if name in expanded else value)
+            elif op in (":=", "::="):
+                value = expand(value)
+                expanded.add(name)
+            else:
+                expanded.discard(name)
+            raw[name] = value.strip()
+    return {name: raw[name] if name in expanded else expand(raw[name]) for name in raw}
+
+
+class Recipe:
+    """
+    How one Target of a sweep is compiled, mirroring its Makefile rule.
+
+    main:       the translation unit ($<), None if $(SRC) has it already
+    flags:      extra flags of the rule (-DVERSION=3, -fopenmp, -DOPT)
+    src:        whether $(SRC) is linked in
+    precision:  precision -> flags selecting it (default: -DFLOAT for float)
+    """
+
+    def __init__(self, main, flags=(), src=True, precision=None):
+        self.main = main
+        self.flags = list(flags)
+        self.src = src
+        self.precision = precision or {"float": ["-DFLOAT"]}
+
+    def defines(self, point):
+        out = [f"-D{DEFINES[axis]}={point[axis]}" for axis in DEFINES if axis in point]
+        out += self.precision.get(point.get("precision"), [])
+        return out
+
+    def sources(self, make):
+        files = [self.main] if self.main else []
+        if self.src:
+            files += make.get("SRC", "").split()
+        return files
+
+    def command(self, make, point, out):
+        return [
+            make.get("CC") or "gcc", "-o", out, *self.sources(make),
+            *make.get("CFLAGS", "").split(), *make.get("LDFLAGS", "").split(),
+            *make.get("LIBS", "").split(), *self.defines(point), *self.flags,
+        ]
+
+
+_JACOBI_V2 = Recipe("jacobi_ocl.c", ["-DVERSION=2"])
+_JACOBI_V3 = Recipe("jacobi_ocl.c", ["-DVERSION=3"])
+
+# (exercise, target template) -> Recipe
+RECIPES = {
+    ("exercise_2", "jacobi_N{N}_IT{IT}{float}"): Recipe("jacobi.c", src=False),
+    ("exercise_2", "jacobi_omp_N{N}_IT{IT}{float}"): Recipe("jacobi.c", ["-fopenmp"], src=False),
+    ("exercise_2", "jacobi_ocl_N{N}_IT{IT}{float}_V1"): Recipe("jacobi_ocl.c", ["-DVERSION=1"], src=False),
+    ("exercise_2", "jacobi_ocl_N{N}_IT{IT}{float}_V2"): Recipe("jacobi_ocl.c", ["-DVERSION=2"], src=False),
+    ("exercise_4", "jacobi_ocl_N{N}_IT{IT}_DIM1-{D1}_DIM2-{D2}{float}_V2"): _JACOBI_V2,
+    ("exercise_4", "jacobi_ocl_N{N}_IT{IT}_DIM1-{D1}_DIM2-{D2}{float}_V3"): _JACOBI_V3,
+    ("exercise_6/jacobi", "jacobi_ocl_N{N}_IT{IT}_DIM1-{D1}_DIM2-{D2}{float}_V3"): _JACOBI_V3,
+    ("exercise_6/jacobi", "jacobi_ocl_N{N}_IT{IT}_TOL{TOL}_DIM1-{D1}_DIM2-{D2}{float}_V3"): _JACOBI_V3,
+    ("exercise_7", "auto_levels"): Recipe("auto_levels.c", src=False),
+    ("exercise_7", "auto_levels_cl"): Recipe("auto_levels_cl.c"),
+    ("exercise_8", "scan_N{N}"): Recipe("scan.c"),
+    ("exercise_8", "scan_opt_N{N}"): Recipe("scan.c", ["-DOPT"]),
+    ("exercise_10/ex_1", "matrix_mul_N{N}_{precision}"):
+        Recipe(None, precision={"double": ["-DUSE_DOUBLE"]}),
+    ("exercise_10/optimized", "matrix_mul_N{N}_{precision}_TS{TS}"):
+        Recipe(None, precision={"double": ["-DUSE_DOUBLE"]}),
+}
+
+
+# -------------------------------------------------------
+# Cache
+# -------------------------------------------------------
+
+_compilers = {}
+
+
+def compiler_id(cc):
+    """Resolved path plus first line of `cc --version`, cached per process."""
+    if cc not in _compilers:
+        path = shutil.which(cc) or cc
+        try:
+            version = subprocess.run([cc, "--version"], capture_output=True, text=True,
+                                     timeout=30).stdout.splitlines()[:1]
+        except (OSError, subprocess.SubprocessError):
+            version = []
+        _compilers[cc] = f"{os.path.realpath(path)}|{''.join(version)}"
+    return _compilers[cc]
+
+
+def _file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class Item:
+    """One binary to provide: name, build command and cache key."""
+
+    def __init__(self, name, directory, command, key):
+        self.name = name
+        self.directory = directory
+        self.command = command
+        self.key = key
+
+    @property
+    def cached(self):
+        return os.path.join(CACHE_DIR, self.key[:2], self.key, self.name)
+
+
+def plan(sweep, overrides=None):
+    """Unique Items of a sweep, in sweep order; `overrides` as for makefile_vars."""
+    directory = sweep.directory
+    make = makefile_vars(os.path.join(directory, "Makefile"), overrides)
+    hashes = {}
+
+    def content(path):
+        if path not in hashes:
+            hashes[path] = _file_hash(os.path.join(directory, path))
+        return hashes[path]
+
+    items = {}
+    for point in sweep.space:
+        for target in sweep.targets:
+            recipe = RECIPES.get((sweep.exercise, target.template))
+            if recipe is None:
+                raise KeyError(f"no build recipe for {sweep.exercise}: {target.template}")
+            name = target.binary(point)
+            if name in items:
+                continue
+            command = recipe.command(make, point, "{out}")
+            files = recipe.sources(make) + make.get("DEPS", "").split()
+            h = hashlib.sha256()
+            h.update(compiler_id(command[0]).encode())
+            h.update("\0".join(command).encode())
+            for path in sorted(set(files)):
+                h.update(f"\0{path}:{content(path)}".encode())
+            items[name] = Item(name, directory, command, h.hexdigest())
+    return list(items.values())
+
+
+def compile_item(item):
+    """Compile into the cache (atomic rename); returns (ok, compiler output)."""
+    final = item.cached
+    os.makedirs(os.path.dirname(final), exist_ok=True)
+    tmp = f"{final}.{os.getpid()}.{id(item)}.tmp"
+    command = [tmp if arg == "{out}" else arg for arg in item.command]
+    with trace.span(item.name, cat="compile"):
+        proc = subprocess.run(command, cwd=item.directory, capture_output=True, text=True)
+    output = (proc.stdout + proc.stderr).strip()
+    if proc.returncode != 0 or not os.path.exists(tmp):
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False, output or f"exit status {proc.returncode}"
+    os.replace(tmp, final)
+    return True, output
+
+
+def install(item, bin_dir):
+    dest = os.path.join(bin_dir, item.name)
+    if os.path.lexists(dest):
+        os.remove(dest)
+    try:
+        os.link(item.cached, dest)
+    except OSError:  # other file system
+        shutil.copy2(item.cached, dest)
+
+
+def build_sweep(sweep, bin_dir=None, jobs=1, force=False, log=None, overrides=None):
+    """Provide every binary of `sweep` in bin_dir; returns the counts."""
+    bin_dir = os.path.join(sweep.directory, bin_dir or sweep.bin_dir)
+    os.makedirs(bin_dir, exist_ok=True)
+    log = log or os.path.join(bin_dir, "build.log")
+    items = plan(sweep, overrides)
+    misses = [it for it in items if force or not os.path.exists(it.cached)]
+    counts = {"total": len(items), "cached": len(items) - len(misses),
+              "compiled": 0, "failed": 0}
+
+    failed = set()
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for item, (ok, output) in zip(misses, pool.map(compile_item, misses)):
+            if ok:
+                counts["compiled"] += 1
+            else:
+                counts["failed"] += 1
+                failed.add(item.name)
+                print(f"[ERROR] Build failed: {item.name}")
+            if output:
+                with open(log, "a") as f:
+                    f.write(f"=== {'Failed' if not ok else 'Warnings'}: {item.name} ===\n"
+                            f"{' '.join(item.command).replace('{out}', item.name)}\n{output}\n")
+
+    for item in items:
+        if item.name not in failed:
+            install(item, bin_dir)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the binaries of a sweep through the build cache")
+    parser.add_argument("exercise", help=f"one of {', '.join(sweeps.SWEEPS)}")
+    parser.add_argument("--bin-dir", help="where to put the binaries (default: per sweep)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="parallel compiler processes")
+    parser.add_argument("--force", action="store_true", help="recompile even on a cache hit")
+    parser.add_argument("--tuned", metavar="DEVICE",
+                        help="build the tuned workgroup/tile sizes of DEVICE instead of the grid")
+    parser.add_argument("--set", metavar="NAME=VALUE", action="append", default=[],
+                        help="Makefile variable as on the make command line (e.g. DUMP=1)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="only report which binaries are cached")
+    args = parser.parse_args(argv)
+    overrides = {}
+    for item in args.set:
+        name, sep, value = item.partition("=")
+        if not sep:
+            parser.error(f"--set needs NAME=VALUE, got {item!r}")
+        overrides[name] = value
+
+    sweep = sweeps.resolve(args.exercise)
+    if args.tuned:
+        from gpubench import autotune
+        sweep = autotune.tuned(sweep, args.tuned)
+    if args.dry_run:
+        items = plan(sweep, overrides)
+        for item in items:
+            state = "cached" if os.path.exists(item.cached) else "build"
+            print(f"[{state:>6}] {item.name}  {item.key[:12]}")
+        hits = sum(os.path.exists(it.cached) for it in items)
+        print(f"[INFO] {len(items)} binaries, {hits} cached, {len(items) - hits} to build")
+        return
+
+    t0 = time.perf_counter()
+    counts = build_sweep(sweep, args.bin_dir, args.jobs, args.force, overrides=overrides)
+    print(f"[SUMMARY] {counts['total']} binaries: {counts['cached']} cached, "
+          f"{counts['compiled']} compiled, {counts['failed']} failed "
+          f"({time.perf_counter() - t0:.1f} s)")
+    if counts["failed"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
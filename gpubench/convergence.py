@@ -0,0 +1,167 @@
+"""
+Time-to-tolerance of the Jacobi solvers from their convergence checkpoints.
+
+Every solver that runs until converged writes checkpoint rows
+
+    mode, precision, N, iterations, residual, time_ms
+
+one per residual check, with the relative residual (or the relative update
+norm, which is the same for Jacobi) and the time since the start of the run:
+
+  opencl_V3           jacobi_ocl built with -DTOL (sweep exercise_6/jacobi/convergence)
+  numpy(_banded)      python -m gpubench.jacobi --tol
+  multigrid_<smoother> python -m gpubench.multigrid -o
+
+The device is taken from the file name (results/convergence_<device>.csv).
+A run ends where the iterations stop increasing, so repeated runs can be
+appended to one file. time_to_tolerance() gives, per device, mode,
+precision and N, the first checkpoint at or below the tolerance of every
+run and the median over the runs; configurations that never get there are
+reported with their best residual instead. The plots are a bar chart of
+time-to-tolerance per N and the residual-over-time curves behind it:
+
+    python -m gpubench.convergence exercise_6/jacobi/results/convergence_*.csv --tol 1e-2
+    python -m gpubench.convergence results/convergence_2070.csv --check
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from gpubench import plotting, trace
+
+COLUMNS = ["mode", "precision", "N", "iterations", "residual", "time_ms"]
+KEYS = ["device", "mode", "precision", "N"]
+
+
+def device_of(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return name.split("_", 1)[1] if "_" in name else name
+
+
+def load(paths):
+    """All checkpoints with device and run (numbered per device, mode, precision, N)."""
+    frames = []
+    for path in paths:
+        df = pd.read_csv(path)
+        missing = [c for c in COLUMNS if c not in df.columns]
+        if missing:
+            raise SystemExit(f"{path}: no checkpoint columns {', '.join(missing)}")
+        frames.append(df[COLUMNS].assign(device=device_of(path)))
+    if not frames:
+        raise SystemExit("No data files found!")
+    df = pd.concat(frames, ignore_index=True)
+    df["N"] = df["N"].astype(int)
+    df["iterations"] = df["iterations"].astype(int)
+    # a new run starts wherever the iterations do not increase
+    restart = df.groupby(KEYS)["iterations"].diff().fillna(-1) <= 0
+    df["run"] = restart.astype(int).groupby([df[k] for k in KEYS]).cumsum()
+    return df
+
+
+def time_to_tolerance(df, tol):
+    """
+    One row per device, mode, precision and N: median time_ms and iterations
+    of the first checkpoint with residual <= tol over the runs that reach it,
+    the number of those runs, and the lowest residual seen.
+    """
+    rows = []
+    for key, group in df.groupby(KEYS):
+        hits = group[group["residual"] <= tol].groupby("run").first()
+        rows.append({
+            **dict(zip(KEYS, key)),
+            "time_ms": hits["time_ms"].median() if len(hits) else np.nan,
+            "iterations": hits["iterations"].median() if len(hits) else np.nan,
+            "runs": group["run"].nunique(),
+            "converged": len(hits),
+            "best_residual": group["residual"].min(),
+        })
+    return pd.DataFrame(rows, columns=KEYS + ["time_ms", "iterations", "runs", "converged",
+                                              "best_residual"])
+
+
+# -------------------------------------------------------
+# Plots
+# -------------------------------------------------------
+
+def plot_bars(plt, ttt, tol, out_dir):
+    """Time-to-tolerance per N: one group per device/mode, one bar per precision."""
+    for N, data in ttt.groupby("N"):
+        labels = sorted({(d, m) for d, m in zip(data["device"], data["mode"])})
+        precisions = sorted(data["precision"].unique())
+        width = 0.8 / len(precisions)
+        fig, ax = plt.subplots(figsize=(max(6, 1.2 * len(labels)), 4.5))
+        for k, precision in enumerate(precisions):
+            sel = data[data["precision"] == precision].set_index(["device", "mode"])
+            xs = np.arange(len(labels)) + (k - (len(precisions) - 1) / 2) * width
+            ys = [sel["time_ms"].get(label, np.nan) for label in labels]
+            ax.bar(xs, ys, width, label=precision)
+            for x, y, label in zip(xs, ys, labels):
+                if np.isnan(y) and label in sel.index:
+                    ax.text(x, 0, "n/c", ha="center", va="bottom", fontsize=8, rotation=90)
+        ax.set_xticks(np.arange(len(labels)))
+        ax.set_xticklabels([f"{d}\n{m}" for d, m in labels], fontsize=8)
+        ax.set_yscale("log")
+        ax.set_ylabel("time to tolerance [ms]")
+        ax.set_title(f"Jacobi time to residual {tol:g}, N={N}")
+        ax.legend(title="precision")
+        ax.grid(axis="y", alpha=0.3)
+        fig.tight_layout()
+        path = os.path.join(out_dir, f"convergence_ttt_N{N}.png")
+        fig.savefig(path, dpi=150)
+        plt.close(fig)
+        print(f"[DONE] {path}")
+
+
+def plot_curves(plt, df, tol, out_dir):
+    """Residual over time per N, first run of every configuration."""
+    first = df[df["run"] == 1]
+    for N, data in first.groupby("N"):
+        fig, ax = plt.subplots(figsize=(7, 4.5))
+        for (device, mode, precision), curve in data.groupby(["device", "mode", "precision"]):
+            ax.plot(curve["time_ms"], curve["residual"], marker=".",
+                    linestyle="-" if precision == "double" else "--",
+                    label=f"{device} {mode} {precision}")
+        ax.axhline(tol, color="0.4", linewidth=0.8, linestyle=":")
+        ax.set_xscale("log")
+        ax.set_yscale("log")
+        ax.set_xlabel("time [ms]")
+        ax.set_ylabel("relative residual")
+        ax.set_title(f"Jacobi convergence, N={N}")
+        ax.legend(fontsize=7)
+        ax.grid(alpha=0.3, which="both")
+        fig.tight_layout()
+        path = os.path.join(out_dir, f"convergence_residual_N{N}.png")
+        fig.savefig(path, dpi=150)
+        plt.close(fig)
+        print(f"[DONE] {path}")
+
+
+def main(argv=None):
+    parser = plotting.make_parser("Time-to-tolerance of the Jacobi solvers")
+    parser.add_argument("files", nargs="+", help="checkpoint CSVs (convergence_<device>.csv)")
+    parser.add_argument("--tol", type=float, default=1e-2, help="relative residual to reach")
+    parser.add_argument("--out-dir", default=os.path.join("exercise_6", "jacobi", "plots"))
+    args = parser.parse_args(argv)
+    if args.trace:
+        trace.enable(args.trace, memory=args.trace_memory)
+
+    df = load(args.files)
+    ttt = time_to_tolerance(df, args.tol)
+    for row in ttt.itertuples(index=False):
+        where = (f"{row.time_ms:.1f} ms, {row.iterations:.0f} iterations" if row.converged
+                 else f"not reached (best {row.best_residual:.2e})")
+        print(f"[SUMMARY] {row.device} {row.mode} {row.precision} N={row.N}: {where} "
+              f"({row.converged}/{row.runs} runs)")
+
+    plotting.exit_if_check(args, time_to_tolerance=ttt)
+
+    plt = plotting.pyplot()
+    os.makedirs(args.out_dir, exist_ok=True)
+    plot_bars(plt, ttt, args.tol, args.out_dir)
+    plot_curves(plt, df, args.tol, args.out_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Single-file HTML dashboard over the aggregated benchmark results.
+
+    python -m gpubench.dashboard                      # all exercises -> dashboard.html
+    python -m gpubench.dashboard exercise_4           # -> exercise_4/dashboard.html
+    python -m gpubench.dashboard exercise_4 exercise_6/jacobi -o jacobi.html
+
+The page is built from gpubench.results.aggregates() (one row per
+configuration and metric) and needs no server or network access. Tables are
+embedded column-wise and binary-encoded instead of as CSV: dimension columns
+as uint8/uint16 codes into a small dictionary, statistics as float32 and
+counts as uint32, each base64 encoded. The browser decodes them into typed
+arrays once and filters on the codes, which keeps both the file and the
+filtering cheap at 10^5 configurations.
+"""
+
+import argparse
+import base64
+import html
+import json
+import os
+import time
+
+import numpy as np
+
+from gpubench import results
+
+FILTERS = ["exercise", "device", "precision", "N", "IT", "workgroup", "version"]
+
+
+# -------------------------------------------------------
+# Encoding
+# -------------------------------------------------------
+
+def _b64(array):
+    little = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder("<"))
+    return base64.b64encode(little.tobytes()).decode("ascii")
+
+
+def encode_column(series):
+    """JSON-ready description of one column: dictionary codes or a float/int array."""
+    name = series.name
+    if name in results.DIMENSIONS or name == "metric":
+        values = series.to_numpy()
+        numeric = name in ("N", "IT")
+        uniques = np.unique(values.astype("int64") if numeric else values.astype(str))
+        codes = np.searchsorted(uniques, values.astype("int64") if numeric else values.astype(str))
+        dtype = np.uint8 if len(uniques) <= 0xFF else np.uint16 if len(uniques) <= 0xFFFF else np.uint32
+        return {
+            "name": name,
+            "kind": "dict",
+            "type": np.dtype(dtype).name,
+            "values": [int(v) for v in uniques] if numeric else [str(v) for v in uniques],
+            "data": _b64(codes.astype(dtype)),
+        }
+    if name == "count":
+        return {"name": name, "kind": "num", "type": "uint32",
+                "data": _b64(series.to_numpy().astype(np.uint32))}
+    return {"name": name, "kind": "num", "type": "float32",
+            "data": _b64(series.to_numpy().astype(np.float32))}
+
+
+def encode_table(table):
+    columns = results.DIMENSIONS + ["metric"] + results.STATS
+    return {"rows": int(len(table)), "columns": [encode_column(table[c]) for c in columns]}
+
+
+# -------------------------------------------------------
+# HTML
+# -------------------------------------------------------
+
+def render(table, title):
+    payload = json.dumps({"title": title, "filters": FILTERS, "table": encode_table(table)},
+                         separators=(",", ":"))
+    payload = payload.replace("</", "<\\/")  # never close the <script> early
+    return (_TEMPLATE
+            .replace("__TITLE__", html.escape(title))
+            .replace("__DATA__", payload))
+
+
+def write_dashboard(exercises, out_path, use_cache=True, title=None):
+    """Write the dashboard for `exercises` (None: all) and return the table size."""
+    table = results.aggregates(exercises, use_cache=use_cache)
+    if title is None:
+        title = "GPU computing results" if not exercises else ", ".join(exercises)
+    page = render(table, title)
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write(page)
+    return len(table)
+
+
+def default_output(exercises):
+    if exercises and len(exercises) == 1:
+        return os.path.join(results.resolve(exercises[0]).directory, "dashboard.html")
+    return os.path.join(results.REPO_ROOT, "dashboard.html")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a self-contained HTML results dashboard")
+    parser.add_argument("exercises", nargs="*",
+                        help=f"exercise directories (default: all of {', '.join(results.SOURCES)})")
+    parser.add_argument("-o", "--output", help="output file (default: <exercise>/dashboard.html "
+                                               "or dashboard.html in the repository root)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="re-read every CSV instead of using cached aggregates")
+    args = parser.parse_args(argv)
+
+    out = args.output or default_output(args.exercises)
+    t0 = time.perf_counter()
+    rows = write_dashboard(args.exercises or None, out, use_cache=not args.no_cache)
+    size_kb = os.path.getsize(out) / 1024
+    print(f"[DONE] Wrote {out} ({rows} configurations, {size_kb:.0f} KiB, "
+          f"{time.perf_counter() - t0:.2f} s)")
+
+
+_TEMPLATE = r"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<style>
+body { font-family: sans-serif; margin: 1em 2em; color: #222; }
+h1 { font-size: 1.3em; }
+#filters { display: flex; flex-wrap: wrap; gap: .8em; align-items: flex-start; }
+fieldset { border: 1px solid #ccc; padding: .3em .6em; max-height: 12em; overflow-y: auto; }
+legend { font-weight: bold; }
+fieldset label { display: block; font-size: .85em; white-space: nowrap; }
+fieldset button { font-size: .75em; margin-right: .3em; }
+#controls { margin: .8em 0; }
+#status { color: #666; margin-left: 1em; }
+table { border-collapse: collapse; font-size: .85em; margin-top: .8em; }
+th, td { padding: .15em .5em; border-bottom: 1px solid #eee; text-align: right; }
+th { cursor: pointer; background: #f4f4f4; position: sticky; top: 0; }
+td.s, th.s { text-align: left; }
+svg text { font-size: 11px; }
+</style>
+</head>
+<body>
+<h1>__TITLE__</h1>
+<div id="filters"></div>
+<div id="controls">
+  metric <select id="metric"></select>
+  statistic <select id="stat"><option>median</option><option>mean</option><option>min</option><option>max</option></select>
+  <label><input type="checkbox" id="logy" checked> log y</label>
+  <span id="status"></span>
+</div>
+<svg id="chart" width="960" height="420"></svg>
+<div id="table"></div>
+<script type="application/json" id="data">__DATA__</script>
+<script>
+"use strict";
+const DATA = JSON.parse(document.getElementById("data").textContent);
+const TYPES = {uint8: Uint8Array, uint16: Uint16Array, uint32: Uint32Array, float32: Float32Array};
+const MAX_ROWS = 500, MAX_SERIES = 12;
+const COLORS = ["#1f77b4","#ff7f0e","#2ca02c","#d62728","#9467bd","#8c564b","#e377c2","#7f7f7f","#bcbd22","#17becf","#393b79","#ad494a"];
+
+function decode(b64, type) {
+  const bin = atob(b64), bytes = new Uint8Array(bin.length);
+  for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+  return new TYPES[type](bytes.buffer);
+}
+
+const T = {rows: DATA.table.rows, col: {}};
+for (const c of DATA.table.columns) T.col[c.name] = {kind: c.kind, values: c.values, data: decode(c.data, c.type)};
+const DIMS = DATA.table.columns.filter(c => c.kind === "dict" && c.name !== "metric").map(c => c.name);
+const STATS = DATA.table.columns.filter(c => c.kind === "num").map(c => c.name);
+const allowed = {};
+let sortKey = "median", sortDesc = false;
+
+function label(name, code) { const v = T.col[name].values[code]; return v === "" ? "-" : String(v); }
+
+function buildFilters() {
+  const box = document.getElementById("filters");
+  for (const name of DATA.filters) {
+    const values = T.col[name].values;
+    allowed[name] = new Uint8Array(values.length).fill(1);
+    if (values.length < 2) continue;
+    const fs = document.createElement("fieldset");
+    fs.innerHTML = `<legend>${name}</legend>`;
+    for (const [txt, on] of [["all", 1], ["none", 0]]) {
+      const b = document.createElement("button");
+      b.textContent = txt;
+      b.onclick = () => { allowed[name].fill(on); fs.querySelectorAll("input").forEach(i => i.checked = !!on); update(); };
+      fs.appendChild(b);
+    }
+    values.forEach((v, code) => {
+      const l = document.createElement("label"), i = document.createElement("input");
+      i.type = "checkbox"; i.checked = true;
+      i.onchange = () => { allowed[name][code] = i.checked ? 1 : 0; update(); };
+      l.append(i, " " + label(name, code));
+      fs.appendChild(l);
+    });
+    box.appendChild(fs);
+  }
+  const sel = document.getElementById("metric");
+  T.col.metric.values.forEach((v, code) => sel.add(new Option(v, code, false, v === "elapsed_ms")));
+  for (const id of ["metric", "stat", "logy"]) document.getElementById(id).onchange = update;
+}
+
+function selectedRows() {
+  const metric = +document.getElementById("metric").value, mcol = T.col.metric.data;
+  const cols = DATA.filters.map(n => [T.col[n].data, allowed[n]]);
+  const out = [];
+  outer: for (let r = 0; r < T.rows; r++) {
+    if (mcol[r] !== metric) continue;
+    for (const [data, ok] of cols) if (!ok[data[r]]) continue outer;
+    out.push(r);
+  }
+  return out;
+}
+
+function seriesKey(r) { return DIMS.filter(d => d !== "N").map(d => T.col[d].data[r]).join(","); }
+function seriesLabel(r) {
+  return DIMS.filter(d => d !== "N" && T.col[d].values.length > 1).map(d => label(d, T.col[d].data[r])).join(" / ");
+}
+
+function drawChart(rows, stat) {
+  const svg = document.getElementById("chart"), W = +svg.getAttribute("width"), H = +svg.getAttribute("height");
+  const m = {l: 60, r: 260, t: 10, b: 40}, logy = document.getElementById("logy").checked;
+  const y = T.col[stat].data, ncode = T.col.N.data, series = new Map();
+  for (const r of rows) {
+    const k = seriesKey(r);
+    if (!series.has(k)) series.set(k, {label: seriesLabel(r), pts: []});
+    series.get(k).pts.push([ncode[r], y[r]]);
+  }
+  const shown = [...series.values()].sort((a, b) => b.pts.length - a.pts.length).slice(0, MAX_SERIES);
+  let xs = new Set(), lo = Infinity, hi = -Infinity;
+  for (const s of shown) for (const [n, v] of s.pts) { xs.add(n); if (!logy || v > 0) { lo = Math.min(lo, v); hi = Math.max(hi, v); } }
+  xs = [...xs].sort((a, b) => a - b);
+  let parts = [];
+  if (!shown.length || !isFinite(lo)) { svg.innerHTML = `<text x="${m.l}" y="30">no data for this selection</text>`; return; }
+  const tf = v => logy ? Math.log10(v) : v;
+  let y0 = tf(lo), y1 = tf(hi);
+  if (y1 === y0) { y0 -= 1; y1 += 1; }
+  const px = i => m.l + (xs.length === 1 ? 0.5 : i / (xs.length - 1)) * (W - m.l - m.r);
+  const py = v => H - m.b - (tf(v) - y0) / (y1 - y0) * (H - m.t - m.b);
+  parts.push(`<line x1="${m.l}" y1="${H - m.b}" x2="${W - m.r}" y2="${H - m.b}" stroke="#999"/>`);
+  parts.push(`<line x1="${m.l}" y1="${m.t}" x2="${m.l}" y2="${H - m.b}" stroke="#999"/>`);
+  xs.forEach((n, i) => parts.push(`<text x="${px(i)}" y="${H - m.b + 15}" text-anchor="middle">${label("N", n)}</text>`));
+  for (let k = 0; k <= 4; k++) {
+    const v = logy ? Math.pow(10, y0 + k / 4 * (y1 - y0)) : y0 + k / 4 * (y1 - y0), yy = py(v);
+    parts.push(`<text x="${m.l - 5}" y="${yy + 4}" text-anchor="end">${v.toPrecision(3)}</text>`);
+    parts.push(`<line x1="${m.l}" y1="${yy}" x2="${W - m.r}" y2="${yy}" stroke="#eee"/>`);
+  }
+  parts.push(`<text x="${(W - m.r + m.l) / 2}" y="${H - 5}" text-anchor="middle">N</text>`);
+  shown.forEach((s, i) => {
+    const c = COLORS[i % COLORS.length];
+    const pts = s.pts.filter(p => !logy || p[1] > 0).sort((a, b) => a[0] - b[0]).map(([n, v]) => `${px(xs.indexOf(n))},${py(v)}`);
+    parts.push(`<polyline fill="none" stroke="${c}" stroke-width="1.5" points="${pts.join(" ")}"/>`);
+    for (const p of pts) { const [a, b] = p.split(","); parts.push(`<circle cx="${a}" cy="${b}" r="2.5" fill="${c}"/>`); }
+    parts.push(`<rect x="${W - m.r + 10}" y="${m.t + i * 16}" width="10" height="10" fill="${c}"/>`);
+    parts.push(`<text x="${W - m.r + 25}" y="${m.t + i * 16 + 9}">${escapeHtml(s.label || "all")}</text>`);
+  });
+  if (series.size > shown.length)
+    parts.push(`<text x="${W - m.r + 10}" y="${m.t + shown.length * 16 + 12}" fill="#666">+${series.size - shown.length} more series, narrow the filters</text>`);
+  svg.innerHTML = parts.join("");
+}
+
+function escapeHtml(s) { return s.replace(/[&<>"]/g, ch => ({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"}[ch])); }
+
+function drawTable(rows) {
+  const cols = [...DIMS, ...STATS], key = T.col[sortKey];
+  const val = key.kind === "dict" ? (r => key.values[key.data[r]]) : (r => key.data[r]);
+  rows.sort((a, b) => { const x = val(a), y = val(b); return (x < y ? -1 : x > y ? 1 : 0) * (sortDesc ? -1 : 1); });
+  const head = cols.map(c => `<th class="${T.col[c].kind === "dict" ? "s" : ""}" data-c="${c}">${c}${c === sortKey ? (sortDesc ? " ▼" : " ▲") : ""}</th>`).join("");
+  const body = rows.slice(0, MAX_ROWS).map(r => "<tr>" + cols.map(c => {
+    const col = T.col[c];
+    if (col.kind === "dict") return `<td class="s">${escapeHtml(label(c, col.data[r]))}</td>`;
+    return `<td>${c === "count" ? col.data[r] : col.data[r].toPrecision(4)}</td>`;
+  }).join("") + "</tr>").join("");
+  const div = document.getElementById("table");
+  div.innerHTML = `<table><thead><tr>${head}</tr></thead><tbody>${body}</tbody></table>`;
+  div.querySelectorAll("th").forEach(th => th.onclick = () => {
+    const c = th.dataset.c; sortDesc = c === sortKey ? !sortDesc : false; sortKey = c; update();
+  });
+}
+
+function update() {
+  const stat = document.getElementById("stat").value, rows = selectedRows();
+  document.getElementById("status").textContent =
+    `${rows.length} of ${T.rows} configurations` + (rows.length > MAX_ROWS ? ` (table shows first ${MAX_ROWS})` : "");
+  drawChart(rows, stat);
+  drawTable(rows);
+}
+
+buildFilters();
+update();
+</script>
+</body>
+</html>
+"""
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Lazy, memoized dataflow for the tables behind the plots.
+
+A plot script declares its tables once as nodes of a Graph,
+
+    raw -> validated -> aggregated -> derived (speedup, GFLOPS, ...)
+
+and every figure asks the graph for what it needs. A node is computed the
+first time it is requested and then shared by every later request in the
+same run, so derived tables are never rebuilt per figure or per precision.
+
+    flow = dataflow.Graph()
+
+    @flow.node(stage="raw")
+    def raw():
+        return pd.concat(pd.read_csv(f) for f in FILES)
+
+    @flow.node(stage="aggregated")
+    def df_mean(raw):                 # parameter names are the input nodes
+        return raw.groupby(...).agg(...)
+
+    flow["df_mean"]                   # computes raw, then df_mean
+    flow["df_mean"]                   # memo hit
+
+Memo entries are keyed by a hash of the node's code and its inputs: a leaf
+is keyed by the content it returned, every other node by its code plus the
+keys of its inputs. After invalidate("raw") the raw data is re-read, but
+downstream nodes are only recomputed if the content actually changed.
+
+With FigureBuild.run(jobs > 1) the figures run in forked workers; pull the
+shared nodes once with warm() before run() so the workers inherit them
+instead of each computing their own copy.
+"""
+
+import inspect
+import time
+
+from gpubench import trace
+from gpubench.manifest import code_version, fingerprint
+
+STAGES = ("raw", "validated", "aggregated", "derived")
+
+
+class Node:
+    def __init__(self, name, func, inputs, stage):
+        if stage not in STAGES:
+            raise ValueError(f"unknown stage {stage!r} (expected one of {STAGES})")
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.stage = stage
+        self.computed = 0
+        self.hits = 0
+        self.seconds = 0.0
+
+
+class Graph:
+    def __init__(self):
+        self.nodes = {}
+        self._memo = {}  # input hash -> value
+        self._key = {}   # node name -> input hash of its current value
+
+    # ---------------------------------------------------
+    # Declaring nodes
+    # ---------------------------------------------------
+
+    def add(self, name, func, inputs=None, stage="derived"):
+        """Register func as node `name`; inputs default to func's parameter names."""
+        if name in self.nodes:
+            raise ValueError(f"node {name!r} already defined")
+        if inputs is None:
+            inputs = list(inspect.signature(func).parameters)
+        for dep in inputs:
+            if dep not in self.nodes:
+                raise KeyError(f"node {name!r}: unknown input {dep!r} (define inputs first)")
+        self.nodes[name] = Node(name, func, inputs, stage)
+        return func
+
+    def node(self, name=None, inputs=None, stage="derived"):
+        """Decorator form of add(); the node is named after the function by default."""
+        def register(func):
+            return self.add(name or func.__name__, func, inputs, stage)
+        return register
+
+    # ---------------------------------------------------
+    # Evaluation
+    # ---------------------------------------------------
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def get(self, name):
+        node = self.nodes[name]
+        key = self._key.get(name)
+        if key is not None:
+            node.hits += 1
+            return self._memo[key]
+
+        values = [self.get(dep) for dep in node.inputs]
+        key = fingerprint(name, code_version(node.func), [self._key[d] for d in node.inputs])
+        if node.inputs and key in self._memo:
+            node.hits += 1
+            self._key[name] = key
+            return self._memo[key]
+
+        t0 = time.perf_counter()
+        with trace.span(name, cat=node.stage):
+            value = node.func(*values)
+        node.seconds += time.perf_counter() - t0
+        node.computed += 1
+        if not node.inputs:
+            key = fingerprint(key, value)  # leaves are keyed by what they returned
+        self._memo[key] = value
+        self._key[name] = key
+        return value
+
+    def key(self, name):
+        """Input hash of a node (computes it if needed); usable as FigureBuild data."""
+        self.get(name)
+        return self._key[name]
+
+    def warm(self, *names):
+        """Compute the given nodes (default: all) now, e.g. before forking workers."""
+        for name in names or list(self.nodes):
+            self.get(name)
+
+    def invalidate(self, name):
+        """Forget `name` and everything downstream; memo entries stay for reuse."""
+        stale = {name}
+        for other, node in self.nodes.items():  # nodes are in dependency order
+            if stale.intersection(node.inputs):
+                stale.add(other)
+        for other in stale:
+            self._key.pop(other, None)
+
+    def report(self):
+        done = [n for n in self.nodes.values() if n.computed]
+        hits = sum(n.hits for n in self.nodes.values())
+        seconds = sum(n.seconds for n in done)
+        names = ", ".join(f"{n.name}" + (f" x{n.computed}" if n.computed > 1 else "") for n in done)
+        print(f"[FLOW] computed {names or 'nothing'} ({seconds:.2f} s), {hits} memo hit(s)")
+
+
+# -------------------------------------------------------
+# Derived tables
+# -------------------------------------------------------
+
+def speedup(table, value, baseline, by="version", keys=("device", "precision", "N"),
+            name="speedup"):
+    """
+    Rows of `table` except the baseline, with name = baseline value / value.
+    The baseline is the row with table[by] == baseline and the same `keys`;
+    rows without a baseline are dropped. Row order of `table` is kept.
+    """
+    keys = list(keys)
+    base = (
+        table.loc[table[by] == baseline, keys + [value]]
+        .rename(columns={value: "_baseline"})
+    )
+    out = table[table[by] != baseline].merge(base, on=keys, how="inner")
+    out[name] = out["_baseline"] / out[value]
+    return out.drop(columns="_baseline")
+
+
+def improvement(table, value, original, optimized, by="version",
+                keys=("device", "precision", "N"), name="improvement"):
+    """Rows of `optimized` with name = original value / optimized value."""
+    sub = table[table[by].isin([original, optimized])]
+    return speedup(sub, value, original, by=by, keys=keys, name=name)
+
+
+def gflops(flops, elapsed_ms):
+    """GFLOP/s for `flops` floating point operations taking elapsed_ms."""
+    return flops / (elapsed_ms * 1e6)
@@ -0,0 +1,71 @@
+"""
+Downsampling of long per-iteration traces before plotting.
+
+lttb() picks a fixed number of points with Largest-Triangle-Three-Buckets,
+which keeps the visual shape of the line including isolated spikes.
+minmax_envelope() gives the per-bucket min/max so the full spread of the
+trace can still be drawn as a band behind the line. Both are O(n) in the
+trace length and return O(n_out) points, so the cost of drawing a trace
+does not depend on IT.
+"""
+
+import numpy as np
+
+TRACE_POINTS = 1000
+
+
+def _bucket_edges(n, n_buckets, start=0):
+    edges = np.linspace(start, n, n_buckets + 1).astype(np.int64)
+    return np.unique(edges)
+
+
+def lttb(x, y, n_out=TRACE_POINTS):
+    """Largest-Triangle-Three-Buckets: n_out points of (x, y), first and last kept."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = x.size
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    # n_out - 2 buckets between the fixed first and last point
+    edges = _bucket_edges(n - 1, n_out - 2, start=1)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x, edges[:-1]) / counts
+    mean_y = np.add.reduceat(y, edges[:-1]) / counts
+    # the "next bucket" of the last inner bucket is the final point
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    idx = np.empty(len(counts) + 2, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i, (lo, hi) in enumerate(zip(edges[:-1], edges[1:])):
+        bx, by = x[lo:hi], y[lo:hi]
+        area = np.abs((x[a] - next_x[i]) * (by - y[a]) - (x[a] - bx) * (next_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return x[idx], y[idx]
+
+
+def minmax_envelope(x, y, n_buckets=TRACE_POINTS):
+    """Per-bucket (x center, y min, y max) over n_buckets equal-count buckets."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = _bucket_edges(x.size, min(n_buckets, x.size))
+    starts = edges[:-1]
+    x_mid = np.add.reduceat(x, starts) / np.diff(edges)
+    return x_mid, np.minimum.reduceat(y, starts), np.maximum.reduceat(y, starts)
+
+
+def downsample_trace(x, y, max_points=TRACE_POINTS):
+    """
+    (x, y, envelope) ready for plotting. Short traces are returned unchanged
+    with envelope None; longer ones are LTTB-reduced to max_points and come
+    with the (x, y_min, y_max) envelope over max_points // 2 buckets.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if x.size <= max_points:
+        return x, y, None
+    xs, ys = lttb(x, y, max_points)
+    return xs, ys, minmax_envelope(x, y, max_points // 2)
@@ -0,0 +1,479 @@
+"""
+NumPy reference of the Jacobi solver in exercise_2/jacobi.c.
+
+The C program iterates
+
+    tmp[i][j] = 1/4 * (u[i-1][j] + u[i][j+1] + u[i][j-1] + u[i+1][j] - factor * f[i][j])
+
+over the interior of an N x N grid with zero boundary, copies tmp back into
+u, and prints the sequential sum over the interior as checksum. Jacobi
+reproduces that bit for bit in float and double:
+
+  f[i][j]  40 * sin((VALUE)(16 * (2i - 1) * j)), with the libm sin the C
+           code calls (math.sin) on the argument rounded to VALUE
+  factor   pow((VALUE)1 / N, 2), squared in double and rounded to VALUE
+  update   the same additions in the same order, all in VALUE, written
+           with out= into preallocated buffers; u and tmp are swapped
+           instead of copied (both keep their zero boundary)
+  checksum a running sum in VALUE (cumsum), not NumPy's pairwise sum
+
+so its checksum, printed with %.15e, is the one of jacobi_N{N}_IT{IT}
+built on the same machine. That makes it a CPU baseline without a build
+per N and IT, and a reference for the checksums of any device:
+
+    python -m gpubench.jacobi --N 1024 --IT 100 --precision float
+    python -m gpubench.jacobi --validate exercise_2/results_ifi.csv
+
+The OpenCL versions may contract multiply-adds and differ in the last
+digits, so validation compares with a relative tolerance per precision.
+
+BandedJacobi ("numpy_banded") is the multi-core CPU baseline: row bands
+on a thread pool, cache-sized tiles and several iterations per tile
+(temporal blocking), with the same checksums. --compare runs the serial
+and OpenMP binaries of exercise_2 on the same configurations and prints
+the speedups:
+
+    python -m gpubench.jacobi --engine numpy_banded --N 2048 --IT 100 1000 \
+        --precision float double --compare exercise_2 -o exercise_2/results_cpu.csv
+
+With --tol the engines run until converged instead of for IT iterations:
+the norm of the update u_k - u_k-1, relative to the first one, is taken
+after iteration 1 and every --every iterations (one subtraction and one
+dot product), which for u_0 = 0 is the relative residual ||b - A u|| / ||b||
+of u_k-1. Each check is a checkpoint row (mode, precision, N, iterations,
+residual, time_ms), the layout of jacobi_ocl -DTOL and gpubench.multigrid,
+which gpubench.convergence turns into time-to-tolerance plots:
+
+    python -m gpubench.jacobi --N 256 --precision float double --tol 1e-3 \
+        -o exercise_6/jacobi/results/convergence_cpu.csv
+"""
+
+import argparse
+import functools
+import itertools
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from gpubench.bands import BandPool, cache_size
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(REPO_ROOT, ".gpubench_cache", "jacobi")
+
+DTYPES = {"float": np.float32, "double": np.float64}
+
+# relative checksum difference still accepted from other implementations
+TOLERANCE = {"float": 1e-5, "double": 1e-12}
+
+
+# -------------------------------------------------------
+# Problem
+# -------------------------------------------------------
+
+@functools.lru_cache(maxsize=4)
+def rhs(N, precision="double"):
+    """f of init_func() as a read-only N x N array."""
+    dtype = DTYPES[precision]
+    i = np.arange(N, dtype=np.int64)[:, None]
+    j = np.arange(N, dtype=np.int64)[None, :]
+    # (VALUE)(16 * (2x - 1) * y): exact int, rounded to float for FLOAT
+    args = (16 * (2 * i - 1) * j).astype(dtype).astype(np.float64)
+    sines = np.fromiter(map(math.sin, args.ravel().tolist()), np.float64, args.size)
+    f = (40.0 * sines).astype(dtype).reshape(N, N)
+    f.flags.writeable = False
+    return f
+
+
+def factor(N, precision="double"):
+    dtype = DTYPES[precision]
+    h = float(dtype(1) / dtype(N))
+    return dtype(h * h)
+
+
+class Jacobi:
+    """
+    u and tmp of one N x N problem, stepped in place.
+
+    The stencil operand views of both directions (u -> tmp, tmp -> u) are
+    built once, so step() allocates nothing; after every iteration the
+    roles of the two buffers are swapped.
+    """
+
+    def __init__(self, N, precision="double"):
+        self.N = N
+        self.precision = precision
+        self.dtype = DTYPES[precision]
+        self.quarter = self.dtype(1) / self.dtype(4)
+        self.ff = (factor(N, precision) * rhs(N, precision))[1:-1, 1:-1].copy()
+        self.buffers = [np.zeros((N, N), self.dtype), np.zeros((N, N), self.dtype)]
+        self.views = [self._views(self.buffers[k], self.buffers[1 - k]) for k in (0, 1)]
+        self.current = 0
+        self.iterations = 0
+
+    @staticmethod
+    def _views(src, dst):
+        # out, up, right, left, down: the order of the C expression
+        return dst[1:-1, 1:-1], src[:-2, 1:-1], src[1:-1, 2:], src[1:-1, :-2], src[2:, 1:-1]
+
+    @property
+    def u(self):
+        return self.buffers[self.current]
+
+    def reset(self):
+        for buf in self.buffers:
+            buf.fill(0)
+        self.current = 0
+        self.iterations = 0
+
+    def step(self, iterations=1):
+        ff, quarter = self.ff, self.quarter
+        for _ in range(iterations):
+            out, up, right, left, down = self.views[self.current]
+            np.add(up, right, out=out)
+            np.add(out, left, out=out)
+            np.add(out, down, out=out)
+            np.subtract(out, ff, out=out)
+            np.multiply(out, quarter, out=out)
+            self.current = 1 - self.current
+        self.iterations += iterations
+        return self
+
+    def checksum(self):
+        """Sum over the interior in the order (and precision) of jacobi.c."""
+        return np.cumsum(self.u[1:-1, 1:-1], dtype=self.dtype)[-1]
+
+    def converge(self, tol, every=100, max_iterations=1000000):
+        """
+        Iterate from u = 0 until ||u_k - u_k-1|| / ||u_1 - u_0|| <= tol,
+        checked after iteration 1 and every `every` iterations. Returns the
+        checkpoints (iterations, residual, elapsed ms) and the reason to
+        stop: "converged" or "max_iterations".
+        """
+        self.reset()
+        diff = np.empty((self.N - 2, self.N - 2), self.dtype)
+
+        def norm():
+            # the last step() ends with a single iteration, so the other
+            # buffer holds u_k-1 (BandedJacobi included)
+            np.subtract(self.u[1:-1, 1:-1], self.buffers[1 - self.current][1:-1, 1:-1], out=diff)
+            flat = diff.ravel()
+            return math.sqrt(float(np.dot(flat, flat)))
+
+        t0 = time.perf_counter()
+        self.step(1)
+        norm0 = norm()
+        res = 1.0 if norm0 else 0.0
+        checkpoints = [(1, res, (time.perf_counter() - t0) * 1000.0)]
+        while res > tol and self.iterations < max_iterations:
+            target = min(max_iterations, (self.iterations // every + 1) * every)
+            self.step(target - self.iterations - 1)
+            self.step(1)
+            res = norm() / norm0
+            checkpoints.append((self.iterations, res, (time.perf_counter() - t0) * 1000.0))
+        return checkpoints, "converged" if res <= tol else "max_iterations"
+
+
+# -------------------------------------------------------
+# Banded, cache-blocked engine
+# -------------------------------------------------------
+
+def tile_shape(N, dtype, depth, cache=None):
+    """
+    (rows, cols) of a tile: full rows (contiguous, and no halo columns to
+    recompute), as many as let the two scratch planes and f of a tile with
+    its halo fit in the L2 cache, but at least 4 x depth so that the
+    recomputed halo stays a minor part of the work.
+    """
+    cache = cache or cache_size()
+    item = np.dtype(dtype).itemsize
+    cols = N - 2
+    rows = cache // (3 * item * (cols + 2 * depth)) - 2 * depth
+    return max(8, 4 * depth, min(N - 2, rows)), cols
+
+
+def _split(start, stop, size):
+    return [(lo, min(lo + size, stop)) for lo in range(start, stop, size)]
+
+
+class BandedJacobi(Jacobi, BandPool):
+    """
+    The same iteration, on `workers` threads and with temporal blocking.
+
+    The interior rows are split into one contiguous band per worker and
+    every band into cache-sized tiles. Per block of `depth` iterations, a
+    tile is read with a halo of `depth` cells, advanced in two scratch
+    planes that shrink by one cell per iteration (the halo is recomputed by
+    the neighbouring tiles instead of exchanged), and only its own cells of
+    the last iteration are written to the other grid buffer. Workers meet
+    once per block; every cell is still computed from the same operands in
+    the same order, so checksums equal those of Jacobi.
+    """
+
+    def __init__(self, N, precision="double", workers=None, depth=4, tile=None):
+        Jacobi.__init__(self, N, precision)
+        BandPool.__init__(self, workers)
+        self.depth = max(1, depth)
+        self.tile = tile or tile_shape(N, self.dtype, self.depth)
+        rows, cols = self.tile
+        self.bands = [
+            [(r0, r1, c0, c1) for r0, r1 in _split(band.start + 1, band.stop + 1, rows)
+             for c0, c1 in _split(1, N - 1, cols)]
+            for band in self.split(N - 2)
+        ]
+        shape = (rows + 2 * self.depth, cols + 2 * self.depth)
+        self.scratch = [(np.zeros(shape, self.dtype), np.zeros(shape, self.dtype))
+                        for _ in self.bands]
+
+    def _kernel(self, src, soff, dst, doff, lo, hi, clo, chi):
+        """Rows [lo, hi) x cols [clo, chi) of dst (global indices) from src."""
+        sr, sc = soff
+        dr, dc = doff
+        out = dst[lo - dr:hi - dr, clo - dc:chi - dc]
+        np.add(src[lo - 1 - sr:hi - 1 - sr, clo - sc:chi - sc],
+               src[lo - sr:hi - sr, clo + 1 - sc:chi + 1 - sc], out=out)
+        np.add(out, src[lo - sr:hi - sr, clo - 1 - sc:chi - 1 - sc], out=out)
+        np.add(out, src[lo + 1 - sr:hi + 1 - sr, clo - sc:chi - sc], out=out)
+        np.subtract(out, self.ff[lo - 1:hi - 1, clo - 1:chi - 1], out=out)
+        np.multiply(out, self.quarter, out=out)
+
+    def _tile(self, tile, src, dst, steps, scratch):
+        r0, r1, c0, c1 = tile
+        if steps == 1:
+            self._kernel(src, (0, 0), dst, (0, 0), r0, r1, c0, c1)
+            return
+        N = self.N
+        a, b = max(0, r0 - steps), min(N, r1 + steps)
+        ca, cb = max(0, c0 - steps), min(N, c1 + steps)
+        planes = [s[:b - a, :cb - ca] for s in scratch]
+        for plane in planes:  # the grid boundary inside the halo stays zero
+            if a == 0:
+                plane[0] = 0
+            if b == N:
+                plane[-1] = 0
+            if ca == 0:
+                plane[:, 0] = 0
+            if cb == N:
+                plane[:, -1] = 0
+        prev, poff = src, (0, 0)
+        for k in range(1, steps + 1):
+            if k == steps:
+                out, ooff, bounds = dst, (0, 0), (r0, r1, c0, c1)
+            else:  # everything whose inputs are still inside the halo
+                out, ooff = planes[k % 2], (a, ca)
+                bounds = (a + k if a > 0 else 1, b - k if b < N else N - 1,
+                          ca + k if ca > 0 else 1, cb - k if cb < N else N - 1)
+            self._kernel(prev, poff, out, ooff, *bounds)
+            prev, poff = out, ooff
+
+    def _band(self, index, src, dst, steps):
+        for tile in self.bands[index]:
+            self._tile(tile, src, dst, steps, self.scratch[index])
+
+    def step(self, iterations=1):
+        done = 0
+        while done < iterations:
+            steps = min(self.depth, iterations - done)
+            src, dst = self.buffers[self.current], self.buffers[1 - self.current]
+            self.map(lambda i: self._band(i, src, dst, steps), range(len(self.bands)))
+            self.current = 1 - self.current
+            done += steps
+        self.iterations += iterations
+        return self
+
+
+ENGINES = {"numpy": Jacobi, "numpy_banded": BandedJacobi}
+
+
+def solve(N, IT, precision="double", engine="numpy", **options):
+    """(checksum, elapsed ms of the iterations) of one run."""
+    solver = ENGINES[engine](N, precision, **options)
+    try:
+        t0 = time.perf_counter()
+        solver.step(IT)
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+    finally:
+        if hasattr(solver, "close"):
+            solver.close()
+    return solver.checksum(), elapsed_ms
+
+
+_lock = threading.Lock()
+_checksums = {}
+
+
+def checksum(N, IT, precision="double", directory=CACHE_DIR):
+    """
+    Reference checksum of (N, IT, precision). Computed once and kept in
+    `directory` (as float.hex), so later processes and shards only read it.
+    """
+    key = (N, IT, precision)
+    with _lock:
+        if key not in _checksums:
+            path = os.path.join(directory, f"checksum_N{N}_IT{IT}_{precision}.txt")
+            try:
+                with open(path) as f:
+                    _checksums[key] = float.fromhex(f.read().strip())
+            except (OSError, ValueError):
+                _checksums[key] = float(solve(N, IT, precision)[0])
+                os.makedirs(directory, exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, "w") as f:
+                    f.write(_checksums[key].hex() + "\n")
+                os.replace(tmp, path)
+        return _checksums[key]
+
+
+# -------------------------------------------------------
+# Validation
+# -------------------------------------------------------
+
+def compare(value, N, IT, precision):
+    """(relative difference to the reference, exact match of the %.15e text)."""
+    ref = checksum(N, IT, precision)
+    exact = f"{float(value):.15e}" == f"{ref:.15e}"
+    rel = abs(float(value) - ref) / abs(ref) if ref else abs(float(value))
+    return rel, exact
+
+
+def validate(path):
+    """Rows of a results CSV (mode, precision, N, IT, ..., checksum) against the reference."""
+    df = pd.read_csv(path)
+    out = []
+    for row in df.itertuples(index=False):
+        rel, exact = compare(row.checksum, int(row.N), int(row.IT), row.precision)
+        out.append({"mode": row.mode, "precision": row.precision, "N": int(row.N),
+                    "IT": int(row.IT), "checksum": row.checksum, "rel": rel, "exact": exact,
+                    "ok": exact or rel <= TOLERANCE[row.precision]})
+    return out
+
+
+def converge(args):
+    """Checkpoint rows (mode, precision, N, iterations, residual, time_ms) of --tol."""
+    options = {"workers": args.workers, "depth": args.depth} if args.engine == "numpy_banded" else {}
+    rows = []
+    for N, precision in itertools.product(args.N, args.precision):
+        solver = ENGINES[args.engine](N, precision, **options)
+        try:
+            for _ in range(args.runs):
+                checkpoints, stop = solver.converge(args.tol, args.every, args.max_iterations)
+                rows += [(args.engine, precision, N, k, res, ms) for k, res, ms in checkpoints]
+                k, res, ms = checkpoints[-1]
+                state = "DONE" if stop == "converged" else "INFO"
+                print(f"[{state}] {args.engine} {precision} N={N}: residual {res:.2e} after "
+                      f"{k} iteration(s), {ms:.1f} ms ({stop})")
+        finally:
+            if hasattr(solver, "close"):
+                solver.close()
+    return rows
+
+
+def run_binary(path, cwd):
+    """The jacobi.c row a binary prints, as (mode, time_ms, checksum) or None."""
+    proc = subprocess.run([path], cwd=cwd, capture_output=True, text=True)
+    for line in reversed(proc.stdout.splitlines()):
+        fields = line.strip().split(",")
+        if len(fields) == 6:
+            return fields[0], float(fields[4]), float(fields[5])
+    return None
+
+
+def benchmark(args):
+    """Rows (mode, precision, N, IT, time_ms, checksum) of the engine and the C baselines."""
+    options = {"workers": args.workers, "depth": args.depth} if args.engine == "numpy_banded" else {}
+    exercise = os.path.join(REPO_ROOT, "exercise_2")
+    rows = []
+    for N, IT, precision in itertools.product(args.N, args.IT, args.precision):
+        for _ in range(args.runs):
+            value, elapsed_ms = solve(N, IT, precision, args.engine, **options)
+            rows.append((args.engine, precision, N, IT, elapsed_ms, float(value)))
+            if not args.compare:
+                continue
+            suffix = "_float" if precision == "float" else ""
+            for name in (f"jacobi_N{N}_IT{IT}{suffix}", f"jacobi_omp_N{N}_IT{IT}{suffix}"):
+                path = os.path.join(args.compare, name)
+                row = run_binary(path, exercise) if os.access(path, os.X_OK) else None
+                if row is None:
+                    print(f"[ERROR] {name}: missing or no result row")
+                    continue
+                rows.append((row[0], precision, N, IT, row[1], row[2]))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NumPy reference of exercise_2/jacobi.c")
+    parser.add_argument("--N", type=int, nargs="+", default=[1024])
+    parser.add_argument("--IT", type=int, nargs="+", default=[100])
+    parser.add_argument("--precision", nargs="+", choices=sorted(DTYPES), default=["double"])
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="numpy")
+    parser.add_argument("--workers", type=int, help="numpy_banded: threads (default: all cores)")
+    parser.add_argument("--depth", type=int, default=4,
+                        help="numpy_banded: iterations per tile between synchronizations")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--compare", metavar="BIN_DIR",
+                        help="also run the serial and OpenMP binaries of exercise_2 from BIN_DIR")
+    parser.add_argument("-o", "--output", help="append the rows to this results CSV")
+    parser.add_argument("--validate", metavar="CSV", nargs="+",
+                        help="check the checksums of exercise_2 results files instead")
+    parser.add_argument("--tol", type=float,
+                        help="iterate until the relative update norm is at most TOL (ignores --IT)")
+    parser.add_argument("--every", type=int, default=100, help="--tol: iterations per check")
+    parser.add_argument("--max-iterations", type=int, default=1000000)
+    args = parser.parse_args(argv)
+
+    if args.tol is not None:
+        rows = converge(args)
+        if args.output:
+            df = pd.DataFrame(rows, columns=["mode", "precision", "N", "iterations", "residual",
+                                             "time_ms"])
+            df.to_csv(args.output, mode="a", index=False, header=not os.path.exists(args.output))
+        return
+
+    if args.validate is None:
+        rows = benchmark(args)
+        for mode, precision, N, IT, ms, value in rows:
+            # the row layout of jacobi.c
+            print(f"{mode},{precision},{N},{IT},{ms:.3f},{value:.15e}")
+        if args.output:
+            new = not os.path.exists(args.output)
+            with open(args.output, "a") as f:
+                if new:
+                    f.write("mode,precision,N,IT,time_ms,checksum\n")
+                for mode, precision, N, IT, ms, value in rows:
+                    f.write(f"{mode},{precision},{N},{IT},{ms:.3f},{value:.15e}\n")
+        if args.compare:
+            df = pd.DataFrame(rows, columns=["mode", "precision", "N", "IT", "time_ms", "checksum"])
+            med = df.groupby(["precision", "N", "IT", "mode"])["time_ms"].median().unstack("mode")
+            for key, row in med.iterrows():
+                ms = row[args.engine]
+                vs = [f"{m} {row[m] / ms:.2f}x" for m in ("serial", "openmp")
+                      if m in row and pd.notna(row[m])]
+                print(f"[SUMMARY] {args.engine} {key[0]} N={key[1]} IT={key[2]}: {ms:.1f} ms"
+                      + (f" (speedup vs {', '.join(vs)})" if vs else ""))
+            df["checksum"] = df["checksum"].map(lambda v: f"{v:.15e}")  # as the C hosts print it
+            sums = df.groupby(["precision", "N", "IT"])["checksum"].nunique()
+            for key, n in sums.items():
+                if n > 1:
+                    print(f"[ERROR] checksums differ for {key[0]} N={key[1]} IT={key[2]}")
+        return
+
+    bad = 0
+    for path in args.validate:
+        print(f"[INFO] {path}")
+        for r in validate(path):
+            state = "exact" if r["exact"] else ("ok" if r["ok"] else "FAILED")
+            bad += not r["ok"]
+            print(f"  [{state:>6}] {r['mode']:<10} {r['precision']:<6} N={r['N']:<5} "
+                  f"IT={r['IT']:<5} {r['checksum']:.15e}  rel {r['rel']:.1e}")
+    if bad:
+        print(f"[ERROR] {bad} checksum(s) outside the tolerance")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
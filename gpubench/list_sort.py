@@ -0,0 +1,286 @@
+"""
+Counting sort of the person_t records of exercise_9, on a structured dtype.
+
+list_sort.c and list_sort_ocl.c sort person_t {int32_t age; char name[32]}
+by age (histogram, prefix sum, stable scatter) and print every record
+before and after, which at large N takes far longer than the sort. Here the
+records stay in a NumPy array of PERSON, the 36-byte C layout, so a binary
+dump (fwrite of a person_t array) is memory-mapped as it is, and text is
+only produced on request (--print).
+
+CountingSort is stable and runs over chunks of records on a thread pool:
+
+  histogram  np.bincount of the ages of every chunk, in parallel
+  offsets    where each (age, chunk) run starts in the output: an
+             exclusive prefix sum over age-major, chunk-minor counts
+  scatter    every chunk gathered into age order (a stable argsort of its
+             ages as uint8, i.e. a radix sort) and copied run by run to
+             its offsets, in parallel; chunks never write the same range
+
+Records of equal age keep their input order, as in the C loops, so the
+output equals theirs. The input is generated with NumPy's generator (not
+glibc rand(), so not the binaries' people for a seed) into
+.gpubench_cache/list_sort/people_N<N>_seed<seed>.bin, with names drawn from
+exercise_9/resources as gen_name() does:
+
+    python -m gpubench.list_sort --N 100000000 --runs 3
+    python -m gpubench.list_sort --input people.bin --output sorted.bin --print | head
+
+--compare runs a list_sort binary (in exercise_9, for N and --seed), reads
+its unsorted list back into PERSON records, sorts them and checks the
+result against the binary's sorted list.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from gpubench.bands import BandPool, cache_size
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(REPO_ROOT, ".gpubench_cache", "list_sort")
+RESOURCES = os.path.join(REPO_ROOT, "exercise_9", "resources")
+
+MAX_AGE = 120
+NAME_LEN = 32
+
+# typedef struct { int32_t age; name_t name; } person_t;
+PERSON = np.dtype([("age", "<i4"), ("name", f"S{NAME_LEN}")])
+assert PERSON.itemsize == 36
+_RECORD = np.dtype((np.void, PERSON.itemsize))
+
+
+# -------------------------------------------------------
+# Records
+# -------------------------------------------------------
+
+def load_names(path):
+    """The names load_names() of people.h keeps: all lines but the last, cut at 14 chars and a space."""
+    with open(path, "rb") as f:
+        lines = f.read().split(b"\n")
+    names = []
+    for line in lines[:max(0, len(lines) - 2)]:  # count_lines() - 1 lines
+        names.append(line[:14].split(b"\r")[0].split(b" ")[0])
+    return names
+
+
+def _padded(names):
+    table = np.zeros((len(names), 16), np.uint8)
+    for i, name in enumerate(names):
+        table[i, :len(name)] = np.frombuffer(name, np.uint8)
+    return table, np.array([len(n) for n in names])
+
+
+def generate(N, seed=0, path=None, chunk=1 << 20):
+    """N random people as a PERSON memmap at path (default: in the cache), written on first use."""
+    path = path or os.path.join(CACHE_DIR, f"people_N{N}_seed{seed}.bin")
+    if os.path.exists(path) and os.path.getsize(path) == N * PERSON.itemsize:
+        return np.memmap(path, PERSON, "r", shape=(N,))
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    first, first_len = _padded(load_names(os.path.join(RESOURCES, "first_names.txt")))
+    last, _ = _padded(load_names(os.path.join(RESOURCES, "last_names.txt")))
+    rng = np.random.default_rng(seed)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    out = np.memmap(tmp, PERSON, "w+", shape=(N,))
+    for lo in range(0, N, chunk):
+        n = min(chunk, N - lo)
+        fi = rng.integers(0, len(first), n)
+        li = rng.integers(0, len(last), n)
+        names = np.zeros((n, NAME_LEN), np.uint8)
+        # "%s %s": group by the length of the first name
+        lengths = first_len[fi]
+        for k in np.unique(lengths):
+            rows = np.flatnonzero(lengths == k)
+            names[rows, :k] = first[fi[rows], :k]
+            names[rows, k] = ord(" ")
+            names[rows, k + 1:k + 17] = last[li[rows]][:, :min(16, NAME_LEN - 1 - (k + 1))]
+        block = out[lo:lo + n]
+        block["age"] = rng.integers(0, MAX_AGE + 1, n)
+        block["name"] = names.view(f"S{NAME_LEN}").ravel()
+    out.flush()
+    del out
+    os.replace(tmp, path)
+    return np.memmap(path, PERSON, "r", shape=(N,))
+
+
+def load(path):
+    """A binary dump of person_t records as a read-only memmap."""
+    return np.memmap(path, PERSON, "r")
+
+
+def parse(lines):
+    """PERSON records of "%3d | %s" lines."""
+    ages, names = [], []
+    for line in lines:
+        age, _, name = line.rstrip("\n").partition(" | ")
+        ages.append(int(age))
+        names.append(name.encode())
+    people = np.zeros(len(ages), PERSON)
+    people["age"] = ages
+    people["name"] = names
+    return people
+
+
+def write_text(people, f, chunk=1 << 16):
+    """The records as list_sort prints them."""
+    for lo in range(0, len(people), chunk):
+        block = people[lo:lo + chunk]
+        f.write("".join(f"{age:3d} | {name.decode()}\n"
+                        for age, name in zip(block["age"].tolist(), block["name"].tolist())))
+
+
+# -------------------------------------------------------
+# Engine
+# -------------------------------------------------------
+
+class CountingSort(BandPool):
+    """
+    Stable counting sort by age over chunks of `chunk` records, one band
+    of chunks per worker thread.
+    """
+
+    def __init__(self, workers=None, chunk=None):
+        super().__init__(workers)
+        self.chunk = chunk or max(4096, cache_size() // PERSON.itemsize)
+
+    def _map(self, func, count):
+        return self.map(func, self.split(count))
+
+    def sort(self, people, out=None):
+        """people sorted by age into out (a new array if None)."""
+        out = np.empty(len(people), PERSON) if out is None else out
+        if len(out) != len(people):
+            raise ValueError("out needs one record per input record")
+        chunks = [(lo, min(lo + self.chunk, len(people)))
+                  for lo in range(0, len(people), self.chunk)]
+        if not chunks:
+            return out
+        counts = np.zeros((len(chunks), MAX_AGE + 1), np.int64)
+
+        def histogram(band):
+            for k in band:
+                lo, hi = chunks[k]
+                ages = people["age"][lo:hi]
+                if ages.min() < 0 or ages.max() > MAX_AGE:
+                    raise ValueError(f"age outside 0..{MAX_AGE} in records {lo}..{hi - 1}")
+                counts[k] = np.bincount(ages, minlength=MAX_AGE + 1)
+
+        self._map(histogram, len(chunks))
+        # start of every (chunk, age) run: all younger people, then earlier chunks
+        starts = np.zeros(counts.size, np.int64)
+        np.cumsum(counts.T.ravel()[:-1], out=starts[1:])
+        starts = starts.reshape(MAX_AGE + 1, len(chunks)).T
+
+        # records are moved as opaque 36-byte items, which NumPy copies
+        # much faster than structured ones
+        records, dst = people.view(_RECORD), out.view(_RECORD)
+
+        def scatter(band):
+            for k in band:
+                lo, hi = chunks[k]
+                order = np.argsort(people["age"][lo:hi].astype(np.uint8), kind="stable")
+                grouped = records[lo:hi][order]
+                b = 0
+                for age in np.flatnonzero(counts[k]):
+                    n, s = counts[k, age], starts[k, age]
+                    dst[s:s + n] = grouped[b:b + n]
+                    b += n
+
+        self._map(scatter, len(chunks))
+        return out
+
+
+def is_sorted(people, chunk=1 << 22):
+    """Ages non-decreasing (checked chunk by chunk, overlapping by one record)."""
+    for lo in range(0, len(people), chunk):
+        ages = people["age"][lo:lo + chunk + 1]
+        if np.any(ages[1:] < ages[:-1]):
+            return False
+    return True
+
+
+# -------------------------------------------------------
+# Benchmark
+# -------------------------------------------------------
+
+def run_binary(binary, N, seed):
+    """(unsorted, sorted, wall ms) of a list_sort binary run in exercise_9."""
+    t0 = time.perf_counter()
+    proc = subprocess.run([os.path.abspath(binary), str(N), str(seed)], capture_output=True,
+                          text=True, cwd=os.path.join(REPO_ROOT, "exercise_9"))
+    ms = (time.perf_counter() - t0) * 1000.0
+    if proc.returncode != 0:
+        raise RuntimeError(f"{binary} exited with {proc.returncode}: {proc.stderr.strip()}")
+    text = proc.stdout
+    head, _, tail = text.partition("\nSorted:\n")
+    unsorted = head.split("Unsorted:\n", 1)[-1].splitlines()
+    return parse(unsorted), parse(tail.splitlines()), ms
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Counting sort of exercise_9 person_t records")
+    parser.add_argument("--N", type=int, default=10**7)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--input", help="binary dump of person_t records instead of generated people")
+    parser.add_argument("--output", help="write the sorted records here (default: a scratch file)")
+    parser.add_argument("--workers", type=int, help="threads (default: all cores)")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--print", action="store_true", help="print the sorted records")
+    parser.add_argument("--compare", metavar="BINARY",
+                        help="sort the people of a list_sort(_ocl) binary and compare")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        people, expected, ms = run_binary(args.compare, args.N, args.seed)
+        with CountingSort(args.workers) as engine:
+            t0 = time.perf_counter()
+            result = engine.sort(people)
+            sort_ms = (time.perf_counter() - t0) * 1000.0
+        print(f"[INFO] {os.path.basename(args.compare)}: {ms:.1f} ms including output; "
+              f"numpy: {sort_ms:.1f} ms for the sort")
+        if result.tobytes() != expected.tobytes():
+            bad = np.flatnonzero(result != expected)
+            print(f"[ERROR] {len(bad)} record(s) differ, the first at {bad[0] if len(bad) else '?'}")
+            sys.exit(1)
+        print(f"[DONE] {args.N} records identical to {args.compare}")
+        return
+
+    people = load(args.input) if args.input else generate(args.N, args.seed)
+    N = len(people)
+    path = args.output or os.path.join(CACHE_DIR, f"sorted_{os.getpid()}.bin")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    out = np.memmap(path, PERSON, "w+", shape=(N,))
+    try:
+        times = []
+        with CountingSort(args.workers) as engine:
+            for _ in range(args.runs):
+                t0 = time.perf_counter()
+                engine.sort(people, out)
+                times.append((time.perf_counter() - t0) * 1000.0)
+                print(f"numpy,{N},{times[-1]:.3f}", file=sys.stderr if args.print else sys.stdout)
+        ms = float(np.median(times))
+        ok = is_sorted(out)
+        summary = (f"[SUMMARY] numpy N={N}: {ms:.1f} ms, {N / ms / 1e3:.1f} M records/s, "
+                   f"{2 * people.nbytes / ms / 1e6:.2f} GB/s on "
+                   f"{engine.workers} thread(s), chunks of {engine.chunk} "
+                   f"({'sorted' if ok else 'NOT SORTED'})")
+        if args.print:
+            print(summary, file=sys.stderr)
+            write_text(out, sys.stdout)
+        else:
+            print(summary)
+        if not ok:
+            sys.exit(1)
+    finally:
+        out.flush()
+        del out
+        if not args.output:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
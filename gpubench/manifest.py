@@ -0,0 +1,281 @@
+"""
+Dirty tracking for plot outputs.
+
+Every figure written through a FigureBuild gets an entry in
+<out_dir>/.manifest.json with three hashes:
+
+  data   the exact data slice the figure was drawn from
+  style  the style parameters (log scale, theme, dpi, ...)
+  code   the source of the function that drew it
+
+On the next run a figure is only re-rendered if one of the hashes changed,
+the PNG is missing, or --force was given. The manifest is merged under a
+file lock on every save, so figures rendered in worker processes (see
+FigureBuild.run) can record themselves without clobbering each other.
+
+Inside a plot function:
+
+    fname = f"runtime_vs_N_{dev}.png"
+    if not build.needs(fname, data=dev_data, style=dict(log_y=log_y)):
+        continue
+    ... draw ...
+    plt.savefig(build.path(fname), dpi=150)
+    build.done(fname)
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import sys
+
+from gpubench import trace
+
+MANIFEST_NAME = ".manifest.json"
+
+
+# -------------------------------------------------------
+# Hashing
+# -------------------------------------------------------
+
+def fingerprint(*objs):
+    """Stable sha256 over DataFrames, arrays, containers and scalars."""
+    h = hashlib.sha256()
+    for obj in objs:
+        _update(h, obj)
+    return h.hexdigest()
+
+
+def _update(h, obj):
+    if obj is None or isinstance(obj, (bool, int, float, str, bytes)):
+        h.update(f"{type(obj).__name__}:{obj!r};".encode())
+    elif isinstance(obj, dict):
+        h.update(b"dict{")
+        for key in sorted(obj, key=repr):
+            _update(h, key)
+            _update(h, obj[key])
+        h.update(b"}")
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        items = sorted(obj, key=repr) if isinstance(obj, (set, frozenset)) else obj
+        h.update(f"{type(obj).__name__}[".encode())
+        for item in items:
+            _update(h, item)
+        h.update(b"]")
+    elif hasattr(obj, "to_numpy") and hasattr(obj, "columns"):
+        # pandas DataFrame: column names, dtypes and row hashes incl. index
+        import pandas as pd
+
+        h.update(repr(list(obj.columns)).encode())
+        h.update(repr([str(t) for t in obj.dtypes]).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif hasattr(obj, "to_numpy") and hasattr(obj, "index"):
+        import pandas as pd
+
+        h.update(f"series:{obj.name!r}:{obj.dtype};".encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif hasattr(obj, "tobytes") and hasattr(obj, "dtype"):
+        h.update(f"ndarray:{obj.dtype}:{obj.shape};".encode())
+        h.update(obj.tobytes())
+    else:
+        h.update(f"{type(obj).__name__}:{obj!r};".encode())
+
+
+def code_version(code):
+    """Hash of the source of a function or code object (falls back to its name)."""
+    try:
+        src = inspect.getsource(code)
+    except (OSError, TypeError):
+        src = getattr(code, "__qualname__", None) or getattr(code, "co_name", repr(code))
+    return hashlib.sha256(src.encode()).hexdigest()
+
+
+# -------------------------------------------------------
+# Manifest file
+# -------------------------------------------------------
+
+class Manifest:
+    """JSON file mapping output file name -> {"data", "style", "code"} hashes."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = self._read()
+        self._dirty = {}
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, name):
+        return self.entries.get(name)
+
+    def record(self, name, key):
+        self.entries[name] = key
+        self._dirty[name] = key
+
+    def save(self):
+        """Merge pending records into the file on disk (locked, atomic replace)."""
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with _FileLock(self.path + ".lock"):
+            entries = self._read()
+            entries.update(self._dirty)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(entries, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+        self.entries = entries
+        self._dirty = {}
+
+
+class _FileLock:
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def __enter__(self):
+        self._fd = os.open(self.path, os.O_CREAT | os.O_RDWR)
+        try:
+            import fcntl
+        except ImportError:  # Windows: no locking, single process only
+            return self
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        os.close(self._fd)  # closing the descriptor releases the flock
+        self._fd = None
+
+
+# -------------------------------------------------------
+# Figure build
+# -------------------------------------------------------
+
+class FigureBuild:
+    """
+    Decides which figures of a plot script need re-rendering.
+
+    style:  parameters shared by every figure (theme, dpi, ...); merged
+            into the per-figure style passed to needs().
+    force:  re-render everything, but still refresh the manifest.
+    """
+
+    def __init__(self, out_dir, style=None, force=False):
+        self.out_dir = out_dir
+        self.style = dict(style or {})
+        self.force = force
+        self.manifest = Manifest(os.path.join(out_dir, MANIFEST_NAME))
+        self.rendered = []
+        self.skipped = []
+        self._pending = {}
+        os.makedirs(out_dir, exist_ok=True)
+
+    def path(self, name):
+        return os.path.join(self.out_dir, name)
+
+    def key(self, data, style=None, code=None):
+        return {
+            "data": fingerprint(data),
+            "style": fingerprint({**self.style, **(style or {})}),
+            "code": code_version(code),
+        }
+
+    def needs(self, name, data, style=None, code=None):
+        """
+        True if `name` has to be (re-)rendered. `code` defaults to the calling
+        function, so editing a plot function invalidates exactly its figures.
+        """
+        if code is None:
+            code = sys._getframe(1).f_code
+        key = self.key(data, style, code)
+        current = (
+            not self.force
+            and self.manifest.get(name) == key
+            and os.path.exists(self.path(name))
+        )
+        if current:
+            self.skipped.append(name)
+            return False
+        # the figure span runs from here (draw) to done() (after savefig), or
+        # to the end of the plot function if it raises first (see run())
+        figure_span = trace.span(name, cat="figure")
+        figure_span.__enter__()
+        self._pending[name] = (key, figure_span)
+        return True
+
+    def done(self, name):
+        """Record a figure as written; call right after savefig."""
+        key, figure_span = self._pending.pop(name)
+        figure_span.__exit__(None, None, None)
+        self.manifest.record(name, key)
+        self.manifest.save()
+        self.rendered.append(name)
+
+    def _close_pending(self):
+        """Close the spans of figures needs() opened but done() never recorded."""
+        exc = sys.exc_info()
+        for _, figure_span in reversed(list(self._pending.values())):
+            figure_span.__exit__(*exc)
+        self._pending.clear()
+
+    def run(self, calls, jobs=1):
+        """
+        Run plot functions, given as (func, kwargs) pairs. With jobs > 1 they
+        are spread over forked worker processes; rendered/skipped lists of the
+        workers are collected so report() covers the whole run. A figure a
+        function leaves unfinished (it raised between needs() and done()) has
+        its span closed and stays out of the manifest.
+        """
+        if jobs <= 1 or len(calls) <= 1 or not _can_fork():
+            for call in calls:
+                _traced_call(call, self)
+            return
+
+        import multiprocessing
+
+        global _active
+        _active = self
+        ctx = multiprocessing.get_context("fork")
+        with ctx.Pool(min(jobs, len(calls))) as pool:
+            results = pool.map(_run_one, calls)
+        _active = None
+        for rendered, skipped in results:
+            self.rendered.extend(rendered)
+            self.skipped.extend(skipped)
+        self.manifest = Manifest(self.manifest.path)
+
+    def report(self):
+        print(f"[BUILD] {len(self.rendered)} figure(s) rendered, "
+              f"{len(self.skipped)} up to date in '{self.out_dir}'")
+        for name in self.skipped:
+            print(f"  skipped {name}")
+
+
+_active = None
+
+
+def _can_fork():
+    import multiprocessing
+
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def _run_one(call):
+    # Forked workers inherit the parent's objects, so _active is the same
+    # FigureBuild the plot functions use; only report what this call produced.
+    _active.rendered, _active.skipped = [], []
+    _traced_call(call, _active)
+    return _active.rendered, _active.skipped
+
+
+def _traced_call(call, build):
+    func, kwargs = call
+    scalars = {k: v for k, v in kwargs.items() if isinstance(v, (str, int, float, bool))}
+    with trace.span(func.__name__, cat="plot", **scalars):
+        try:
+            func(**kwargs)
+        finally:
+            build._close_pending()
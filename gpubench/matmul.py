@@ -0,0 +1,243 @@
+"""
+Blocked CPU matmul reference and full-matrix validator for exercise_10.
+
+The matrix_mul drivers only report whether C equals their own naive CPU
+product, and the results CSVs keep no correctness signal at all. This
+module computes C = A x B through NumPy/BLAS in row panels sized to the L2
+cache (a panel of A and of C at a time, BLAS threads inside every panel),
+for float and double at the sizes of the Makefiles:
+
+  reference  the product in the input precision, timed, as GFLOPS
+             (2 N^3 flops) next to the drivers' own rows
+  validate   every element of a dumped C against the product in double,
+             within the forward error bound of a length-N dot product,
+             |C - A x B| <= gamma_N |A| x |B| with gamma_N = N u / (1 - N u)
+             (u the unit roundoff of the precision, twice that bound for
+             double, whose reference is rounded too)
+
+Built with `make clean all DUMP=1`, the drivers of ex_1 and optimized
+write A, B and C as raw matrix_mul_N<N>_<precision>_{A,B,C}.bin into their
+directory; --validate reads them as memmaps and checks them panel by panel:
+
+    python -m gpubench.matmul --N 512 1024 2000 2048 --precision float double --runs 3
+    python -m gpubench.matmul --validate exercise_10/optimized
+    python -m gpubench.matmul --results -o exercise_10/results/matrix_mul_results_cpu.csv
+
+--results sets the median GFLOPS of every device in exercise_10/results
+against the CPU reference of the same precision and N.
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+from gpubench import results
+from gpubench.bands import cache_size
+
+SIZES = [512, 1024, 2000, 2048]
+DTYPES = {"float": np.float32, "double": np.float64}
+
+_DUMP = re.compile(r"matrix_mul_N(\d+)_(float|double)_C\.bin")
+
+
+# -------------------------------------------------------
+# Matrices
+# -------------------------------------------------------
+
+def inputs(N, precision="float"):
+    """A and B of the exercise_10 drivers: A[i][j] = i + 1, B the identity."""
+    dtype = DTYPES[precision]
+    A = np.repeat(np.arange(1, N + 1, dtype=dtype)[:, None], N, axis=1)
+    return A, np.eye(N, dtype=dtype)
+
+
+def load_dump(directory, N, precision):
+    """(A, B, C) dumped by a driver as read-only memmaps; A and B rebuilt if missing."""
+    dtype = DTYPES[precision]
+    stem = os.path.join(directory, f"matrix_mul_N{N}_{precision}")
+    C = np.memmap(f"{stem}_C.bin", dtype, "r", shape=(N, N))
+    if os.path.exists(f"{stem}_A.bin") and os.path.exists(f"{stem}_B.bin"):
+        A = np.memmap(f"{stem}_A.bin", dtype, "r", shape=(N, N))
+        B = np.memmap(f"{stem}_B.bin", dtype, "r", shape=(N, N))
+    else:
+        A, B = inputs(N, precision)
+    return A, B, C
+
+
+def dumps(directory):
+    """(N, precision) of every C dump in a directory."""
+    found = []
+    for path in sorted(glob.glob(os.path.join(directory, "matrix_mul_N*_C.bin"))):
+        m = _DUMP.fullmatch(os.path.basename(path))
+        if m:
+            found.append((int(m.group(1)), m.group(2)))
+    return sorted(found)
+
+
+# -------------------------------------------------------
+# Reference
+# -------------------------------------------------------
+
+def panel_rows(N, dtype, cache=None):
+    """Rows per panel: one panel of A and one of C in the L2 cache."""
+    cache = cache or cache_size()
+    return max(16, cache // (2 * N * np.dtype(dtype).itemsize))
+
+
+def multiply(A, B, out=None, rows=None):
+    """A x B in the precision of A, row panel by row panel."""
+    N = A.shape[0]
+    out = np.empty((N, B.shape[1]), A.dtype) if out is None else out
+    rows = rows or panel_rows(N, A.dtype)
+    for lo in range(0, N, rows):
+        np.matmul(A[lo:lo + rows], B, out=out[lo:lo + rows])
+    return out
+
+
+def gflops(N, ms):
+    return 2.0 * N**3 / (ms * 1e6)
+
+
+def reference(N, precision="float", runs=3):
+    """Elapsed ms of every run of the blocked product of the exercise_10 inputs."""
+    A, B = inputs(N, precision)
+    out = np.empty_like(A)
+    multiply(A, B, out)  # warm-up: BLAS threads, pages of out
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        multiply(A, B, out)
+        times.append((time.perf_counter() - t0) * 1000.0)
+    return times
+
+
+# -------------------------------------------------------
+# Validation
+# -------------------------------------------------------
+
+def gamma(N, precision):
+    """Forward error factor of a length-N dot product in a precision."""
+    u = np.finfo(DTYPES[precision]).eps / 2
+    return N * u / (1 - N * u)
+
+
+def validate(A, B, C, precision, rows=None):
+    """
+    Compare every element of C with A x B (in double) within the error bound.
+
+    Returns a dict: ok, bad (elements outside the bound), first (row, column)
+    of those or None, max_error (absolute) and max_ratio (error / bound).
+    """
+    N = A.shape[0]
+    factor = gamma(N, precision) * (2 if precision == "double" else 1)
+    rows = rows or panel_rows(N, np.float64)
+    B64 = np.asarray(B, np.float64)
+    Babs = np.abs(B64)
+    bad, first, max_error, max_ratio = 0, None, 0.0, 0.0
+    for lo in range(0, N, rows):
+        A64 = np.asarray(A[lo:lo + rows], np.float64)
+        error = np.abs(np.asarray(C[lo:lo + rows], np.float64) - A64 @ B64)
+        bound = factor * (np.abs(A64) @ Babs)
+        outside = ~(error <= bound)  # NaN counts as outside
+        if outside.any():
+            if first is None:
+                i, j = np.unravel_index(np.argmax(outside), outside.shape)
+                first = (lo + int(i), int(j))
+            bad += int(np.count_nonzero(outside))
+        finite = np.isfinite(error)
+        if finite.any():
+            max_error = max(max_error, float(error[finite].max()))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(bound > 0, error / bound, np.where(error > 0, np.inf, 0.0))
+        max_ratio = max(max_ratio, float(np.nanmax(ratio)) if ratio.size else 0.0)
+    return {"ok": bad == 0, "bad": bad, "first": first, "max_error": max_error,
+            "max_ratio": max_ratio}
+
+
+# -------------------------------------------------------
+# Comparison with the drivers
+# -------------------------------------------------------
+
+def device_gflops():
+    """Median time_ms and GFLOPS per device, version, precision and N of exercise_10."""
+    long = results.load_measurements(results.SOURCES["exercise_10"])
+    long = long[long["metric"] == "time_ms"]
+    table = (long.groupby(["device", "version", "precision", "N"])["value"].median()
+             .rename("time_ms").reset_index())
+    table["gflops"] = gflops(table["N"], table["time_ms"])
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Blocked CPU matmul reference of exercise_10")
+    parser.add_argument("--N", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--precision", nargs="+", choices=sorted(DTYPES), default=["float", "double"])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--validate", metavar="DIR", nargs="+",
+                        help="check the matrices dumped by DUMP=1 drivers in these directories")
+    parser.add_argument("--results", action="store_true",
+                        help="compare the GFLOPS of exercise_10/results with the reference")
+    parser.add_argument("-o", "--output",
+                        help="append rows (precision, N, time_ms, gflops) to this CSV")
+    args = parser.parse_args(argv)
+
+    if args.validate is not None:
+        bad = checked = 0
+        for directory in args.validate:
+            for N, precision in dumps(directory):
+                A, B, C = load_dump(directory, N, precision)
+                r = validate(A, B, C, precision)
+                checked += 1
+                bad += not r["ok"]
+                state = "ok" if r["ok"] else "FAILED"
+                where = f", {r['bad']} outside, first at {r['first']}" if r["bad"] else ""
+                print(f"  [{state:>6}] {directory} {precision:<6} N={N:<5} max error "
+                      f"{r['max_error']:.2e} ({r['max_ratio']:.2e} of the bound){where}")
+        if not checked:
+            print("[ERROR] no matrix_mul_N<N>_<precision>_C.bin dumps found (build with DUMP=1)")
+            sys.exit(1)
+        if bad:
+            print(f"[ERROR] {bad} of {checked} result(s) outside the error bound")
+            sys.exit(1)
+        print(f"[DONE] {checked} result(s) within the error bound")
+        return
+
+    rows = {}
+    for precision in args.precision:
+        for N in args.N:
+            times = reference(N, precision, args.runs)
+            for ms in times:
+                # the row layout of optimized/matrix_mul.c
+                print(f"{precision},{N},{ms:.3f},{gflops(N, ms):.2f}")
+            ms = float(np.median(times))
+            rows[(precision, N)] = times
+            print(f"[SUMMARY] numpy {precision} N={N}: {ms:.1f} ms, {gflops(N, ms):.1f} GFLOPS "
+                  f"in panels of {panel_rows(N, DTYPES[precision])} rows")
+
+    if args.output:
+        new = not os.path.exists(args.output)
+        with open(args.output, "a") as f:
+            if new:
+                f.write("precision,N,time_ms,gflops\n")
+            for (precision, N), times in rows.items():
+                for ms in times:
+                    f.write(f"{precision},{N},{ms:.3f},{gflops(N, ms):.2f}\n")
+
+    if args.results:
+        table = device_gflops()
+        for row in table.itertuples(index=False):
+            key = (row.precision, int(row.N))
+            if key not in rows:
+                continue
+            cpu = gflops(row.N, float(np.median(rows[key])))
+            print(f"[SUMMARY] {row.device} {row.version} {row.precision} N={row.N}: "
+                  f"{row.gflops:.1f} GFLOPS, {row.gflops / cpu:.2f}x the CPU reference")
+
+
+if __name__ == "__main__":
+    main()
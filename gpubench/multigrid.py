@@ -0,0 +1,299 @@
+"""
+Multigrid V-cycles for the Jacobi problem of exercise_2/jacobi.c.
+
+The Jacobi codes iterate u = (u_up + u_right + u_left + u_down - h^2 f) / 4
+with h = 1/N and a zero boundary, i.e. they solve the 5-point system
+
+    (4 u[i][j] - u[i-1][j] - u[i][j+1] - u[i][j-1] - u[i+1][j]) / h^2 = -f[i][j]
+
+for a fixed number of sweeps. Multigrid solves the same system (same f
+from gpubench.jacobi.rhs, same h, same zero boundary, in float or double)
+until the relative residual ||b - A u|| / ||b|| drops below a tolerance:
+
+  smoothing      red-black Gauss-Seidel (default) or weighted Jacobi (omega 4/5)
+  coarsening     vertex-centred: m interior points -> (m - 1) // 2, every
+                 second one, the boundary kept where it is
+  restriction    full weighting onto the coarse points
+  prolongation   bilinear interpolation, added to the fine solution
+  coarsest       a few hundred smoothing sweeps on at most 3 x 3 unknowns
+
+Grids need not be 2^k + 1 points: with an even number of interior points
+the leftover coarse interval spans three fine cells instead of two. It is
+left at the upper end on one level and at the lower end on the next, so
+wide intervals do not pile up at one boundary, and every grid keeps the
+positions of its points: its operator (the 3-point second difference per
+axis with the spacing to each neighbour) and the transfer weights account
+for the wider intervals, and V-cycles converge about as fast as on 2^k + 1
+points (below 0.2 per cycle).
+
+The report puts time-to-tolerance next to the fixed-IT times of a results
+file, with the residual each of those fixed-IT runs actually reaches:
+
+    python -m gpubench.multigrid --N 1024 2048 --precision float double --tol 1e-6
+    python -m gpubench.multigrid --N 2048 --fixed exercise_2/results_ifi.csv
+"""
+
+import argparse
+import itertools
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from gpubench import jacobi
+
+SMOOTHERS = ("rbgs", "jacobi")
+
+
+def _odd(start, count):
+    """Slice of `count` indices start, start + 2, ..."""
+    return slice(start, start + 2 * count - 1, 2)
+
+
+def _sum_by(index, weight, values, size):
+    """out[k] = sum of weight[i] * values[i] over the i with index[i] == k (index sorted)."""
+    out = np.zeros((size,) + values.shape[1:], values.dtype)
+    keys, starts = np.unique(index, return_index=True)
+    out[keys] = np.add.reduceat(weight[:, None] * values, starts, axis=0)
+    return out
+
+
+class Level:
+    """
+    One grid: solution u, right-hand side b and residual r, boundary
+    included. x holds the positions of the m + 2 points per dimension (in
+    units of the finest spacing, boundary included); the 3-point second
+    difference of every axis uses the spacings to both neighbours, so
+    coarse grids with one wider last interval are discretised correctly.
+    """
+
+    def __init__(self, x, h2, dtype):
+        self.x = np.asarray(x, np.float64)
+        self.m = m = len(self.x) - 2  # interior points per dimension
+        left, right = np.diff(self.x)[:-1], np.diff(self.x)[1:]
+        # weights of the two neighbours along one axis, padded to the m + 2 rows of u
+        self.wl = np.zeros(m + 2, dtype)
+        self.wr = np.zeros(m + 2, dtype)
+        self.wl[1:-1] = 2 / (left * (left + right) * float(h2))
+        self.wr[1:-1] = 2 / (right * (left + right) * float(h2))
+        self.diag = self.wl + self.wr
+        self.u = np.zeros((m + 2, m + 2), dtype)
+        self.b = np.zeros((m + 2, m + 2), dtype)
+        self.r = np.zeros((m + 2, m + 2), dtype)
+
+    def coarse(self, reverse=False):
+        """
+        Positions of the next coarser grid: every second interior point,
+        (m - 1) // 2 of them, counted from the upper end if reverse.
+        """
+        mc = (self.m - 1) // 2
+        x = self.x[::-1] if reverse else self.x
+        x = np.concatenate([x[0:2 * mc + 1:2], x[-1:]])
+        return x[::-1] if reverse else x
+
+    def residual(self):
+        """r = b - A u on the interior (the boundary of r stays zero)."""
+        u, r = self.u, self.r
+        wl, wr = self.wl[1:-1], self.wr[1:-1]
+        inner = r[1:-1, 1:-1]
+        np.multiply(wl[:, None], u[:-2, 1:-1], out=inner)
+        inner += wr[:, None] * u[2:, 1:-1]
+        inner += wl[None, :] * u[1:-1, :-2]
+        inner += wr[None, :] * u[1:-1, 2:]
+        inner -= (self.diag[1:-1, None] + self.diag[None, 1:-1]) * u[1:-1, 1:-1]
+        inner += self.b[1:-1, 1:-1]
+        return r
+
+    def jacobi(self, sweeps, omega=0.8):
+        d = self.diag[1:-1, None] + self.diag[None, 1:-1]
+        for _ in range(sweeps):
+            r = self.residual()
+            self.u[1:-1, 1:-1] += omega * r[1:-1, 1:-1] / d
+
+    def rbgs(self, sweeps):
+        u, b, m = self.u, self.b, self.m
+        wl, wr, d = self.wl, self.wr, self.diag
+        for _ in range(sweeps):
+            for color in (0, 1):
+                for r0 in (1, 2):
+                    c0 = 2 - (r0 + color) % 2
+                    rows, cols = (m - r0) // 2 + 1, (m - c0) // 2 + 1
+                    if rows <= 0 or cols <= 0:
+                        continue
+                    ri, ci = _odd(r0, rows), _odd(c0, cols)
+                    u[ri, ci] = (wl[ri, None] * u[_odd(r0 - 1, rows), ci]
+                                 + wr[ri, None] * u[_odd(r0 + 1, rows), ci]
+                                 + wl[None, ci] * u[ri, _odd(c0 - 1, cols)]
+                                 + wr[None, ci] * u[ri, _odd(c0 + 1, cols)]
+                                 + b[ri, ci]) / (d[ri, None] + d[None, ci])
+
+
+class Transfer:
+    """
+    Linear interpolation between a grid and the next coarser one, along
+    each axis by position, and its transpose (normalised to a weighted
+    average) for the residual: full weighting where the coarse spacing is
+    2h, the matching weights next to a wider last interval.
+    """
+
+    def __init__(self, fine, coarse):
+        xf, xc = fine.x[1:-1], coarse.x
+        self.left = np.searchsorted(xc, xf, side="right") - 1  # coarse index, boundary included
+        self.right = self.left + 1
+        dtype = fine.u.dtype
+        self.wr = ((xf - xc[self.left]) / (xc[self.right] - xc[self.left])).astype(dtype)
+        self.wl = (1 - self.wr).astype(dtype)
+        size = coarse.m + 2
+        total = np.zeros(size)
+        np.add.at(total, self.left, self.wl)
+        np.add.at(total, self.right, self.wr)
+        self.total = total.astype(dtype)
+
+    def _interpolate(self, e):
+        """Axis 0 of e (coarse points, boundary included) at the fine interior points."""
+        return self.wl[:, None] * e[self.left] + self.wr[:, None] * e[self.right]
+
+    def _average(self, r, size):
+        """Axis 0 of r (fine interior points) onto the coarse points, boundary included."""
+        out = _sum_by(self.left, self.wl, r, size) + _sum_by(self.right, self.wr, r, size)
+        return out / self.total[:, None]
+
+    def restrict(self, fine, coarse):
+        size = coarse.m + 2
+        rows = self._average(fine.r[1:-1, 1:-1], size)
+        coarse.b[1:-1, 1:-1] = self._average(rows.T, size).T[1:-1, 1:-1]
+
+    def prolong(self, coarse, fine):
+        """Add the interpolation of coarse.u to fine.u."""
+        rows = self._interpolate(coarse.u)
+        fine.u[1:-1, 1:-1] += self._interpolate(rows.T).T
+
+
+class Multigrid:
+    """V-cycles on the problem of gpubench.jacobi for N x N points."""
+
+    def __init__(self, N, precision="double", smoother="rbgs", pre=2, post=2):
+        if smoother not in SMOOTHERS:
+            raise ValueError(f"unknown smoother {smoother!r} (known: {', '.join(SMOOTHERS)})")
+        self.N = N
+        self.precision = precision
+        self.smoother = smoother
+        self.pre, self.post = pre, post
+        dtype = jacobi.DTYPES[precision]
+        # exactly the factor of jacobi.c; coarse grids scale it by their spacing
+        h2 = jacobi.factor(N, precision)
+        self.levels = [Level(np.arange(N), h2, dtype)]
+        while self.levels[-1].m > 3:
+            reverse = len(self.levels) % 2 == 0  # alternate the end of the leftover interval
+            self.levels.append(Level(self.levels[-1].coarse(reverse), h2, dtype))
+        self.transfers = [Transfer(f, c) for f, c in zip(self.levels, self.levels[1:])]
+        fine = self.levels[0]
+        fine.b[:] = -jacobi.rhs(N, precision)
+        fine.b[0], fine.b[-1], fine.b[:, 0], fine.b[:, -1] = 0, 0, 0, 0
+        self.norm_b = float(np.linalg.norm(fine.b[1:-1, 1:-1].astype(np.float64)))
+
+    @property
+    def u(self):
+        return self.levels[0].u
+
+    def smooth(self, level, sweeps):
+        if self.smoother == "rbgs":
+            level.rbgs(sweeps)
+        else:
+            level.jacobi(sweeps)
+
+    def residual(self):
+        """||b - A u|| / ||b|| on the finest grid."""
+        r = self.levels[0].residual()[1:-1, 1:-1]
+        return float(np.linalg.norm(r.astype(np.float64))) / self.norm_b
+
+    def cycle(self, index=0):
+        level = self.levels[index]
+        if index == len(self.levels) - 1:
+            self.smooth(level, 200)
+            return
+        self.smooth(level, self.pre)
+        level.residual()
+        coarse = self.levels[index + 1]
+        self.transfers[index].restrict(level, coarse)
+        coarse.u.fill(0)
+        self.cycle(index + 1)
+        self.transfers[index].prolong(coarse, level)
+        self.smooth(level, self.post)
+
+    def solve(self, tol=1e-6, max_cycles=50):
+        """
+        V-cycles until the relative residual is below tol. Returns the
+        checkpoints (cycles, residual, elapsed ms) including cycle 0 and the
+        reason to stop: "converged", "max_cycles" or "stalled" (the residual
+        stopped decreasing, e.g. at the rounding floor of float).
+        """
+        t0 = time.perf_counter()
+        checkpoints = [(0, self.residual(), 0.0)]
+        for k in range(1, max_cycles + 1):
+            self.cycle()
+            res = self.residual()
+            checkpoints.append((k, res, (time.perf_counter() - t0) * 1000.0))
+            if res <= tol:
+                return checkpoints, "converged"
+            if res > 0.9 * checkpoints[-2][1]:
+                return checkpoints, "stalled"
+        return checkpoints, "max_cycles"
+
+
+def jacobi_residual(N, IT, precision="double"):
+    """Relative residual that IT sweeps of jacobi.c reach (via the NumPy reference)."""
+    mg = Multigrid(N, precision)
+    solver = jacobi.Jacobi(N, precision).step(IT)
+    mg.levels[0].u[:] = solver.u
+    return mg.residual()
+
+
+# -------------------------------------------------------
+# Report
+# -------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multigrid time-to-tolerance for the Jacobi problem")
+    parser.add_argument("--N", type=int, nargs="+", default=[1024])
+    parser.add_argument("--precision", nargs="+", choices=sorted(jacobi.DTYPES), default=["double"])
+    parser.add_argument("--tol", type=float, default=1e-6, help="relative residual to reach")
+    parser.add_argument("--smoother", choices=SMOOTHERS, default="rbgs")
+    parser.add_argument("--sweeps", type=int, nargs=2, default=[2, 2], metavar=("PRE", "POST"))
+    parser.add_argument("--max-cycles", type=int, default=50)
+    parser.add_argument("--fixed", metavar="CSV", nargs="+",
+                        help="results files (mode, precision, N, IT, time_ms) to compare with")
+    parser.add_argument("-o", "--output",
+                        help="append (mode, precision, N, iterations, residual, time_ms) checkpoints")
+    args = parser.parse_args(argv)
+
+    fixed = None
+    if args.fixed:
+        fixed = pd.concat([pd.read_csv(p).assign(source=p) for p in args.fixed], ignore_index=True)
+
+    rows = []
+    for N, precision in itertools.product(args.N, args.precision):
+        mg = Multigrid(N, precision, args.smoother, *args.sweeps)
+        checkpoints, stop = mg.solve(args.tol, args.max_cycles)
+        mode = f"multigrid_{args.smoother}"
+        rows += [(mode, precision, N, k, res, ms) for k, res, ms in checkpoints]
+        k, res, ms = checkpoints[-1]
+        state = "DONE" if stop == "converged" else "INFO"
+        print(f"[{state}] {mode} {precision} N={N}: residual {res:.2e} after {k} cycle(s), "
+              f"{ms:.1f} ms ({stop}, {len(mg.levels)} levels)")
+        if fixed is None:
+            continue
+        sel = fixed[(fixed["N"] == N) & (fixed["precision"] == precision)]
+        for IT, group in sel.groupby("IT"):
+            times = ", ".join(f"{mode} {t:.1f} ms" for mode, t in
+                              group.groupby("mode")["time_ms"].median().items())
+            print(f"  jacobi IT={IT:<5} residual {jacobi_residual(N, int(IT), precision):.2e}: {times}")
+
+    if args.output:
+        df = pd.DataFrame(rows, columns=["mode", "precision", "N", "iterations", "residual", "time_ms"])
+        df.to_csv(args.output, mode="a", index=False, header=not os.path.exists(args.output))
+
+
+if __name__ == "__main__":
+    main()
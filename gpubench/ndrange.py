@@ -0,0 +1,653 @@
+"""
+CPU emulator for the OpenCL NDRange kernels, with work-group semantics.
+
+The kernels of the exercises only run on the GPU nodes, so a wrong halo
+load or a missing barrier shows up as a wrong number at best. NDRange runs
+re-expressions of the kernels on the CPU: one work-group at a time, all of
+its work-items at once as NumPy arrays of shape local_size, with
+
+  ids       wg.global_id(d), wg.local_id(d), wg.group_id, wg.local_size
+  global    wg.load / wg.store / wg.atomic on the kernel's array arguments
+  local     wg.local(name, shape, dtype): __local memory of the work-group
+  barrier   wg.barrier() ends a phase; wg.exit(mask) is a `return`
+
+and checks what the hardware would not tell: barriers reached by only part
+of the work-group, reads of local memory no work-item wrote, local races
+(a work-item reading or writing what another one wrote, or writing what
+another one read, in the same phase) and out-of-bounds global accesses.
+Global and local sizes follow OpenCL 1.2: global divisible by local.
+
+Every access is recorded per work-group, phase, buffer and kind, with its
+bytes and transactions: distinct 128-byte segments per SIMD group of
+`simd` consecutive work-items for global memory, bank-conflict serialized
+accesses (32 banks of 4 bytes) for local memory. Trace.frame() has the
+rows, Trace.issues what went wrong.
+
+The kernels below follow the .cl sources line by line: jacobi_step_local
+and jacobi_step_local_norm (exercise_6/jacobi), hillis_steele_scan and
+add_block_sums (exercise_8), reduce_stats (exercise_7), histogram
+(exercise_9) and matrix_mul_tiled (exercise_10/optimized). The checks run
+them with the host code's sizes and compare with NumPy:
+
+    python -m gpubench.ndrange jacobi --N 64 --local 8 32
+    python -m gpubench.ndrange jacobi_norm --N 64 --all-shapes
+    python -m gpubench.ndrange scan histogram reduce_stats matmul -o /tmp/accesses.csv
+"""
+
+import argparse
+import inspect
+import itertools
+import sys
+
+import numpy as np
+import pandas as pd
+
+SEGMENT = 128  # bytes per global memory transaction
+BANKS = 32  # local memory banks of 4 bytes
+
+
+class KernelError(RuntimeError):
+    pass
+
+
+# -------------------------------------------------------
+# Memory
+# -------------------------------------------------------
+
+class Buffer:
+    """A __global kernel argument: a NumPy array, flat indexed, written in place."""
+
+    def __init__(self, name, array):
+        self.name = name
+        self.array = array
+        self.flat = array.reshape(-1)
+
+
+class Local:
+    """
+    __local memory of one work-group, flat indexed, with what the work-items
+    wrote and read since the last barrier.
+    """
+
+    def __init__(self, name, shape, dtype):
+        self.name = name
+        self.shape = tuple(np.atleast_1d(shape))
+        self.flat = np.zeros(int(np.prod(self.shape)), dtype)
+        self.written = np.zeros(self.flat.size, bool)
+        self.writer = np.full(self.flat.size, -1, np.int64)
+        self.reader = np.full(self.flat.size, -1, np.int64)  # -2: several work-items
+
+    def index(self, *index):
+        """Flat index of a multi-dimensional one (tile[i][j] -> tile.index(i, j))."""
+        return np.ravel_multi_index(index, self.shape, mode="wrap") if len(index) > 1 else index[0]
+
+    def fence(self):
+        self.writer[:] = -1
+        self.reader[:] = -1
+
+
+# -------------------------------------------------------
+# Work-groups
+# -------------------------------------------------------
+
+class WorkGroup:
+    """All work-items of one work-group; ids and values are arrays of shape local_size."""
+
+    def __init__(self, ndrange, group_id, trace):
+        self.ndrange = ndrange
+        self.group_id = group_id
+        self.local_size = ndrange.local_size
+        self.global_size = ndrange.global_size
+        self.trace = trace
+        self.key = int(np.ravel_multi_index(group_id, ndrange.num_groups))
+        self.phase = 0
+        self.locals = []
+        grid = np.indices(self.local_size)
+        self._local_ids = list(grid)
+        # get_local_linear_id(): dimension 0 varies fastest
+        self.lane = sum(g * int(np.prod(self.local_size[:d])) for d, g in enumerate(grid))
+        self.active = np.ones(self.local_size, bool)
+
+    def local_id(self, d):
+        return self._local_ids[d]
+
+    def global_id(self, d):
+        return self.group_id[d] * self.local_size[d] + self._local_ids[d]
+
+    def get_group_id(self, d):
+        return self.group_id[d]
+
+    def size(self):
+        return int(np.prod(self.local_size))
+
+    def local(self, name, shape, dtype):
+        memory = Local(name, shape, dtype)
+        self.locals.append(memory)
+        return memory
+
+    def exit(self, mask):
+        """`if(mask) return;` for the work-items where mask holds."""
+        self.active &= ~np.broadcast_to(mask, self.local_size)
+
+    def barrier(self):
+        alive = int(np.count_nonzero(self.active))
+        if 0 < alive < self.active.size:
+            self.issue("barrier", None, f"reached by {alive} of {self.active.size} work-items")
+        for memory in self.locals:
+            memory.fence()
+        self.phase += 1
+
+    def issue(self, kind, name, detail):
+        self.trace.issue(self, kind, name, detail)
+
+    # -- global and local accesses --
+
+    def _lanes(self, index, mask):
+        mask = self.active.copy() if mask is None else self.active & np.broadcast_to(mask, self.local_size)
+        index = np.broadcast_to(np.asarray(index, np.int64), self.local_size)
+        return index[mask], self.lane[mask], mask
+
+    def _bounds(self, memory, index, lanes):
+        ok = (index >= 0) & (index < memory.flat.size)
+        if not ok.all():
+            bad = index[~ok][0]
+            self.issue("out of bounds", memory.name, f"index {bad} of {memory.flat.size}")
+        return index[ok], lanes[ok], ok
+
+    def _record(self, memory, kind, index, lanes):
+        itemsize = memory.flat.itemsize
+        warp = lanes // self.ndrange.simd
+        if isinstance(memory, Local):
+            # a SIMD group takes as many cycles as distinct words in its busiest bank
+            words = index * itemsize // 4
+            pairs = np.unique(np.stack([warp, words % BANKS, words]), axis=1)
+            banks, counts = np.unique(pairs[:2], axis=1, return_counts=True)
+            busiest = np.zeros(int(warp.max()) + 1 if warp.size else 0, np.int64)
+            np.maximum.at(busiest, banks[0], counts)
+            transactions = int(busiest.sum())
+            space = "local"
+        else:
+            segments = index * itemsize // SEGMENT
+            transactions = int(np.unique(np.stack([warp, segments]), axis=1).shape[1]) if index.size else 0
+            space = "global"
+        self.trace.record(self, space, memory.name, kind, index.size, index.size * itemsize, transactions)
+
+    def load(self, memory, index, mask=None):
+        """memory[index] for every active work-item where mask holds (0 elsewhere)."""
+        index, lanes, where = self._lanes(index, mask)
+        index, lanes, ok = self._bounds(memory, index, lanes)
+        where[where] = ok
+        out = np.zeros(self.local_size, memory.flat.dtype)
+        out[where] = memory.flat[index]
+        self._record(memory, "load", index, lanes)
+        if isinstance(memory, Local):
+            self._check_read(memory, index, lanes)
+        return out
+
+    def store(self, memory, index, values, mask=None):
+        """memory[index] = values for every active work-item where mask holds."""
+        index, lanes, where = self._lanes(index, mask)
+        index, lanes, ok = self._bounds(memory, index, lanes)
+        where[where] = ok
+        values = np.broadcast_to(np.asarray(values), self.local_size)[where]
+        if isinstance(memory, Local):
+            self._check_write(memory, index, lanes)
+        memory.flat[index] = values
+        self._record(memory, "store", index, lanes)
+
+    def atomic(self, op, memory, index, values=1, mask=None):
+        """atomic_add/min/max (op "add", "min", "max") of every active work-item where mask holds."""
+        index, lanes, where = self._lanes(index, mask)
+        index, lanes, ok = self._bounds(memory, index, lanes)
+        where[where] = ok
+        values = np.broadcast_to(np.asarray(values), self.local_size)[where]
+        if isinstance(memory, Local):
+            unset = index[~memory.written[index]]
+            if unset.size:
+                self.issue("uninitialized", memory.name, f"atomic on index {unset[0]}")
+            memory.written[index] = True
+        ufunc = {"add": np.add, "min": np.minimum, "max": np.maximum}[op]
+        with np.errstate(over="ignore"):
+            ufunc.at(memory.flat, index, values.astype(memory.flat.dtype))
+        self._record(memory, "atomic", index, lanes)
+
+    def _check_read(self, memory, index, lanes):
+        unset = index[~memory.written[index]]
+        if unset.size:
+            self.issue("uninitialized", memory.name, f"read of index {unset[0]}")
+        writer = memory.writer[index]
+        race = (writer >= 0) & (writer != lanes)
+        if race.any():
+            self.issue("race", memory.name, f"index {index[race][0]} read by work-item "
+                       f"{lanes[race][0]}, written by {writer[race][0]} in the same phase")
+        reader = memory.reader[index]
+        memory.reader[index] = np.where((reader == -1) | (reader == lanes), lanes, -2)
+        addresses, counts = np.unique(index, return_counts=True)
+        memory.reader[addresses[counts > 1]] = -2
+
+    def _check_write(self, memory, index, lanes):
+        writer, reader = memory.writer[index], memory.reader[index]
+        race = ((writer >= 0) & (writer != lanes)) | ((reader != -1) & (reader != lanes))
+        addresses, counts = np.unique(index, return_counts=True)
+        if race.any() or (counts > 1).any():
+            where = index[race][0] if race.any() else addresses[counts > 1][0]
+            self.issue("race", memory.name, f"index {where} written by one work-item while "
+                       f"another one reads or writes it in the same phase")
+        memory.writer[index] = lanes
+        memory.written[index] = True
+
+
+# -------------------------------------------------------
+# NDRange
+# -------------------------------------------------------
+
+class Trace:
+    """Accesses and issues of one or more kernel launches."""
+
+    COLUMNS = ["kernel", "group", "phase", "space", "buffer", "kind", "accesses", "bytes",
+               "transactions"]
+
+    def __init__(self):
+        self.counts = {}
+        self.issues = []
+        self.kernel = None
+
+    def record(self, wg, space, name, kind, accesses, nbytes, transactions):
+        key = (self.kernel, wg.key, wg.phase, space, name, kind)
+        row = self.counts.setdefault(key, [0, 0, 0])
+        row[0] += accesses
+        row[1] += nbytes
+        row[2] += transactions
+
+    def issue(self, wg, kind, name, detail):
+        self.issues.append({"kernel": self.kernel, "group": wg.group_id, "phase": wg.phase,
+                            "kind": kind, "buffer": name, "detail": detail})
+        if wg.ndrange.strict:
+            raise KernelError(f"{self.kernel} work-group {wg.group_id} phase {wg.phase}: "
+                              f"{kind}{' of ' + name if name else ''}: {detail}")
+
+    def frame(self):
+        return pd.DataFrame([list(key) + row for key, row in self.counts.items()],
+                            columns=self.COLUMNS)
+
+
+class NDRange:
+    """
+    An NDRange of `global_size` work-items in work-groups of `local_size`.
+    run(kernel, *args) calls kernel(wg, *args) for every work-group; array
+    arguments become Buffers named after the kernel's parameters.
+    """
+
+    def __init__(self, global_size, local_size, simd=32, strict=False, trace=None):
+        self.global_size = tuple(np.atleast_1d(global_size).tolist())
+        self.local_size = tuple(np.atleast_1d(local_size).tolist())
+        if len(self.global_size) != len(self.local_size):
+            raise ValueError("global and local size need the same dimensions")
+        if any(g % l for g, l in zip(self.global_size, self.local_size)):
+            raise ValueError(f"global size {self.global_size} is not a multiple of the "
+                             f"local size {self.local_size} (CL_INVALID_WORK_GROUP_SIZE)")
+        self.num_groups = tuple(g // l for g, l in zip(self.global_size, self.local_size))
+        self.simd = simd
+        self.strict = strict
+        self.trace = trace or Trace()
+
+    def run(self, kernel, *args):
+        names = list(inspect.signature(kernel).parameters)[1:]
+        args = [Buffer(name, a) if isinstance(a, np.ndarray) else a for name, a in zip(names, args)]
+        self.trace.kernel = kernel.__name__
+        for group_id in itertools.product(*[range(n) for n in self.num_groups]):
+            kernel(WorkGroup(self, group_id, self.trace), *args)
+        return self.trace
+
+
+# -------------------------------------------------------
+# Kernels
+# -------------------------------------------------------
+
+def jacobi_step_local(wg, u, tmp, f, pitch, N, factor):
+    """jacobi_step_{double,float}_local of exercise_6/jacobi/jacobi.cl."""
+    tile = wg.local("tile", pitch * (wg.local_size[0] + 2), u.flat.dtype)
+    i, j = wg.global_id(0), wg.global_id(1)
+    wg.exit((i >= N) | (j >= N))
+    li, lj = wg.local_id(0) + 1, wg.local_id(1) + 1
+    idx = i * N + j
+    local_idx = li * pitch + lj
+
+    wg.store(tile, local_idx, wg.load(u, idx))
+    l0, l1 = wg.local_id(0), wg.local_id(1)
+    top, bottom = (l0 == 0) & (i > 0), (l0 == wg.local_size[0] - 1) & (i < N - 1)
+    left, right = (l1 == 0) & (j > 0), (l1 == wg.local_size[1] - 1) & (j < N - 1)
+    wg.store(tile, local_idx - pitch, wg.load(u, idx - N, top), top)
+    wg.store(tile, local_idx + pitch, wg.load(u, idx + N, bottom), bottom)
+    wg.store(tile, local_idx - 1, wg.load(u, idx - 1, left), left)
+    wg.store(tile, local_idx + 1, wg.load(u, idx + 1, right), right)
+    wg.barrier()
+
+    wg.exit((i == 0) | (i == N - 1) | (j == 0) | (j == N - 1))
+    value = u.flat.dtype.type(0.25) * (wg.load(tile, local_idx - pitch) + wg.load(tile, local_idx + pitch)
+                                       + wg.load(tile, local_idx - 1) + wg.load(tile, local_idx + 1)
+                                       - factor * wg.load(f, idx))
+    wg.store(tmp, idx, value)
+
+
+def jacobi_step_local_norm(wg, u, tmp, f, pitch, N, factor, partial):
+    """jacobi_step_{double,float}_local_norm: the step plus the squared update per work-group."""
+    dtype = u.flat.dtype
+    tile = wg.local("tile", pitch * (wg.local_size[0] + 2), dtype)
+    sums = wg.local("sums", wg.size(), dtype)
+    i, j = wg.global_id(0), wg.global_id(1)
+    l0, l1 = wg.local_id(0), wg.local_id(1)
+    li, lj = l0 + 1, l1 + 1
+    idx = i * N + j
+    local_idx = li * pitch + lj
+    lid = l0 * wg.local_size[1] + l1
+    inside = (i < N) & (j < N)
+
+    wg.store(tile, local_idx, wg.load(u, idx, inside), inside)
+    top, bottom = inside & (l0 == 0) & (i > 0), inside & (l0 == wg.local_size[0] - 1) & (i < N - 1)
+    left, right = inside & (l1 == 0) & (j > 0), inside & (l1 == wg.local_size[1] - 1) & (j < N - 1)
+    wg.store(tile, local_idx - pitch, wg.load(u, idx - N, top), top)
+    wg.store(tile, local_idx + pitch, wg.load(u, idx + N, bottom), bottom)
+    wg.store(tile, local_idx - 1, wg.load(u, idx - 1, left), left)
+    wg.store(tile, local_idx + 1, wg.load(u, idx + 1, right), right)
+    wg.barrier()
+
+    interior = inside & (i > 0) & (i < N - 1) & (j > 0) & (j < N - 1)
+    value = dtype.type(0.25) * (wg.load(tile, local_idx - pitch, interior)
+                                + wg.load(tile, local_idx + pitch, interior)
+                                + wg.load(tile, local_idx - 1, interior)
+                                + wg.load(tile, local_idx + 1, interior)
+                                - factor * wg.load(f, idx, interior))
+    wg.store(tmp, idx, value, interior)
+    d = np.where(interior, value - wg.load(tile, local_idx, interior), dtype.type(0))
+    wg.store(sums, lid, d * d)
+    wg.barrier()
+
+    s = wg.size() // 2
+    while s > 0:
+        lower = lid < s
+        wg.store(sums, lid, wg.load(sums, lid, lower) + wg.load(sums, lid + s, lower), lower)
+        wg.barrier()
+        s >>= 1
+    first = lid == 0
+    group = wg.group_id[0] * wg.ndrange.num_groups[1] + wg.group_id[1]
+    wg.store(partial, group, wg.load(sums, 0, first), first)
+
+
+def hillis_steele_scan(wg, g_odata, g_idata, n, block_sums):
+    """hillis_steele_scan of exercise_8/scan.cl (without OPT)."""
+    size = wg.local_size[0]
+    temp = wg.local("temp", 2 * size, g_idata.flat.dtype)
+    global_id, local_id = wg.global_id(0), wg.local_id(0)
+    pout, pin = 0, 1
+    inside = global_id < n
+    wg.store(temp, local_id, wg.load(g_idata, global_id, inside))
+    wg.barrier()
+    offset = 1
+    while offset < size:
+        pout = 1 - pout
+        pin = 1 - pout
+        shifted = local_id >= offset
+        value = wg.load(temp, pin * size + local_id)
+        value = value + wg.load(temp, pin * size + local_id - offset, shifted)
+        wg.store(temp, pout * size + local_id, value)
+        wg.barrier()
+        offset <<= 1
+    wg.store(g_odata, global_id, wg.load(temp, pout * size + local_id, inside), inside)
+    last = local_id == size - 1
+    wg.store(block_sums, wg.group_id[0], wg.load(temp, pout * size + local_id, last), last)
+
+
+def add_block_sums(wg, g_data, block_sums, n):
+    """add_block_sums of exercise_8/scan.cl (without OPT); block_sums scanned by the host."""
+    global_id, group_id = wg.global_id(0), wg.group_id[0]
+    update = (global_id < n) & (group_id > 0)
+    wg.store(g_data, global_id, wg.load(g_data, global_id, update)
+             + wg.load(block_sums, group_id - 1, update), update)
+
+
+def reduce_stats(wg, image, stats, width, height, components):
+    """reduce_stats of exercise_7/auto_levels.cl: per work-group min, max and sum per channel."""
+    total_pixels = width * height
+    gid, lid = wg.global_id(0), wg.local_id(0)
+    local_min = wg.local("local_min", 4, np.uint32)
+    local_max = wg.local("local_max", 4, np.uint32)
+    local_sum = wg.local("local_sum", 4, np.uint32)
+    first = lid == 0
+    for c in range(components):
+        wg.store(local_min, c, 255, first)
+        wg.store(local_max, c, 0, first)
+        wg.store(local_sum, c, 0, first)
+    wg.barrier()
+
+    per_item = -(-total_pixels // wg.global_size[0])
+    start = gid * per_item
+    end = np.minimum(start + per_item, total_pixels)
+    for k in range(per_item):
+        pixel = start + k
+        busy = pixel < end
+        for c in range(components):
+            value = wg.load(image, pixel * components + c, busy).astype(np.uint32)
+            wg.atomic("min", local_min, c, value, busy)
+            wg.atomic("max", local_max, c, value, busy)
+            wg.atomic("add", local_sum, c, value, busy)
+    wg.barrier()
+
+    for c in range(components):
+        base = (wg.group_id[0] * components + c) * 3
+        wg.store(stats, base, wg.load(local_min, c, first), first)
+        wg.store(stats, base + 1, wg.load(local_max, c, first), first)
+        wg.store(stats, base + 2, wg.load(local_sum, c, first), first)
+
+
+def histogram(wg, ages, C, N):
+    """histogram of exercise_9/histogram.cl."""
+    gid = wg.global_id(0)
+    inside = gid < N
+    wg.atomic("add", C, wg.load(ages, gid, inside), 1, inside)
+
+
+def matrix_mul_tiled(wg, A, B, C, M, K):
+    """matrix_mul_tiled_{double,float} of exercise_10/optimized/matrix_mul.cl; TILE_SIZE = local size."""
+    TSX, TSY = wg.local_size
+    dtype = A.flat.dtype
+    Asub = wg.local("Asub", (TSX, TSY), dtype)
+    Bsub = wg.local("Bsub", (TSX, TSY), dtype)
+    row, col = wg.global_id(0), wg.global_id(1)
+    l0, l1 = wg.local_id(0), wg.local_id(1)
+    total = np.zeros(wg.local_size, dtype)
+    for t in range((M + TSX - 1) // TSX):
+        tiled_col_a = t * TSX + l1
+        tiled_row_b = t * TSX + l0
+        in_a = (row < M) & (tiled_col_a < M)
+        in_b = (tiled_row_b < M) & (col < K)
+        wg.store(Asub, Asub.index(l0, l1), wg.load(A, row * M + tiled_col_a, in_a))
+        wg.store(Bsub, Bsub.index(l0, l1), wg.load(B, tiled_row_b * K + col, in_b))
+        wg.barrier()
+        for k in range(TSY):
+            total += wg.load(Asub, Asub.index(l0, k)) * wg.load(Bsub, Bsub.index(k, l1))
+        wg.barrier()
+    inside = (row < M) & (col < K)
+    wg.store(C, row * K + col, total, inside)
+
+
+# -------------------------------------------------------
+# Checks: host code of the drivers, NumPy reference
+# -------------------------------------------------------
+
+def check_jacobi(N, local, precision="float", norm=False, simd=32):
+    """(max error, trace) of one emulated Jacobi step (global N x N as jacobi_ocl.c)."""
+    dtype = np.float32 if precision == "float" else np.float64
+    rng = np.random.default_rng(0)
+    u, f = rng.random((N, N)).astype(dtype), rng.random((N, N)).astype(dtype)
+    tmp = np.zeros_like(u)
+    factor = dtype(1.0 / (N + 1) ** 2)
+    pitch = local[1] + 2
+    ndrange = NDRange((N, N), local, simd)
+    if norm:
+        partial = np.zeros(int(np.prod(ndrange.num_groups)), dtype)
+        trace = ndrange.run(jacobi_step_local_norm, u, tmp, f, pitch, N, factor, partial)
+    else:
+        trace = ndrange.run(jacobi_step_local, u, tmp, f, pitch, N, factor)
+    expected = np.zeros_like(u)
+    expected[1:-1, 1:-1] = dtype(0.25) * (u[:-2, 1:-1] + u[2:, 1:-1] + u[1:-1, :-2] + u[1:-1, 2:]
+                                          - factor * f[1:-1, 1:-1])
+    error = float(np.abs(tmp.astype(np.float64) - expected).max())
+    if norm:
+        d = (expected - u)[1:-1, 1:-1].astype(np.float64)
+        error = max(error, abs(float(partial.astype(np.float64).sum()) - float((d * d).sum()))
+                    / max(float((d * d).sum()), 1e-300))
+    return error, trace
+
+
+def check_scan(N, local=256, vtype="int", simd=32):
+    """(max error, trace) of the emulated two-kernel scan of scan.c (block sums scanned on the host)."""
+    dtype = np.int32 if vtype == "int" else np.float32
+    rng = np.random.default_rng(0)
+    data = rng.integers(0, 10, N).astype(dtype) if vtype == "int" else \
+        (rng.integers(0, 100, N).astype(dtype) / dtype(10)).astype(dtype)
+    global_size = -(-N // local) * local
+    out = np.zeros(N, dtype)
+    sums = np.zeros(global_size // local, dtype)
+    ndrange = NDRange(global_size, local, simd)
+    ndrange.run(hillis_steele_scan, out, data, N, sums)
+    scanned = np.cumsum(sums, dtype=dtype)
+    trace = ndrange.run(add_block_sums, out, scanned, N)
+    with np.errstate(over="ignore"):
+        expected = np.cumsum(data, dtype=dtype)
+    return float(np.abs(out.astype(np.float64) - expected).max()), trace
+
+
+def check_reduce_stats(width, height, components=3, local=256, simd=32):
+    """(mismatches, trace) of the emulated reduce_stats against the image's min, max and sum."""
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (height, width, components)).astype(np.uint8)
+    global_size = -(-width * height // local) * local
+    groups = global_size // local
+    stats = np.zeros(groups * components * 3, np.uint64)
+    trace = NDRange(global_size, local, simd).run(reduce_stats, image, stats, width, height, components)
+    stats = stats.reshape(groups, components, 3)
+    pixels = image.reshape(-1, components)
+    bad = 0
+    for c in range(components):
+        bad += int(stats[:, c, 0].min()) != int(pixels[:, c].min())
+        bad += int(stats[:, c, 1].max()) != int(pixels[:, c].max())
+        bad += int(stats[:, c, 2].sum()) != int(pixels[:, c].sum(dtype=np.uint64))
+    return bad, trace
+
+
+def check_histogram(N, local=256, simd=32):
+    """(mismatches, trace) of the emulated histogram against np.bincount."""
+    ages = np.random.default_rng(0).integers(0, 121, N).astype(np.int32)
+    counts = np.zeros(121, np.int32)
+    trace = NDRange(-(-N // local) * local, local, simd).run(histogram, ages, counts, N)
+    return int(np.count_nonzero(counts != np.bincount(ages, minlength=121))), trace
+
+
+def check_matmul(N, tile=16, precision="float", simd=32):
+    """(error / bound, trace) of the emulated tiled matmul (global rounded up as matrix_mul.c)."""
+    from gpubench.matmul import DTYPES, validate
+
+    dtype = DTYPES[precision]
+    rng = np.random.default_rng(0)
+    A, B = rng.standard_normal((N, N)).astype(dtype), rng.standard_normal((N, N)).astype(dtype)
+    C = np.zeros((N, N), dtype)
+    size = -(-N // tile) * tile
+    trace = NDRange((size, size), (tile, tile), simd).run(matrix_mul_tiled, A, B, C, N, N)
+    r = validate(A, B, C, precision)
+    return (r["max_ratio"] if r["ok"] else np.inf), trace
+
+
+# -------------------------------------------------------
+# Command line
+# -------------------------------------------------------
+
+CHECKS = ["jacobi", "jacobi_norm", "scan", "reduce_stats", "histogram", "matmul"]
+
+
+def _configs(name, args):
+    """(label, thunk, tolerance) of every configuration of a check."""
+    precisions = args.precision
+    if name in ("jacobi", "jacobi_norm"):
+        if args.all_shapes:
+            from gpubench.autotune import workgroup_shapes
+            shapes = [(s["D1"], s["D2"]) for s in workgroup_shapes()
+                      if args.N % s["D1"] == 0 and args.N % s["D2"] == 0]
+        else:
+            shapes = [tuple(args.local or (8, 32))]
+        for (d1, d2), precision in itertools.product(shapes, precisions):
+            tol = 1e-5 if precision == "float" else 1e-12
+            yield (f"{name} {precision} N={args.N} local={d1}x{d2}",
+                   lambda d1=d1, d2=d2, p=precision: check_jacobi(args.N, (d1, d2), p,
+                                                                  name == "jacobi_norm", args.simd),
+                   tol)
+    elif name == "scan":
+        local = (args.local or [256])[0]
+        for vtype in ("int", "float"):
+            yield (f"scan {vtype} N={args.N} local={local}",
+                   lambda v=vtype: check_scan(args.N, local, v, args.simd),
+                   0 if vtype == "int" else 1e-3 * args.N)
+    elif name == "reduce_stats":
+        local = (args.local or [256])[0]
+        yield (f"reduce_stats {args.N}x{args.N}x3 local={local}",
+               lambda: check_reduce_stats(args.N, args.N, 3, local, args.simd), 0)
+    elif name == "histogram":
+        local = (args.local or [256])[0]
+        yield (f"histogram N={args.N} local={local}",
+               lambda: check_histogram(args.N, local, args.simd), 0)
+    elif name == "matmul":
+        tile = (args.local or [16])[0]
+        for precision in precisions:
+            yield (f"matmul {precision} N={args.N} tile={tile}",
+                   lambda p=precision: check_matmul(args.N, tile, p, args.simd), 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CPU emulation of the OpenCL NDRange kernels")
+    parser.add_argument("checks", nargs="+", choices=CHECKS)
+    parser.add_argument("--N", type=int, default=64)
+    parser.add_argument("--local", type=int, nargs="+",
+                        help="local size (jacobi: D1 D2; matmul: tile edge; else: work-group size)")
+    parser.add_argument("--all-shapes", action="store_true",
+                        help="jacobi: every LOCAL_WORKGROUP_DIM shape of the autotuner dividing N")
+    parser.add_argument("--precision", nargs="+", choices=["float", "double"], default=["float"])
+    parser.add_argument("--simd", type=int, default=32, help="work-items per SIMD group (AMD: 64)")
+    parser.add_argument("-o", "--output", help="write the accesses of every run to this CSV")
+    args = parser.parse_args(argv)
+
+    frames, failed = [], 0
+    for name in args.checks:
+        for label, thunk, tol in _configs(name, args):
+            try:
+                error, trace = thunk()
+            except ValueError as e:
+                print(f"  [FAILED] {label}: {e}")
+                failed += 1
+                continue
+            accesses = trace.frame()
+            ok = error <= tol and not trace.issues
+            failed += not ok
+            glob = accesses[accesses["space"] == "global"]
+            efficiency = glob["bytes"].sum() / max(1, glob["transactions"].sum() * SEGMENT)
+            print(f"  [{'ok' if ok else 'FAILED':>6}] {label}: error {error:.2e}, "
+                  f"{accesses['group'].nunique()} work-group(s), {accesses['phase'].max() + 1} phase(s), "
+                  f"global {glob['bytes'].sum() / 1e6:.2f} MB in {glob['transactions'].sum()} "
+                  f"transactions (requested bytes {efficiency:.0%} of the bytes moved)")
+            for issue in trace.issues[:5]:
+                print(f"           {issue['kernel']} group {issue['group']} phase {issue['phase']}: "
+                      f"{issue['kind']}{' of ' + issue['buffer'] if issue['buffer'] else ''}: "
+                      f"{issue['detail']}")
+            if len(trace.issues) > 5:
+                print(f"           ... {len(trace.issues) - 5} more issue(s)")
+            frames.append(accesses.assign(check=label))
+
+    if args.output and frames:
+        pd.concat(frames, ignore_index=True).to_csv(args.output, index=False)
+        print(f"[DONE] {args.output}")
+    if failed:
+        print(f"[ERROR] {failed} check(s) failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Raw-sample overlays for boxplots.
+
+jitter_points() draws every sample of a panel with a single scatter
+(one PathCollection) instead of one Line2D per measurement, so drawing
+time and file size stay flat when the number of runs per configuration
+grows. Large panels are thinned automatically:
+
+  total <= max_points        all samples, jittered
+  total <= 10 * max_points   deterministic subsample per box (min/max kept)
+  otherwise                  density strips: one LineCollection with a
+                             horizontal tick per histogram bin, length
+                             proportional to the bin count
+
+Like the Line2D-per-sample overlay it replaces, samples take the colours of
+the axes colour cycle in turn (density strips one colour per box); pass
+color= for a single colour instead.
+"""
+
+import numpy as np
+
+MAX_POINTS = 2000
+
+
+def jitter_points(ax, ys_list, positions, jitter=0.06, alpha=0.35, markersize=3,
+                  max_points=MAX_POINTS, mode="auto", color=None, seed=42):
+    """
+    Overlay the samples in ys_list (one sequence per box) at the given x
+    positions. mode is "auto", "points", "subsample" or "density"; color
+    None cycles through the axes colour cycle.
+    Returns the artist that was added (or None if there was nothing to draw).
+    """
+    groups = [np.asarray(vals, dtype=float).ravel() for vals in ys_list]
+    total = sum(g.size for g in groups)
+    if total == 0:
+        return None
+
+    if mode == "auto":
+        if total <= max_points:
+            mode = "points"
+        elif total <= 10 * max_points:
+            mode = "subsample"
+        else:
+            mode = "density"
+
+    rng = np.random.default_rng(seed)
+
+    if mode == "density":
+        return _density_strips(ax, groups, positions, jitter, alpha, color)
+
+    if mode == "subsample":
+        per_group = max(2, max_points // len(groups))
+        groups = [_subsample(g, per_group, rng) for g in groups]
+    elif mode != "points":
+        raise ValueError(f"unknown jitter mode: {mode!r}")
+
+    ys = np.concatenate(groups)
+    xs = np.repeat(np.asarray(positions, dtype=float), [g.size for g in groups])
+    xs += rng.uniform(-jitter, jitter, size=xs.size)
+    colors = _cycle_colors(xs.size) if color is None else color
+    return ax.scatter(xs, ys, s=markersize ** 2, c=colors, alpha=alpha,
+                      linewidths=0, zorder=3)
+
+
+def _cycle_colors(n):
+    """The first n colours of the axes colour cycle, repeated as needed."""
+    import matplotlib
+
+    cycle = matplotlib.rcParams["axes.prop_cycle"].by_key().get("color") or ["C0"]
+    return [cycle[i % len(cycle)] for i in range(n)]
+
+
+def _subsample(vals, n, rng):
+    """n samples of vals without replacement; the extremes are always kept."""
+    if vals.size <= n:
+        return vals
+    order = np.argsort(vals, kind="stable")
+    inner = rng.choice(order[1:-1], size=n - 2, replace=False)
+    return vals[np.sort(np.concatenate(([order[0]], inner, [order[-1]])))]
+
+
+def _density_strips(ax, groups, positions, half_width, alpha, color, bins=40):
+    from matplotlib.collections import LineCollection
+
+    segments, colors = [], []
+    cycle = _cycle_colors(len(groups)) if color is None else [color] * len(groups)
+    for vals, pos, group_color in zip(groups, positions, cycle):
+        vals = vals[np.isfinite(vals)]
+        if vals.size == 0:
+            continue
+        lo, hi = vals.min(), vals.max()
+        if lo > 0 and hi / lo > 100:
+            edges = np.geomspace(lo, hi, bins + 1)
+            centers = np.sqrt(edges[:-1] * edges[1:])
+        else:
+            edges = np.linspace(lo, hi if hi > lo else lo + 1, bins + 1)
+            centers = 0.5 * (edges[:-1] + edges[1:])
+        counts, _ = np.histogram(vals, bins=edges)
+        keep = counts > 0
+        w = half_width * counts[keep] / counts.max()
+        y = centers[keep]
+        segments.append(np.stack([np.stack([pos - w, y], axis=1),
+                                  np.stack([pos + w, y], axis=1)], axis=1))
+        colors += [group_color] * len(y)
+    if not segments:
+        return None
+    lc = LineCollection(np.concatenate(segments), colors=colors, alpha=alpha,
+                        linewidths=1.0, zorder=3)
+    ax.add_collection(lc)
+    return lc
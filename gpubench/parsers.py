@@ -0,0 +1,285 @@
+"""
+Incremental stdout parsers for the benchmark binaries.
+
+The hosts print their results in three dialects:
+
+  jacobi, matrix_mul   one ready-made CSV row per run
+                       (opencl_V3,double,2048,100,8,32,123.456); exercise_2's
+                       rows end in a checksum, checked against gpubench.jacobi
+  scan, scan_opt       "Sequential Time: X ms" / "OpenCL Time: X ms", followed
+                       by the program's own check against the sequential scan
+                       ("PASSED: ..." or "Mismatch at index ..." / "FAILED: ...")
+  auto_levels(_cl)     serial,<ms> and opencl,<ms>,<time_ia>,<time_ib>
+
+A Target names its dialect (Target("scan_N{N}", parse="scan")); PARSERS maps
+the name to a factory that builds one Parser per run. gpubench.sweep feeds
+the parser every stdout line as the binary prints it:
+
+    parser = PARSERS["scan"](job)
+    for line in stdout:
+        rows += parser.feed(line)   # may raise ParseError / ValidationFailed
+    rows += parser.close()          # raises if something never showed up
+
+Every value is checked against a schema while it streams in: durations are
+finite and non-negative, checksums finite, integer columns integers, and
+columns that are also axes of the sweep (N, IT, precision, workgroup shape)
+must equal the point the binary was built for. A line that fails, output
+that is not text, or a failed self-check raises at once, so the sweep kills
+the run instead of waiting for it to exit. Rows keep the text exactly as
+printed; the CSV does not change.
+
+New dialects are added with @register("name").
+"""
+
+import math
+import re
+
+
+class ParseError(Exception):
+    """stdout does not look like the dialect (garbage, missing or bad values)."""
+
+
+class ValidationFailed(ParseError):
+    """The result failed a check: the binary's own or one against a reference."""
+
+
+# -------------------------------------------------------
+# Schemas
+# -------------------------------------------------------
+
+def _finite(text):
+    value = float(text)
+    if not math.isfinite(value):
+        raise ValueError(f"{text} is not finite")
+    return value
+
+
+def _duration(text):
+    value = _finite(text)
+    if value < 0:
+        raise ValueError(f"negative time {text}")
+    return value
+
+
+def _choice(*allowed):
+    def check(text):
+        if text not in allowed:
+            raise ValueError(f"{text!r} is not one of {', '.join(allowed)}")
+        return text
+    return check
+
+
+# column -> func(text) raising ValueError; columns not listed are free text
+COLUMN_TYPES = {
+    "N": int,
+    "IT": int,
+    "iterations": int,
+    "LOCAL_WORKGROUP_DIM_1": int,
+    "LOCAL_WORKGROUP_DIM_2": int,
+    "precision": _choice("float", "double"),
+    "elapsed_ms": _duration,
+    "time_ms": _duration,
+    "time_ia": _duration,
+    "time_ib": _duration,
+    "gflops": _duration,
+    "checksum": _finite,
+    "residual": _duration,
+}
+
+# column -> space axis it has to agree with
+AXES = {
+    "N": "N",
+    "IT": "IT",
+    "precision": "precision",
+    "LOCAL_WORKGROUP_DIM_1": "D1",
+    "LOCAL_WORKGROUP_DIM_2": "D2",
+}
+
+
+def validate(row, point, types=COLUMN_TYPES):
+    """Check the fields of one row; raises ParseError naming the first bad one."""
+    for column, text in row.items():
+        check = types.get(column)
+        if check is None or text == "":
+            continue
+        try:
+            value = check(text)
+        except ValueError as e:
+            raise ParseError(f"bad {column} {text!r}: {e}") from None
+        axis = AXES.get(column)
+        if axis in point and value != point[axis]:
+            raise ParseError(f"{column} is {text} but the binary was built for "
+                             f"{axis}={point[axis]}")
+
+
+# -------------------------------------------------------
+# Parsers
+# -------------------------------------------------------
+
+class Parser:
+    """Base class: feed() every line, close() at the end; both return new rows."""
+
+    def __init__(self, job):
+        self.job = job
+        self.lines = 0
+
+    def feed(self, line):
+        self.lines += 1
+        if "\0" in line or "\ufffd" in line:
+            raise ParseError(f"line {self.lines} is not text")
+        return self.line(line.rstrip("\r\n"))
+
+    def line(self, text):
+        return []
+
+    def close(self):
+        return []
+
+
+class CsvRows(Parser):
+    """
+    Lines with one field per column; `optional` trailing columns may be
+    missing (left empty). Lines with another number of fields are not rows
+    (e.g. the 14-field profiling output of jacobi_ocl) and are skipped.
+    `impls` restricts the first field, so a mangled row is rejected
+    instead of taken.
+    """
+
+    def __init__(self, job, columns=None, optional=0, impls=None):
+        super().__init__(job)
+        self.columns = list(columns or job.sweep.columns)
+        self.optional = optional
+        self.impls = impls
+        self.rows = 0
+
+    def line(self, text):
+        fields = text.strip().split(",")
+        if not len(self.columns) - self.optional <= len(fields) <= len(self.columns):
+            return []
+        if self.impls is not None and fields[0] not in self.impls:
+            raise ParseError(f"line {self.lines}: unknown implementation {fields[0]!r}")
+        row = dict(zip(self.columns, fields))
+        for column in self.columns[len(fields):]:
+            row[column] = ""
+        validate(row, self.job.point)
+        self.rows += 1
+        return [row]
+
+    def close(self):
+        if not self.rows:
+            raise ParseError(f"no line with {len(self.columns)} comma-separated fields")
+        return []
+
+
+class JacobiChecksum(CsvRows):
+    """
+    CsvRows of exercise_2 whose checksum has to match the NumPy reference
+    (gpubench.jacobi, computed once per N, IT and precision and cached on
+    disk). run_sweep() calls prepare() first, so no reference is computed
+    while a run is being timed.
+    """
+
+    @staticmethod
+    def prepare(points):
+        from gpubench import jacobi
+        for key in sorted({(int(p["N"]), int(p["IT"]), p["precision"]) for p in points}):
+            jacobi.checksum(*key)
+
+    def line(self, text):
+        rows = super().line(text)
+        for row in rows:
+            from gpubench import jacobi
+            rel, exact = jacobi.compare(row["checksum"], int(row["N"]), int(row["IT"]),
+                                        row["precision"])
+            if not exact and rel > jacobi.TOLERANCE[row["precision"]]:
+                raise ValidationFailed(f"checksum {row['checksum']} is {rel:.1e} off the reference")
+        return rows
+
+
+class Timings(Parser):
+    """
+    One {"impl", "elapsed_ms"} row per (impl, regex) whose first group is the
+    time. Lines matching a `failure` regex raise ValidationFailed; with
+    `passed` set, close() insists on a line matching it.
+    """
+
+    def __init__(self, job, patterns, failure=(), passed=None):
+        super().__init__(job)
+        self.patterns = {impl: re.compile(p) for impl, p in patterns.items()}
+        self.failure = [re.compile(p) for p in failure]
+        self.passed = re.compile(passed) if passed else None
+        self.seen = set()
+        self.ok = False
+
+    def line(self, text):
+        for pattern in self.failure:
+            if pattern.search(text):
+                raise ValidationFailed(text.strip())
+        if self.passed is not None and self.passed.search(text):
+            self.ok = True
+        for impl, pattern in self.patterns.items():
+            m = pattern.search(text)
+            if m is None or impl in self.seen:
+                continue
+            row = {"impl": impl, "elapsed_ms": m.group(1)}
+            validate(row, self.job.point)
+            self.seen.add(impl)
+            return [row]
+        return []
+
+    def close(self):
+        missing = [impl for impl in self.patterns if impl not in self.seen]
+        if missing:
+            raise ParseError(f"no match for {', '.join(map(repr, missing))}")
+        if self.passed is not None and not self.ok:
+            raise ParseError(f"no validation result ({self.passed.pattern})")
+        return []
+
+
+# -------------------------------------------------------
+# Registry
+# -------------------------------------------------------
+
+PARSERS = {}
+
+
+def register(name):
+    """Decorator adding a factory func(job) -> Parser under `name`."""
+    def add(factory):
+        PARSERS[name] = factory
+        return factory
+    return add
+
+
+def get(name):
+    if name not in PARSERS:
+        raise KeyError(f"unknown parser {name!r} (known: {', '.join(PARSERS)})")
+    return PARSERS[name]
+
+
+register("csv")(CsvRows)
+register("jacobi")(JacobiChecksum)
+
+_SCAN_CHECK = {
+    "failure": [r"^FAILED:", r"^Mismatch at index"],
+    "passed": r"^PASSED:",
+}
+
+
+@register("scan")
+def scan(job):
+    return Timings(job, {
+        "sequential": r"Sequential Time: ([^ ]+) ms",
+        "opencl": r"OpenCL Time: ([^ ]+) ms",
+    }, **_SCAN_CHECK)
+
+
+@register("scan_opt")
+def scan_opt(job):
+    return Timings(job, {"opencl_optimized": r"OpenCL Time: ([^ ]+) ms"}, **_SCAN_CHECK)
+
+
+@register("auto_levels")
+def auto_levels(job):
+    return CsvRows(job, ["impl", "elapsed_ms", "time_ia", "time_ib"], optional=2,
+                   impls=("serial", "opencl"))
@@ -0,0 +1,190 @@
+"""
+Common bootstrap for the plot_results.py scripts.
+
+Importing this module is cheap: matplotlib, seaborn and scipy are only
+imported when a script actually draws something. pyplot() always selects the
+non-interactive Agg backend, so the scripts behave the same on a laptop, over
+ssh and inside the SLURM sweep loops.
+
+Typical script layout:
+
+    args = plotting.parse_args("Plot Jacobi results")
+    ... load and aggregate the CSVs with pandas ...
+    plotting.exit_if_check(args, df_mean=df_mean)   # --check stops here
+    plt = plotting.pyplot()
+    ... draw ...
+"""
+
+import argparse
+import importlib
+
+BACKEND = "Agg"
+
+_pyplot = None
+_deferred_theme = []
+_theme_history = []
+
+
+class LazyModule:
+    """Module proxy that imports `name` on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+seaborn = LazyModule("seaborn")
+scipy_stats = LazyModule("scipy.stats")
+
+
+# -------------------------------------------------------
+# Command line
+# -------------------------------------------------------
+
+def make_parser(description=None):
+    """Argument parser with the options every plot script understands."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="only load and aggregate the result files, never import matplotlib",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="re-render every figure, even if its data, style and code are unchanged",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes used to render figures",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PREFIX",
+        help="record timing/memory spans to PREFIX.jsonl and PREFIX.trace.json",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="with --trace, also track peak Python allocations per span (slow)",
+    )
+    return parser
+
+
+def parse_args(description=None, argv=None):
+    args = make_parser(description).parse_args(argv)
+    if args.trace:
+        from gpubench import trace
+
+        trace.enable(args.trace, memory=args.trace_memory)
+    return args
+
+
+def exit_if_check(args, **tables):
+    """
+    In --check mode print a short summary of the given tables and exit.
+    Otherwise return immediately so the script can continue plotting.
+    """
+    if not args.check:
+        return
+    for name, table in tables.items():
+        print(f"[CHECK] {name}: {_describe(table)}")
+    print("[CHECK] data OK, no plots written")
+    raise SystemExit(0)
+
+
+def _describe(table):
+    shape = getattr(table, "shape", None)
+    if shape is not None and len(shape) == 2:
+        return f"{shape[0]} rows x {shape[1]} columns"
+    try:
+        return f"{len(table)} entries"
+    except TypeError:
+        return repr(table)
+
+
+# -------------------------------------------------------
+# matplotlib / seaborn
+# -------------------------------------------------------
+
+def pyplot():
+    """Import matplotlib.pyplot on the Agg backend and apply any pending theme."""
+    global _pyplot
+    if _pyplot is None:
+        from gpubench import trace
+
+        with trace.span("import matplotlib", cat="import"):
+            import matplotlib
+
+            matplotlib.use(BACKEND, force=True)
+            import matplotlib.pyplot as plt
+
+            _pyplot = plt
+            for func, kwargs in _deferred_theme:
+                getattr(seaborn, func)(**kwargs)
+            _deferred_theme.clear()
+    return _pyplot
+
+
+def _theme_call(func, kwargs):
+    _theme_history.append((func, kwargs))
+    if _pyplot is None:
+        _deferred_theme.append((func, kwargs))
+    else:
+        getattr(seaborn, func)(**kwargs)
+
+
+def set_theme(**kwargs):
+    """sns.set_theme(), deferred until pyplot() is first requested."""
+    _theme_call("set_theme", kwargs)
+
+
+def set_style(style, **kwargs):
+    """sns.set_style(), deferred until pyplot() is first requested."""
+    _theme_call("set_style", dict(style=style, **kwargs))
+
+
+def color_palette(name="tab10", n_colors=None):
+    """
+    Colors of a qualitative matplotlib colormap, cycled to n_colors.
+    Same result as sns.color_palette() for the tab* maps, without seaborn.
+    """
+    import matplotlib
+
+    colors = matplotlib.colormaps[name].colors
+    if n_colors is None:
+        n_colors = len(colors)
+    return [tuple(colors[i % len(colors)]) for i in range(n_colors)]
+
+
+# -------------------------------------------------------
+# Incremental rendering
+# -------------------------------------------------------
+
+def figure_build(args, out_dir, **style):
+    """
+    FigureBuild for `out_dir` honouring --force. The backend and all theme
+    calls made so far count as style, so changing the theme re-renders.
+    """
+    from gpubench.manifest import FigureBuild
+
+    style = {"backend": BACKEND, "theme": list(_theme_history), **style}
+    return FigureBuild(out_dir, style=style, force=args.force)
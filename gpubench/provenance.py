@@ -0,0 +1,296 @@
+"""
+Environment fingerprints for benchmark results.
+
+Laptops and ifi nodes differ in far more than their host name: OpenCL
+driver, CPU governor, compiler, flags, the revision of the code. capture()
+collects once per session what can change a measurement:
+
+  host, OS/kernel, CPU model and count, memory, cpufreq governor
+  compiler (`$(CC) --version`) and CC/CFLAGS/LDFLAGS/LIBS of the Makefile
+  git commit, plus a hash of uncommitted changes to sources (.c .h .cl .py Makefile)
+  OpenCL platforms and devices with driver versions (openCL_hello_world/info.c)
+  GPU name and driver from nvidia-smi / rocm-smi when present
+
+The stable part is hashed into a 12-character id. Sweeps append each new id
+once to environments.jsonl next to their results (with SLURM job and date
+of first sighting) and write it into the `env` column of every row, so two
+sets of results can be compared field by field:
+
+    python -m gpubench.provenance                          # this machine
+    python -m gpubench.provenance exercise_6/jacobi/results  # known environments
+    python -m gpubench.provenance exercise_6/jacobi/results --diff 3fa1c0 9be77d
+
+The OpenCL query compiles info.c into .gpubench_cache/provenance/ the
+first time; without OpenCL headers or a platform the field says why.
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import platform
+import re
+import shutil
+import socket
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(REPO_ROOT, ".gpubench_cache", "provenance")
+INFO_DIR = os.path.join(REPO_ROOT, "openCL_hello_world")
+FILENAME = "environments.jsonl"
+
+SOURCE_PATTERNS = ["*.c", "*.h", "*.cl", "*.py", "*Makefile"]
+
+
+# -------------------------------------------------------
+# Probes
+# -------------------------------------------------------
+
+def _run(cmd, cwd=None, timeout=30):
+    """stdout of cmd, or None if it is missing or fails."""
+    if shutil.which(cmd[0]) is None:
+        return None
+    try:
+        proc = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return proc.stdout if proc.returncode == 0 else None
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cpu():
+    info = {"model": platform.processor() or platform.machine(), "count": os.cpu_count()}
+    text = _read("/proc/cpuinfo") or ""
+    m = re.search(r"^model name\s*:\s*(.+)$", text, re.M)
+    if m:
+        info["model"] = m.group(1).strip()
+    info["governor"] = _read("/sys/devices/system/cpu/cpu0/cpufreq/scaling_governor")
+    mem = re.search(r"^MemTotal:\s*(\d+) kB", _read("/proc/meminfo") or "", re.M)
+    info["memory_gb"] = round(int(mem.group(1)) / 2**20, 1) if mem else None
+    return info
+
+
+def toolchain(directory=None):
+    """Compiler version and the Makefile variables that end up on its command line."""
+    make = {}
+    if directory and os.path.exists(os.path.join(directory, "Makefile")):
+        from gpubench.build import makefile_vars
+        make = makefile_vars(os.path.join(directory, "Makefile"))
+    cc = make.get("CC") or "gcc"
+    version = _run([cc, "--version"])
+    return {
+        "cc": cc,
+        "version": version.splitlines()[0] if version else None,
+        "flags": {k: make[k] for k in ("CFLAGS", "LDFLAGS", "LIBS") if k in make},
+    }
+
+
+def git():
+    commit = _run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT)
+    if commit is None:
+        return None
+    diff = _run(["git", "diff", "HEAD", "--", *SOURCE_PATTERNS], cwd=REPO_ROOT) or ""
+    return {
+        "commit": commit.strip(),
+        "diff": hashlib.sha256(diff.encode()).hexdigest()[:12] if diff else None,
+    }
+
+
+def parse_info(text):
+    """Platforms (with their devices) from the output of openCL_hello_world/info."""
+    platforms = []
+    current = None
+    for line in text.splitlines():
+        if re.match(r"^Platform \d+:", line):
+            current = {"devices": []}
+            platforms.append(current)
+        elif re.match(r"^  Device \d+:", line) and current is not None:
+            current["devices"].append({})
+        else:
+            m = re.match(r"^( +)([A-Z_]+) = (.*)$", line)
+            if not m or current is None or m.group(2) == "EXTENSIONS":
+                continue
+            target = current["devices"][-1] if len(m.group(1)) > 2 and current["devices"] else current
+            target[m.group(2)] = m.group(3).strip()
+    return platforms
+
+
+def opencl():
+    """OpenCL platforms and devices, or {"error": ...} if they cannot be queried."""
+    source = os.path.join(INFO_DIR, "info.c")
+    with open(source, "rb") as f:
+        key = hashlib.sha256(f.read()).hexdigest()[:16]
+    binary = os.path.join(CACHE_DIR, f"info-{key}")
+    if not os.path.exists(binary):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{binary}.{os.getpid()}.tmp"
+        try:
+            proc = subprocess.run(
+                ["gcc", "-std=c17", "-DCL_TARGET_OPENCL_VERSION=300", "-I", INFO_DIR,
+                 "-o", tmp, source, "-lOpenCL"],
+                capture_output=True, text=True, timeout=120)
+        except (OSError, subprocess.SubprocessError) as e:
+            return {"error": f"build failed: {e}"}
+        if proc.returncode != 0:
+            return {"error": "build failed (OpenCL headers or library missing)"}
+        os.replace(tmp, binary)
+    out = _run([binary])
+    if out is None:
+        return {"error": "no usable OpenCL platform"}
+    return {"platforms": parse_info(out)}
+
+
+def gpus():
+    out = _run(["nvidia-smi", "--query-gpu=name,driver_version", "--format=csv,noheader"])
+    if out:
+        return [dict(zip(("name", "driver"), (f.strip() for f in line.split(","))))
+                for line in out.splitlines() if line.strip()]
+    out = _run(["rocm-smi", "--showproductname", "--showdriverversion", "--json"])
+    if out:
+        try:
+            return [{"rocm": v} for v in json.loads(out).values()]
+        except ValueError:
+            pass
+    return None
+
+
+# -------------------------------------------------------
+# Fingerprints
+# -------------------------------------------------------
+
+def env_id(env):
+    """12-character hash of the stable fields."""
+    text = json.dumps(env, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()[:12]
+
+
+def capture(directory=None):
+    """The stable environment of this machine, for binaries built in `directory`."""
+    return {
+        "host": socket.gethostname(),
+        "os": platform.platform(),
+        "python": platform.python_version(),
+        "cpu": cpu(),
+        "toolchain": toolchain(directory),
+        "git": git(),
+        "opencl": opencl(),
+        "gpus": gpus(),
+    }
+
+
+def volatile():
+    """Fields that differ per job but are not part of the fingerprint."""
+    slurm = {k[6:].lower(): v for k, v in os.environ.items()
+             if k in ("SLURM_JOB_ID", "SLURM_JOB_PARTITION", "SLURM_JOB_NODELIST",
+                      "SLURM_ARRAY_TASK_ID")}
+    return {"seen": datetime.datetime.now().isoformat(timespec="seconds"),
+            "slurm": slurm or None}
+
+
+_session = {}
+
+
+def session(directory=None):
+    """(id, env) captured once per process and directory."""
+    if directory not in _session:
+        env = capture(directory)
+        _session[directory] = (env_id(env), env)
+    return _session[directory]
+
+
+def load(results_dir):
+    """{id: record} of the environments.jsonl in results_dir (first sighting wins)."""
+    path = os.path.join(results_dir, FILENAME)
+    records = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                records.setdefault(record["env"], record)
+    return records
+
+
+def record(results_dir, directory=None):
+    """Id of this session's environment, appended to results_dir/environments.jsonl if new."""
+    eid, env = session(directory)
+    if eid not in load(results_dir):
+        os.makedirs(results_dir, exist_ok=True)
+        line = json.dumps({"env": eid, **env, **volatile()}) + "\n"
+        fd = os.open(os.path.join(results_dir, FILENAME), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode())
+        finally:
+            os.close(fd)
+    return eid
+
+
+def flatten(env, prefix=""):
+    out = {}
+    for key, value in env.items():
+        if isinstance(value, dict):
+            out.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, list):
+            for i, item in enumerate(value):
+                out.update(flatten(item, f"{prefix}{key}[{i}].") if isinstance(item, dict)
+                           else {f"{prefix}{key}[{i}]": item})
+        else:
+            out[prefix + key] = value
+    return out
+
+
+def diff(a, b):
+    """(field, a value, b value) of every field that differs between two environments."""
+    skip = {"env", "seen", "slurm"}
+    fa = {k: v for k, v in flatten(a).items() if k.split(".")[0] not in skip}
+    fb = {k: v for k, v in flatten(b).items() if k.split(".")[0] not in skip}
+    return [(k, fa.get(k), fb.get(k)) for k in sorted(set(fa) | set(fb)) if fa.get(k) != fb.get(k)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show environment fingerprints")
+    parser.add_argument("results", nargs="?", help="a results directory with environments.jsonl")
+    parser.add_argument("--diff", nargs=2, metavar="ID", help="compare two environments (id prefixes)")
+    args = parser.parse_args(argv)
+
+    if args.results is None:
+        eid, env = session()
+        print(f"[INFO] env {eid}")
+        json.dump(env, sys.stdout, indent=2, sort_keys=True)
+        print()
+        return
+
+    records = load(args.results)
+    if args.diff:
+        picked = []
+        for prefix in args.diff:
+            match = [r for i, r in records.items() if i.startswith(prefix)]
+            if len(match) != 1:
+                raise SystemExit(f"[ERROR] '{prefix}' matches {len(match)} environments")
+            picked.append(match[0])
+        a, b = picked
+        for field, va, vb in diff(a, b):
+            print(f"{field}:\n  {a['env']}: {va}\n  {b['env']}: {vb}")
+        return
+
+    for eid, r in records.items():
+        devices = [d.get("NAME") for p in (r.get("opencl") or {}).get("platforms", [])
+                   for d in p.get("devices", [])]
+        commit = (r.get("git") or {}).get("commit", "")[:8]
+        print(f"{eid}  {r['seen']}  {r['host']:<12} {commit}  {r['cpu']['model']}"
+              + (f"  [{', '.join(devices)}]" if devices else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Chunked, memory-mapped CPU reduction for exercise_5 and exercise_6/reduction.
+
+reduction.c sums N ones (int or float) with N up to 1024^2 x 512, i.e. a
+2 GiB input. Reducer sums the same input from a memory-mapped file in
+cache-sized chunks on a thread pool, so nothing but one chunk per worker
+(and the page cache) is ever in memory:
+
+  int       every chunk summed with an int64 accumulator, exact
+  pairwise  float chunks summed by NumPy's pairwise summation in float,
+            the chunk sums combined pairwise in double
+  kahan     float chunks summed in double, the chunk sums combined with
+            compensated (Kahan-Babuska) summation
+
+Chunk sums are combined in input order, so the result does not depend on
+the number of workers. The input of reduction.c is written once to
+.gpubench_cache/reduction/ones_<precision>_N<N>.bin (--input reduces any
+raw file instead), and every run prints a row in the layout of reduction.c
+with the throughput as summary:
+
+    python -m gpubench.reduction --N 1048576 536870912 --precision int float
+    python -m gpubench.reduction --N 536870912 --precision float --method kahan -o results_cpu.csv
+
+--validate checks the `result` column of the results files against the
+exact sum. sequential_reduction rows of float are held to the sequential
+float sum instead, which is what their loop computes (it stops growing at
+2^24 for ones), and their distance to the exact sum is shown next to it:
+
+    python -m gpubench.reduction --validate exercise_5/results/results_*.csv
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from gpubench.bands import BandPool, cache_size
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(REPO_ROOT, ".gpubench_cache", "reduction")
+
+DTYPES = {"int": np.int32, "float": np.float32}
+METHODS = {"int": ("int",), "float": ("pairwise", "kahan")}
+
+# relative difference of `result` still accepted
+TOLERANCE = {"int": 0.0, "float": 1e-6}
+
+
+# -------------------------------------------------------
+# Input
+# -------------------------------------------------------
+
+def chunk_size(dtype, cache=None):
+    """Elements per chunk: half of the L2 cache."""
+    cache = cache or cache_size()
+    return max(4096, cache // 2 // np.dtype(dtype).itemsize)
+
+
+def ones(N, precision="int", directory=CACHE_DIR):
+    """The input of reduction.c (N ones) as a read-only memmap, written on first use."""
+    dtype = np.dtype(DTYPES[precision])
+    path = os.path.join(directory, f"ones_{precision}_N{N}.bin")
+    if not os.path.exists(path) or os.path.getsize(path) != N * dtype.itemsize:
+        os.makedirs(directory, exist_ok=True)
+        block = np.ones(min(N, 1 << 22), dtype)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            for lo in range(0, N, block.size):
+                f.write(block[:min(block.size, N - lo)].tobytes())
+        os.replace(tmp, path)
+    return np.memmap(path, dtype, "r", shape=(N,))
+
+
+def load(path, precision):
+    """A raw file of VALUEs as a read-only memmap."""
+    return np.memmap(path, DTYPES[precision], "r")
+
+
+# -------------------------------------------------------
+# Engine
+# -------------------------------------------------------
+
+def _kahan(values):
+    """Compensated sum of floats (Kahan-Babuska / Neumaier)."""
+    total = comp = 0.0
+    for v in values:
+        t = total + v
+        if abs(total) >= abs(v):
+            comp += (total - t) + v
+        else:
+            comp += (v - t) + total
+        total = t
+    return total + comp
+
+
+class Reducer(BandPool):
+    """Sums of one 1-D input, chunk by chunk, one band of chunks per worker."""
+
+    def __init__(self, data, workers=None, chunk=None):
+        super().__init__(workers)
+        self.data = np.asarray(data)  # the memmap's buffer, without the subclass
+        self.chunk = chunk or chunk_size(self.data.dtype)
+        n = self.data.size
+        self.chunks = [(lo, min(lo + self.chunk, n)) for lo in range(0, n, self.chunk)]
+
+    def _partials(self, func, out):
+        """out[k] = func(chunk k) for every chunk."""
+        def band(part):
+            for k in part:
+                lo, hi = self.chunks[k]
+                out[k] = func(self.data[lo:hi])
+
+        self.map(band, self.split(len(self.chunks)))
+        return out
+
+    def sum(self, method=None):
+        """The sum as int (method "int") or float ("pairwise" or "kahan")."""
+        n = len(self.chunks)
+        if self.data.dtype.kind in "iu":
+            if method not in (None, "int"):
+                raise ValueError(f"integer input is summed with method 'int', not {method!r}")
+            partials = self._partials(lambda c: np.add.reduce(c, dtype=np.int64),
+                                      np.zeros(n, np.int64))
+            return sum(int(p) for p in partials)  # Python ints: no overflow
+        method = method or "pairwise"
+        if method == "pairwise":
+            return float(np.add.reduce(self._partials(np.add.reduce, np.zeros(n, np.float64))))
+        if method == "kahan":
+            return _kahan(self._partials(lambda c: np.add.reduce(c, dtype=np.float64),
+                                         np.zeros(n, np.float64)).tolist())
+        raise ValueError(f"unknown method {method!r} (known: pairwise, kahan)")
+
+    def sequential(self):
+        """The running sum in the input's own type, as the loop of reduction.c adds."""
+        dtype = self.data.dtype
+        buf = np.empty(self.chunk + 1, dtype)
+        total = dtype.type(0)
+        for lo, hi in self.chunks:
+            buf[0] = total
+            buf[1:hi - lo + 1] = self.data[lo:hi]
+            total = np.cumsum(buf[:hi - lo + 1], dtype=dtype)[-1]
+        return total.item()
+
+
+def reduce(N, precision="int", method=None, workers=None):
+    """(sum, elapsed ms of the reduction) of the reduction.c input."""
+    with Reducer(ones(N, precision), workers) as r:
+        t0 = time.perf_counter()
+        value = r.sum(method)
+        return value, (time.perf_counter() - t0) * 1000.0
+
+
+_references = {}
+
+
+def reference(N, precision, sequential=False):
+    """Exact (or sequential) sum of the reduction.c input, computed once per process."""
+    key = (N, precision, sequential)
+    if key not in _references:
+        with Reducer(ones(N, precision)) as r:
+            _references[key] = r.sequential() if sequential else r.sum(
+                "kahan" if precision == "float" else "int")
+    return _references[key]
+
+
+# -------------------------------------------------------
+# Validation
+# -------------------------------------------------------
+
+def validate(path):
+    """Rows of a results CSV (version, precision, N, result, elapsed_ms) against the reference."""
+    df = pd.read_csv(path)
+    out = []
+    for row in df.itertuples(index=False):
+        N, precision = int(row.N), row.precision
+        exact = reference(N, precision)
+        sequential = row.version == "sequential_reduction" and precision == "float"
+        expected = reference(N, precision, sequential=True) if sequential else exact
+        result = float(row.result)
+        rel = abs(result - expected) / abs(expected) if expected else abs(result)
+        out.append({"version": row.version, "precision": precision, "N": N, "result": result,
+                    "expected": expected, "rel": rel,
+                    "error": abs(result - exact) / abs(exact) if exact else abs(result),
+                    "ok": rel <= TOLERANCE[precision]})
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chunked memory-mapped reduction of exercise_5/6")
+    parser.add_argument("--N", type=int, nargs="+", default=[1024, 1024**2, 1024**2 * 512])
+    parser.add_argument("--precision", nargs="+", choices=sorted(DTYPES), default=["int"])
+    parser.add_argument("--method", choices=["pairwise", "kahan"], default="pairwise",
+                        help="summation of float inputs (int inputs always use int64)")
+    parser.add_argument("--workers", type=int, help="threads (default: all cores)")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--input", help="reduce this raw file of --precision values instead")
+    parser.add_argument("-o", "--output", help="append the rows to this results CSV")
+    parser.add_argument("--validate", metavar="CSV", nargs="+",
+                        help="check the result column of exercise_5/6 results files instead")
+    args = parser.parse_args(argv)
+
+    if args.validate is not None:
+        bad = 0
+        for path in args.validate:
+            print(f"[INFO] {path}")
+            for r in validate(path):
+                bad += not r["ok"]
+                state = "ok" if r["ok"] else "FAILED"
+                print(f"  [{state:>6}] {r['version']:<22} {r['precision']:<5} N={r['N']:<10} "
+                      f"{r['result']:.0f} (expected {r['expected']:.0f}, error {r['error']:.1e})")
+        if bad:
+            print(f"[ERROR] {bad} result(s) outside the tolerance")
+            sys.exit(1)
+        return
+
+    rows = []
+    if args.input:
+        configs = [(None, args.precision[0])]
+    else:
+        configs = list(itertools.product(args.N, args.precision))
+    for N, precision in configs:
+        data = load(args.input, precision) if args.input else ones(N, precision)
+        method = "int" if precision == "int" else args.method
+        with Reducer(data, args.workers) as r:
+            for _ in range(args.runs):
+                t0 = time.perf_counter()
+                value = r.sum(method)
+                ms = (time.perf_counter() - t0) * 1000.0
+                rows.append((f"numpy_{method}", precision, data.size, value, ms))
+                text = f"{value:d}" if precision == "int" else f"{value:.3f}"
+                # the row layout of reduction.c
+                print(f"numpy_{method},{precision},{data.size},{text},{ms:.3f}")
+        times = [ms for *_, ms in rows[-args.runs:]]
+        ms = float(np.median(times))
+        print(f"[SUMMARY] numpy_{method} {precision} N={data.size}: {ms:.1f} ms, "
+              f"{data.nbytes / ms / 1e6:.2f} GB/s on {r.workers} thread(s), chunks of "
+              f"{r.chunk * data.itemsize >> 10} KiB")
+
+    if args.output:
+        new = not os.path.exists(args.output)
+        with open(args.output, "a") as f:
+            if new:
+                f.write("version,precision,N,result,elapsed_ms\n")
+            for version, precision, N, value, ms in rows:
+                text = f"{value:d}" if precision == "int" else f"{value:.3f}"
+                f.write(f"{version},{precision},{N},{text},{ms:.3f}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Aggregate layer over the benchmark CSVs of all exercises.
+
+Every exercise writes its own CSV layout (mode/impl/version, elapsed_ms or
+time_ms, optional work-group columns, device only in the file name). SOURCES
+describes each layout once; load_measurements() maps it onto one long table
+
+    exercise, device, version, precision, N, IT, workgroup, metric, value
+
+with one row per measured value, and aggregate() reduces that to one row per
+configuration and metric (count, mean, std, min, median, max).
+
+aggregates() caches the reduced table per exercise under .gpubench_cache/ in
+the repository root, keyed on path, size and mtime of every input CSV, so
+consumers such as the dashboard only re-read CSVs that actually changed.
+"""
+
+import glob
+import os
+import re
+import warnings
+
+import pandas as pd
+
+from gpubench.manifest import fingerprint
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(REPO_ROOT, ".gpubench_cache")
+CACHE_VERSION = 1
+
+DIMENSIONS = ["exercise", "device", "version", "precision", "N", "IT", "workgroup"]
+STATS = ["count", "mean", "std", "min", "median", "max"]
+
+
+# -------------------------------------------------------
+# Result sources
+# -------------------------------------------------------
+
+class Source:
+    """
+    CSV layout of one exercise.
+
+    patterns:  globs relative to the exercise directory
+    prefix:    file name prefix in front of the device name ("results_")
+    rename:    CSV column -> common column (e.g. {"impl": "version"})
+    metrics:   CSV columns holding measured values
+    tags:      optional func(path) -> dict of constant columns for that file,
+               overriding the device derived from the file name
+    """
+
+    def __init__(self, exercise, patterns, prefix="results_", rename=None,
+                 metrics=("elapsed_ms",), tags=None):
+        self.exercise = exercise
+        self.patterns = list(patterns)
+        self.prefix = prefix
+        self.rename = dict(rename or {})
+        self.metrics = list(metrics)
+        self.tags = tags
+
+    @property
+    def directory(self):
+        return os.path.join(REPO_ROOT, self.exercise)
+
+    def files(self):
+        found = set()
+        for pattern in self.patterns:
+            found.update(glob.glob(os.path.join(self.directory, pattern)))
+        return sorted(found)
+
+    def device(self, path):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return stem[len(self.prefix):] if stem.startswith(self.prefix) else stem
+
+
+def _reduction_tags(path):
+    # results_plots/<variant_>worksize_<n>/results_amd.csv
+    parent = os.path.basename(os.path.dirname(path))
+    m = re.fullmatch(r"(?:(.*)_)?worksize_(\d+)", parent)
+    if not m:
+        return {}
+    device = SOURCES["exercise_6/reduction"].device(path)
+    return {
+        "device": f"{device}_{m.group(1)}" if m.group(1) else device,
+        "workgroup": m.group(2),
+    }
+
+
+def _gemm_opt_tags(path):
+    # matrix_mul_results_<device>[_opt].csv
+    device = SOURCES["exercise_10"].device(path)
+    if device.endswith("_opt"):
+        return {"device": device[: -len("_opt")], "version": "opt"}
+    return {"device": device, "version": "original"}
+
+
+SOURCES = {
+    s.exercise: s
+    for s in [
+        Source("exercise_2", ["results_*.csv"], rename={"mode": "version"},
+               metrics=["time_ms"]),
+        Source("exercise_3", ["results/results_*.csv"],
+               metrics=["total_kernel", "total_read", "total_write", "write_f",
+                        "write_tmp", "write_u", "average_queue"]),
+        Source("exercise_4", ["results/results_*.csv"]),
+        Source("exercise_5", ["results/results_*.csv"]),
+        Source("exercise_6/jacobi", ["results/results_*.csv"]),
+        Source("exercise_6/matrix_mul", ["results/results_*.csv"],
+               rename={"impl": "version"}),
+        Source("exercise_6/reduction",
+               ["results_*.csv", "results_plots/*/results_*.csv"],
+               tags=_reduction_tags),
+        Source("exercise_7", ["results/auto_levels_results_*.csv"],
+               prefix="auto_levels_results_", rename={"impl": "version"},
+               metrics=["elapsed_ms", "time_ia", "time_ib"]),
+        Source("exercise_8", ["results/scan_benchmark_*.csv"],
+               prefix="scan_benchmark_int_",
+               rename={"impl": "version", "type": "precision"}),
+        Source("exercise_10", ["results/matrix_mul_results_*.csv"],
+               prefix="matrix_mul_results_", metrics=["time_ms"],
+               tags=_gemm_opt_tags),
+    ]
+}
+
+
+def resolve(exercise):
+    """Source for an exercise name or directory ("exercise_4", "./exercise_4/")."""
+    path = os.path.abspath(exercise)
+    key = os.path.relpath(path, REPO_ROOT) if path.startswith(REPO_ROOT) else exercise
+    key = key.strip("/").replace(os.sep, "/")
+    if key not in SOURCES:
+        raise KeyError(f"no result source for '{exercise}' "
+                       f"(known: {', '.join(SOURCES)})")
+    return SOURCES[key]
+
+
+# -------------------------------------------------------
+# Loading
+# -------------------------------------------------------
+
+def _read_csv(path):
+    # some runs append extra unnamed columns (e.g. GFLOPS) without a header
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", pd.errors.ParserWarning)
+        return pd.read_csv(path, index_col=False)
+
+
+def _normalise(source, path):
+    df = _read_csv(path).rename(columns=source.rename)
+    out = pd.DataFrame(index=df.index)
+    out["exercise"] = source.exercise
+    out["device"] = source.device(path)
+    out["version"] = df["version"].astype(str) if "version" in df else ""
+    out["precision"] = df["precision"].astype(str) if "precision" in df else ""
+    for col in ("N", "IT"):
+        out[col] = pd.to_numeric(df[col], errors="coerce") if col in df else 0
+    if "LOCAL_WORKGROUP_DIM_1" in df and "LOCAL_WORKGROUP_DIM_2" in df:
+        out["workgroup"] = (df["LOCAL_WORKGROUP_DIM_1"].astype(str) + "x"
+                            + df["LOCAL_WORKGROUP_DIM_2"].astype(str))
+    else:
+        out["workgroup"] = ""
+    for col, value in (source.tags(path) if source.tags else {}).items():
+        out[col] = value
+
+    metrics = [m for m in source.metrics if m in df]
+    values = df[metrics].apply(pd.to_numeric, errors="coerce")
+    long = out.join(values).melt(id_vars=DIMENSIONS, value_vars=metrics,
+                                 var_name="metric", value_name="value")
+    return long.dropna(subset=["value", "N", "IT"])
+
+
+def load_measurements(source):
+    """Long table (DIMENSIONS + metric, value) of every CSV of a source."""
+    frames = [_normalise(source, path) for path in source.files()]
+    if not frames:
+        return pd.DataFrame(columns=DIMENSIONS + ["metric", "value"])
+    long = pd.concat(frames, ignore_index=True)
+    long[["N", "IT"]] = long[["N", "IT"]].astype("int64")
+    return long
+
+
+def aggregate(long):
+    """One row per configuration and metric with count/mean/std/min/median/max."""
+    keys = DIMENSIONS + ["metric"]
+    if long.empty:
+        return pd.DataFrame(columns=keys + STATS)
+    agg = (
+        long.groupby(keys, observed=True, sort=True)["value"]
+        .agg(STATS)
+        .reset_index()
+    )
+    agg["std"] = agg["std"].fillna(0.0)
+    return agg
+
+
+# -------------------------------------------------------
+# Cache
+# -------------------------------------------------------
+
+def _inputs_key(source):
+    stats = []
+    for path in source.files():
+        st = os.stat(path)
+        stats.append((os.path.relpath(path, REPO_ROOT), st.st_size, st.st_mtime_ns))
+    return fingerprint(CACHE_VERSION, source.exercise, stats)
+
+
+def _cache_path(source):
+    return os.path.join(CACHE_DIR, source.exercise.replace("/", "__") + ".pkl")
+
+
+def source_aggregates(source, use_cache=True):
+    """Aggregated table of one source, read from the cache when inputs are unchanged."""
+    key = _inputs_key(source)
+    path = _cache_path(source)
+    if use_cache:
+        try:
+            cached = pd.read_pickle(path)
+            if cached.get("key") == key:
+                return cached["table"]
+        except (OSError, ValueError, KeyError, AttributeError, EOFError):
+            pass
+
+    table = aggregate(load_measurements(source))
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    pd.to_pickle({"key": key, "table": table}, tmp)
+    os.replace(tmp, path)
+    return table
+
+
+def aggregates(exercises=None, use_cache=True):
+    """Aggregated tables of the given exercises (default: all) stacked into one."""
+    sources = [resolve(e) for e in exercises] if exercises else list(SOURCES.values())
+    tables = [source_aggregates(s, use_cache) for s in sources]
+    tables = [t for t in tables if not t.empty]
+    if not tables:
+        return aggregate(pd.DataFrame(columns=DIMENSIONS + ["metric", "value"]))
+    return pd.concat(tables, ignore_index=True)
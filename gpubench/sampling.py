@@ -0,0 +1,104 @@
+"""
+How often to repeat one benchmark configuration.
+
+Fixed repetition counts (RUNS=5, RUNS=10) give too few samples to the
+0.01 ms configurations and burn node hours on the multi-second ones.
+Sampling repeats a configuration until the confidence interval of its
+median is narrow enough:
+
+    Sampling(min_runs=3, max_runs=50, rel_ci=0.02, budget_s=60)
+
+  min_runs  always run at least this often (takes precedence over the budget)
+  max_runs  never run more often
+  rel_ci    stop once (CI half-width of the median) / median <= rel_ci
+  budget_s  stop before a run that would exceed this many seconds of
+            wall time for the configuration (predicted from the mean run)
+
+The median CI is distribution-free: the order statistics x_(l), x_(n-l+1)
+with the largest l such that P(Bin(n, 1/2) <= l - 1) <= alpha/2. Up to
+eight samples at 95 % that is l = 1, the full range, so convergence needs
+a few runs even for very stable timings.
+
+Sampling.fixed(n) reproduces the old behaviour of exactly n runs.
+"""
+
+import math
+import statistics
+
+STOP_REASONS = ("converged", "max_runs", "budget", "missing")
+
+
+def median_ci(values, confidence=0.95):
+    """(lo, median, hi) of `values`; lo/hi are order statistics bracketing the median."""
+    xs = sorted(values)
+    n = len(xs)
+    if n == 0:
+        raise ValueError("median_ci() of an empty sequence")
+    alpha = 1.0 - confidence
+    l, cdf = 1, 0.0
+    # largest l with P(B <= l - 1) <= alpha / 2, B ~ Bin(n, 1/2)
+    for k in range(n // 2):
+        cdf += math.comb(n, k) / 2.0 ** n
+        if cdf > alpha / 2:
+            break
+        l = k + 1
+    l = min(l, (n + 1) // 2)
+    return xs[l - 1], statistics.median(xs), xs[n - l]
+
+
+def rel_half_width(values, confidence=0.95):
+    lo, med, hi = median_ci(values, confidence)
+    if hi == lo:
+        return 0.0
+    if med == 0:
+        return math.inf
+    return (hi - lo) / 2.0 / abs(med)
+
+
+class Sampling:
+    def __init__(self, min_runs=3, max_runs=50, rel_ci=0.02, budget_s=None, confidence=0.95):
+        if min_runs < 1 or max_runs < min_runs:
+            raise ValueError(f"need 1 <= min_runs <= max_runs, got {min_runs}, {max_runs}")
+        self.min_runs = min_runs
+        self.max_runs = max_runs
+        self.rel_ci = rel_ci
+        self.budget_s = budget_s
+        self.confidence = confidence
+
+    @classmethod
+    def fixed(cls, runs):
+        return cls(min_runs=runs, max_runs=runs, rel_ci=None)
+
+    @property
+    def adaptive(self):
+        return self.rel_ci is not None or self.budget_s is not None
+
+    def stop(self, series, runs, elapsed_s):
+        """
+        Stop reason after `runs` runs taking elapsed_s in total, or None to go
+        on. `series` holds one list of measured values per row a run prints
+        (e.g. sequential and OpenCL time); all of them have to converge.
+        """
+        if runs < self.min_runs:
+            return None
+        if self.rel_ci is not None and series and all(
+            len(s) >= 2 and rel_half_width(s, self.confidence) <= self.rel_ci for s in series
+        ):
+            return "converged"
+        if runs >= self.max_runs:
+            return "max_runs"
+        if self.budget_s is not None and elapsed_s + elapsed_s / runs > self.budget_s:
+            return "budget"
+        return None
+
+    def summary(self, series):
+        """Per-series n, median and relative CI half-width for the sampling log."""
+        out = []
+        for s in series:
+            if not s:
+                out.append({"n": 0})
+                continue
+            lo, med, hi = median_ci(s, self.confidence)
+            out.append({"n": len(s), "median": med, "ci": [lo, hi],
+                        "rel_ci": rel_half_width(s, self.confidence)})
+        return out
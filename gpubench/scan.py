@@ -0,0 +1,277 @@
+"""
+Parallel blocked inclusive scan for the sizes of exercise_8.
+
+scan.c checks its OpenCL scan against a sequential scan of the whole
+input, which at N = 536870912 takes longer than the kernels it checks.
+Scanner does the same inclusive scan on a thread pool, in two passes over
+cache-sized blocks:
+
+  1. reduce   the sum of every block (np.add.reduce), in parallel
+  2. carries  exclusive scan of the block sums (one value per block)
+  3. scan     np.cumsum of every block into the output, plus its carry,
+              in parallel; the block is still in cache for the addition
+
+The input is read twice and the output written once; with out=data the
+scan is in place, so a memory-mapped 2 GiB input needs no second array.
+The arithmetic is that of the input type: int32 wraps like the int of
+scan.c (the last prefix sums of 512M values in 0..9 do overflow), and
+float blocks are summed in float. check() runs the same passes against an
+expected output without writing anything, and reports the first index
+that differs, as compareArrays() of scan.c does. For float it sums in
+double and accepts a difference relative to the prefix: float32 prefix
+sums of ~5 per element lose units past N = 2^20 in any order of addition,
+so an absolute tolerance fails correct scans (the float32 carry of the
+second 64K block already does).
+
+The input is the one of scan.c (rand() % 10, or (rand() % 100) / 10 for
+float) from a seeded generator, written once to
+.gpubench_cache/scan/input_<type>_N<N>_seed<seed>.bin. Every run prints
+the time and the throughput (input read and output written, 2 x N x 4
+bytes per scan):
+
+    python -m gpubench.scan --N 1048576 536870912 --type int float --runs 3
+    python -m gpubench.scan --N 536870912 --in-place -o exercise_8/results/scan_cpu.csv
+    python -m gpubench.scan --input in.bin --check out.bin --type float
+"""
+
+import argparse
+import itertools
+import os
+import socket
+import sys
+import time
+
+import numpy as np
+
+from gpubench.bands import BandPool, cache_size
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(REPO_ROOT, ".gpubench_cache", "scan")
+
+DTYPES = {"int": np.int32, "float": np.float32}
+
+# difference accepted by check(): exact for int, relative to the prefix
+# (at least 1) for float; blocked float32 scans stay near 1e-5 up to 512M
+TOLERANCE = {"int": 0, "float": 1e-4}
+
+
+# -------------------------------------------------------
+# Input
+# -------------------------------------------------------
+
+def block_size(dtype, cache=None):
+    """Elements per block: a quarter of the L2 cache (input and output block fit)."""
+    cache = cache or cache_size()
+    return max(4096, cache // 4 // np.dtype(dtype).itemsize)
+
+
+def make_input(N, vtype="int", seed=0, directory=CACHE_DIR):
+    """The input of scan.c as a read-only memmap, generated on first use."""
+    dtype = np.dtype(DTYPES[vtype])
+    path = os.path.join(directory, f"input_{vtype}_N{N}_seed{seed}.bin")
+    if not os.path.exists(path) or os.path.getsize(path) != N * dtype.itemsize:
+        os.makedirs(directory, exist_ok=True)
+        rng = np.random.default_rng(seed)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            for lo in range(0, N, 1 << 22):
+                n = min(1 << 22, N - lo)
+                if vtype == "float":
+                    block = (rng.integers(0, 100, n).astype(dtype) / dtype.type(10)).astype(dtype)
+                else:
+                    block = rng.integers(0, 10, n).astype(dtype)
+                f.write(block.tobytes())
+        os.replace(tmp, path)
+    return np.memmap(path, dtype, "r", shape=(N,))
+
+
+# -------------------------------------------------------
+# Engine
+# -------------------------------------------------------
+
+class Scanner(BandPool):
+    """
+    Blocked inclusive scans on `workers` threads. Every worker takes a
+    contiguous band of blocks.
+    """
+
+    def __init__(self, workers=None, block=None):
+        super().__init__(workers)
+        self.block = block
+
+    def _blocks(self, data):
+        size = self.block or block_size(data.dtype)
+        return [(lo, min(lo + size, data.size)) for lo in range(0, data.size, size)]
+
+    def _map(self, func, count):
+        """[func(band) for every band], a band being a range of block indices."""
+        return self.map(func, self.split(count))
+
+    def _carries(self, data, blocks, dtype=None):
+        """Sum of everything before each block, in dtype (default: the input type)."""
+        sums = np.zeros(len(blocks), dtype or data.dtype)
+
+        def reduce(band):
+            for k in band:
+                lo, hi = blocks[k]
+                sums[k] = np.add.reduce(data[lo:hi], dtype=sums.dtype)
+
+        self._map(reduce, len(blocks))
+        carries = np.zeros_like(sums)
+        with np.errstate(over="ignore"):
+            np.cumsum(sums[:-1], out=carries[1:])
+        return carries
+
+    def scan(self, data, out=None):
+        """Inclusive scan of data into out (new array if None; out=data is in place)."""
+        data = np.asarray(data)
+        out = np.empty_like(data) if out is None else out
+        if out.shape != data.shape or out.dtype != data.dtype:
+            raise ValueError("out needs the shape and type of the input")
+        if not data.size:
+            return out
+        blocks = self._blocks(data)
+        carries = self._carries(data, blocks)
+
+        def scan(band):
+            for k in band:
+                lo, hi = blocks[k]
+                dst = out[lo:hi]
+                np.cumsum(data[lo:hi], out=dst)
+                if k:
+                    dst += carries[k]
+
+        with np.errstate(over="ignore"):
+            self._map(scan, len(blocks))
+        return out
+
+    def check(self, data, expected, tol=0):
+        """
+        First index where expected differs from the scan of data, or None.
+        Integers must match exactly (wrapping like the input type); floats
+        are scanned in double and may differ by tol x max(|prefix|, 1).
+        """
+        data, expected = np.asarray(data), np.asarray(expected)
+        if expected.shape != data.shape:
+            return 0
+        if not data.size:
+            return None
+        exact = data.dtype.kind in "iu"
+        dtype = data.dtype if exact else np.dtype(np.float64)
+        blocks = self._blocks(data)
+        carries = self._carries(data, blocks, dtype)
+
+        def check(band):
+            scratch = np.empty(blocks[0][1] - blocks[0][0], dtype)
+            for k in band:
+                lo, hi = blocks[k]
+                dst = scratch[:hi - lo]
+                np.cumsum(data[lo:hi], dtype=dtype, out=dst)
+                dst += carries[k]
+                if exact:
+                    bad = np.flatnonzero(dst != expected[lo:hi])
+                else:
+                    bound = tol * np.maximum(np.abs(dst), 1.0)
+                    bad = np.flatnonzero(~(np.abs(dst - expected[lo:hi]) <= bound))
+                if bad.size:
+                    return lo + int(bad[0])
+            return None
+
+        with np.errstate(over="ignore"):
+            found = [i for i in self._map(check, len(blocks)) if i is not None]
+        return min(found) if found else None
+
+
+def inclusive_scan(data, out=None, workers=None, block=None):
+    with Scanner(workers, block) as s:
+        return s.scan(data, out)
+
+
+# -------------------------------------------------------
+# Benchmark
+# -------------------------------------------------------
+
+def _scratch(N, vtype, directory=CACHE_DIR):
+    """A writable memmap of N values for the output (or the in-place copy)."""
+    path = os.path.join(directory, f"output_{vtype}_N{N}_{os.getpid()}.bin")
+    return path, np.memmap(path, DTYPES[vtype], "w+", shape=(N,))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel blocked inclusive scan of exercise_8")
+    parser.add_argument("--N", type=int, nargs="+", default=[1024, 1024**2, 1024**2 * 512])
+    parser.add_argument("--type", nargs="+", choices=sorted(DTYPES), default=["int"])
+    parser.add_argument("--workers", type=int, help="threads (default: all cores)")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--in-place", action="store_true",
+                        help="scan a copy of the input in place instead of into a second array")
+    parser.add_argument("--input", help="raw file of --type values to scan instead")
+    parser.add_argument("--check", metavar="OUTPUT",
+                        help="with --input: compare this raw file with the scan of the input")
+    parser.add_argument("-o", "--output",
+                        help="append rows (run, impl, elapsed_ms, N, type, host) to this CSV")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        if not args.input:
+            parser.error("--check needs --input")
+        vtype = args.type[0]
+        data = np.memmap(args.input, DTYPES[vtype], "r")
+        expected = np.memmap(args.check, DTYPES[vtype], "r")
+        with Scanner(args.workers) as s:
+            t0 = time.perf_counter()
+            index = s.check(data, expected, TOLERANCE[vtype])
+            ms = (time.perf_counter() - t0) * 1000.0
+        if index is not None:
+            found = expected[index] if index < expected.size else "missing"
+            print(f"Mismatch at index {index}: {found} (expected a scan of {args.input})")
+            print(f"FAILED: {args.check} does not match ({ms:.1f} ms)")
+            sys.exit(1)
+        print(f"PASSED: {args.check} matches the scan of {args.input} ({ms:.1f} ms)")
+        return
+
+    impl = "numpy_blocked_inplace" if args.in_place else "numpy_blocked"
+    rows = []
+    configs = [(None, args.type[0])] if args.input else itertools.product(args.N, args.type)
+    for N, vtype in configs:
+        data = np.memmap(args.input, DTYPES[vtype], "r") if args.input \
+            else make_input(N, vtype, args.seed)
+        N = data.size
+        path, out = _scratch(N, vtype, os.path.dirname(os.path.abspath(args.input))
+                             if args.input else CACHE_DIR)
+        times = []
+        try:
+            with Scanner(args.workers) as s:
+                for run in range(1, args.runs + 1):
+                    if args.in_place:
+                        out[:] = data
+                        t0 = time.perf_counter()
+                        s.scan(out, out)
+                    else:
+                        t0 = time.perf_counter()
+                        s.scan(data, out)
+                    ms = (time.perf_counter() - t0) * 1000.0
+                    times.append(ms)
+                    rows.append((run, impl, ms, N, vtype))
+                    print(f"{impl} Time: {ms:.3f} ms ({vtype}, N={N}, "
+                          f"{2 * data.nbytes / ms / 1e6:.2f} GB/s)")
+        finally:
+            del out
+            os.remove(path)
+        ms = float(np.median(times))
+        print(f"[SUMMARY] {impl} {vtype} N={N}: {ms:.1f} ms, {2 * data.nbytes / ms / 1e6:.2f} GB/s "
+              f"on {s.workers} thread(s)")
+
+    if args.output:
+        host = socket.gethostname().split(".")[0]
+        new = not os.path.exists(args.output)
+        with open(args.output, "a") as f:
+            if new:
+                f.write("run,impl,elapsed_ms,N,type,host\n")
+            for run, impl, ms, N, vtype in rows:
+                f.write(f"{run},{impl},{ms:.3f},{N},{vtype},{host}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+"""
+Sweeps split over several nodes.
+
+A sweep's configurations (point x target) are partitioned into shards of
+about equal estimated cost, each shard runs as one SLURM array task (or as
+a local process for testing), and the shard outputs are merged back into
+the sweep's results file:
+
+    python -m gpubench.shard plan   exercise_6/jacobi --shards 4 --device gc20
+    python -m gpubench.shard submit exercise_6/jacobi --shards 4 --device gc20
+    python -m gpubench.shard local  exercise_8 --shards 3 --bin-dir /tmp/fake
+    python -m gpubench.shard merge  exercise_6/jacobi --device gc20
+
+The cost of a configuration is its planned runs times its seconds per run,
+taken from earlier sampling logs (<results>.sampling.jsonl, also of
+earlier shards). Configurations without history get a size model
+(N^2 * IT for the stencils, N otherwise) scaled to the ones with history. Shards are filled longest
+first into the currently cheapest shard, which is deterministic for a
+given history.
+
+The plan is frozen in <results dir>/shards/<results name>/plan.json, so
+every array task sees the same partition, and each shard writes its own
+shard-<i>.csv with journal next to it (resumable like any sweep). merge
+orders the runs by configuration in sweep order and by run number, so the
+merged file does not depend on the number of shards or on which task
+finished first. It also writes a journal for the merged file, so a later
+plain `gpubench.sweep` run skips everything already done. An existing
+results file is only replaced if it came from the same plan (or --force).
+
+`submit` uses the exercise's run_benchmark.slurm as array script when it
+drives gpubench.sweep (it picks up SHARD_PLAN), otherwise sbatch --wrap,
+and queues the merge as a dependent job.
+"""
+
+import argparse
+import glob
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from gpubench import provenance
+from gpubench import sweep as sweeps
+
+# -------------------------------------------------------
+# Cost model
+# -------------------------------------------------------
+
+
+def history(results_dir):
+    """binary -> (seconds, runs) summed over every sampling log below results_dir."""
+    totals = {}
+    pattern = os.path.join(results_dir, "**", "*.sampling.jsonl")
+    for path in sorted(glob.glob(pattern, recursive=True)):
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("stop") == "missing" or not record.get("runs"):
+                    continue
+                seconds, runs = totals.get(record["binary"], (0.0, 0))
+                totals[record["binary"]] = (seconds + record["seconds"], runs + record["runs"])
+    return totals
+
+
+def _size(point):
+    if "IT" in point:  # stencils: N x N grid, IT sweeps
+        return float(point["N"]) ** 2 * float(point["IT"])
+    return float(point.get("N", 1))
+
+
+def estimate(configs, known, runs):
+    """
+    Estimated seconds per (point, target, binary) config: runs x seconds per
+    run from `known`, else the size model scaled by the median known ratio.
+    """
+    ratios = sorted(
+        known[b][0] / known[b][1] / _size(p) for p, _, b in configs if b in known
+    )
+    scale = ratios[len(ratios) // 2] if ratios else 1.0
+    costs = []
+    for point, _, binary in configs:
+        if binary in known:
+            seconds, n = known[binary]
+            costs.append(runs * seconds / n)
+        else:
+            costs.append(runs * scale * _size(point))
+    return costs
+
+
+def partition(costs, shards):
+    """Longest-processing-time-first: list of index lists, balanced by cost."""
+    loads = [0.0] * shards
+    members = [[] for _ in range(shards)]
+    for i in sorted(range(len(costs)), key=lambda i: (-costs[i], i)):
+        target = min(range(shards), key=lambda s: (loads[s], s))
+        loads[target] += costs[i]
+        members[target].append(i)
+    return [sorted(m) for m in members]
+
+
+# -------------------------------------------------------
+# Plans
+# -------------------------------------------------------
+
+def plan_path(out):
+    stem = os.path.splitext(os.path.basename(out))[0]
+    return os.path.join(os.path.dirname(os.path.abspath(out)), "shards", stem, "plan.json")
+
+
+def _portable(path):
+    path = os.path.abspath(path)
+    rel = os.path.relpath(path, sweeps.REPO_ROOT)
+    return path if rel.startswith("..") else rel
+
+
+def _resolve(path):
+    return path if os.path.isabs(path) else os.path.join(sweeps.REPO_ROOT, path)
+
+
+class Plan:
+    """
+    exercise, device, out:  the sweep and its final results file
+    order:                  every binary of the sweep, in sweep order
+    shards:                 binary names per shard
+    costs:                  estimated seconds per shard
+    """
+
+    def __init__(self, exercise, device, out, order, shards, costs):
+        self.exercise = exercise
+        self.device = device
+        self.out = out
+        self.order = order
+        self.shards = shards
+        self.costs = costs
+
+    @property
+    def path(self):
+        return plan_path(self.out)
+
+    def output(self, i):
+        return os.path.join(os.path.dirname(self.path), f"shard-{i}.csv")
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        data = {
+            "exercise": self.exercise,
+            "device": self.device,
+            "out": _portable(self.out),
+            "order": self.order,
+            "shards": self.shards,
+            "costs": [round(c, 3) for c in self.costs],
+        }
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=1)
+            f.write("\n")
+        os.replace(tmp, self.path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["exercise"], data["device"], _resolve(data["out"]),
+                   data["order"], data["shards"], data["costs"])
+
+
+def make_plan(sweep, device, out, shards, bin_dir=None, runs=None):
+    configs = [(p, t, os.path.basename(path)) for p, t, path in sweep.configs(bin_dir)]
+    order = [b for _, _, b in configs]
+    known = history(os.path.dirname(os.path.abspath(out)))
+    costs = estimate(configs, known, sweep.runs if runs is None else runs)
+    members = partition(costs, min(shards, len(configs)) or 1)
+    return Plan(
+        sweep.name, device, out, order,
+        [[configs[i][2] for i in m] for m in members],
+        [sum(costs[i] for i in m) for m in members],
+    ), sum(b in known for b in order)
+
+
+# -------------------------------------------------------
+# Merging
+# -------------------------------------------------------
+
+def _jsonl(path):
+    if not os.path.exists(path):
+        return []
+    out = []
+    with open(path) as f:
+        for line in f:
+            try:
+                out.append(json.loads(line))
+            except ValueError:
+                pass
+    return out
+
+
+def read_shard(path):
+    """(header bytes, {binary: [(run, row bytes, journal entry)]}, stop entries)."""
+    stem = os.path.splitext(path)[0]
+    with open(path, "rb") as f:
+        data = f.read()
+    header = data[:data.index(b"\n") + 1]
+    runs, stops = {}, {}
+    prev = None
+    for entry in _jsonl(stem + ".journal.jsonl"):
+        if "start" in entry:
+            prev = entry["start"] if prev is None else prev
+        elif "stop" in entry:
+            stops[entry["config"]] = entry
+        else:
+            chunk = b""
+            if "end" in entry:
+                chunk, prev = data[prev:entry["end"]], entry["end"]
+            runs.setdefault(entry["config"], []).append((entry["run"], chunk, entry))
+    return header, runs, stops
+
+
+def merge(plan, out=None, force=False):
+    """Write the shard outputs of `plan` into one results file (+ journal, logs)."""
+    out = out or plan.out
+    stem = os.path.splitext(out)[0]
+    previous = _jsonl(stem + ".journal.jsonl")[:1]
+    merged_before = previous and previous[0].get("merged") == _portable(plan.path)
+    if os.path.exists(out) and not (force or merged_before):
+        raise SystemExit(f"[ERROR] {out} exists and is not a merge of this plan; "
+                         f"use --force to replace it")
+
+    header, runs, stops, logs = None, {}, {}, {"errors": [], "sampling": []}
+    for i in range(len(plan.shards)):
+        path = plan.output(i)
+        if not os.path.exists(path):
+            print(f"[INFO] shard {i}: no output yet")
+            continue
+        h, r, s = read_shard(path)
+        if header is not None and h != header:
+            raise SystemExit(f"[ERROR] {path}: header differs from the other shards")
+        header = h
+        members = set(plan.shards[i])
+        runs.update((b, v) for b, v in r.items() if b in members)
+        stops.update((b, v) for b, v in s.items() if b in members)
+        for kind in logs:
+            logs[kind] += _jsonl(f"{os.path.splitext(path)[0]}.{kind}.jsonl")
+    if header is None:
+        raise SystemExit("[ERROR] no shard output to merge")
+
+    rank = {b: i for i, b in enumerate(plan.order)}
+    body, journal = [header], [{"start": len(header), "merged": _portable(plan.path)}]
+    end = len(header)
+    for binary in plan.order:
+        for run, chunk, entry in sorted(runs.get(binary, []), key=lambda r: r[0]):
+            body.append(chunk)
+            end += len(chunk)
+            journal.append(dict(entry, end=end) if "end" in entry else entry)
+        if binary in stops:
+            journal.append(stops[binary])
+
+    def write(path, data):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    write(out, b"".join(body))
+    write(stem + ".journal.jsonl", "".join(json.dumps(e) + "\n" for e in journal).encode())
+    logs["errors"].sort(key=lambda e: (rank.get(e["binary"], len(rank)), e["run"]))
+    logs["sampling"].sort(key=lambda e: rank.get(e["binary"], len(rank)))
+    for kind, records in logs.items():
+        write(f"{stem}.{kind}.jsonl", "".join(json.dumps(r) + "\n" for r in records).encode())
+
+    # the shards recorded their environments next to their own outputs
+    results_dir = os.path.dirname(os.path.abspath(out))
+    known = provenance.load(results_dir)
+    new = [r for i, r in provenance.load(os.path.dirname(plan.path)).items() if i not in known]
+    if new:
+        with open(os.path.join(results_dir, provenance.FILENAME), "a") as f:
+            f.writelines(json.dumps(r) + "\n" for r in new)
+
+    done = sum(b in stops for b in plan.order)
+    print(f"[DONE] merged {len(plan.shards)} shard(s): {sum(len(v) for v in runs.values())} runs, "
+          f"{done}/{len(plan.order)} configurations finished -> {out}")
+    return done == len(plan.order)
+
+
+# -------------------------------------------------------
+# Executors
+# -------------------------------------------------------
+
+def shard_command(plan, i, extra):
+    return [sys.executable, "-m", "gpubench.sweep", plan.exercise, "--device", plan.device,
+            "--shard", str(i), "--shard-plan", plan.path, *extra]
+
+
+def run_local(plan, extra, workers):
+    """Run every shard as its own process (stand-in for the array tasks); returns exit codes."""
+    env = dict(os.environ, PYTHONPATH=sweeps.REPO_ROOT)
+
+    def one(i):
+        log = os.path.splitext(plan.output(i))[0] + ".log"
+        with open(log, "w") as f:
+            proc = subprocess.run(shard_command(plan, i, extra), stdout=f,
+                                  stderr=subprocess.STDOUT,
+                                  env=dict(env, SLURM_ARRAY_TASK_ID=str(i)))
+        print(f"[INFO] shard {i}: exit {proc.returncode} (log: {log})")
+        return proc.returncode
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(one, range(len(plan.shards))))
+
+
+def sbatch_commands(plan, extra, sbatch_args):
+    """(array job command, cwd, merge job command without the dependency)."""
+    directory = sweeps.SWEEPS[plan.exercise].directory
+    script = os.path.join(directory, "run_benchmark.slurm")
+    array = ["sbatch", "--parsable", f"--array=0-{len(plan.shards) - 1}", *sbatch_args]
+    if os.path.exists(script) and "gpubench.sweep" in open(script).read():
+        array += [f"--export=ALL,SHARD_PLAN={plan.path},DEVICE={plan.device}", script]
+    else:
+        array += ["--wrap", " ".join([
+            f"cd {sweeps.REPO_ROOT} && PYTHONPATH={sweeps.REPO_ROOT} python3 -m gpubench.sweep",
+            plan.exercise, "--device", plan.device, "--shard", "$SLURM_ARRAY_TASK_ID",
+            "--shard-plan", plan.path, *extra,
+        ])]
+    merge_cmd = ["sbatch", "--parsable", "--ntasks=1", "--time=00:10:00", "--wrap",
+                 f"cd {sweeps.REPO_ROOT} && PYTHONPATH={sweeps.REPO_ROOT} python3 -m gpubench.shard "
+                 f"merge {plan.exercise} --plan {plan.path} --force"]
+    return array, directory, merge_cmd
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shard a sweep over SLURM array tasks")
+    parser.add_argument("action", choices=["plan", "submit", "local", "merge"])
+    parser.add_argument("exercise", help=f"one of {', '.join(sweeps.SWEEPS)}")
+    parser.add_argument("--shards", type=int, default=2, help="number of shards / array tasks")
+    parser.add_argument("--device", default=sweeps.HOST.split(".")[0],
+                        help="device label of the results file (default: host name)")
+    parser.add_argument("-o", "--output", help="final results CSV (default: the sweep's)")
+    parser.add_argument("--plan", help="existing plan.json (merge/local/submit)")
+    parser.add_argument("--bin-dir", help="directory holding the binaries")
+    parser.add_argument("--runs", type=int, help="runs per binary (default: per sweep)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="local: shards running at the same time")
+    parser.add_argument("--sbatch", action="append", default=[], metavar="ARG",
+                        help="submit: extra sbatch argument (repeatable, e.g. --sbatch=--partition=IFIgpu2070)")
+    parser.add_argument("--replan", action="store_true",
+                        help="discard an existing plan and its shard outputs")
+    parser.add_argument("--force", action="store_true", help="merge: replace an existing results file")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="submit: print the plan and sbatch commands without saving or submitting")
+    args = parser.parse_args(argv)
+
+    sweep = sweeps.resolve(args.exercise)
+    out = args.output or os.path.join(sweep.directory, sweep.results.format(device=args.device))
+    extra = [a for a, v in (("--bin-dir", args.bin_dir), ("--runs", args.runs)) if v is not None
+             for a in (a, str(v))]
+
+    if args.replan and os.path.isdir(os.path.dirname(plan_path(out))):
+        shutil.rmtree(os.path.dirname(plan_path(out)))
+    existing = args.plan or plan_path(out)
+    if os.path.exists(existing):
+        # shard outputs belong to the partition they were run with
+        plan = Plan.load(existing)
+        print(f"[INFO] Using plan {existing} ({len(plan.shards)} shards; --replan to redo)")
+    elif args.action == "merge":
+        raise SystemExit(f"[ERROR] no plan at {existing}")
+    else:
+        plan, known = make_plan(sweep, args.device, out, args.shards, args.bin_dir, args.runs)
+        if not args.dry_run:
+            plan.save()
+        total = sum(plan.costs)
+        print(f"[INFO] {len(plan.order)} configurations ({known} with history) in "
+              f"{len(plan.shards)} shards -> {plan.path}")
+        for i, (members, cost) in enumerate(zip(plan.shards, plan.costs)):
+            size = f"~{cost:.0f} s" if known else f"{cost / total:.0%} of the size model"
+            print(f"  shard {i}: {len(members):3d} configurations, {size}")
+        if known:
+            print(f"[INFO] estimated makespan {max(plan.costs):.0f} s of {total:.0f} s "
+                  f"({total / max(plan.costs):.2f}x)")
+
+    if args.action == "merge":
+        merge(plan, args.output, args.force)
+    elif args.action == "local":
+        codes = run_local(plan, extra, args.workers)
+        merge(plan, args.output, args.force)
+        if any(codes):
+            raise SystemExit(max(codes))
+    elif args.action == "submit":
+        array, cwd, merge_cmd = sbatch_commands(plan, extra, args.sbatch)
+        if args.dry_run:
+            print(f"(cd {cwd} && {shlex.join(array)})")
+            print(shlex.join(merge_cmd[:2] + ["--dependency=afterany:<array job>"] + merge_cmd[2:]))
+            return
+        job = subprocess.run(array, cwd=cwd, capture_output=True, text=True, check=True)
+        job_id = job.stdout.strip().split(";")[0]
+        print(f"[INFO] submitted array job {job_id} ({len(plan.shards)} tasks)")
+        merge_cmd[2:2] = [f"--dependency=afterany:{job_id}"]
+        merge_job = subprocess.run(merge_cmd, cwd=cwd, capture_output=True, text=True, check=True)
+        print(f"[INFO] merge job {merge_job.stdout.strip()} runs after it")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,795 @@
+"""
+Benchmark sweeps without nested shell loops.
+
+A Sweep declares the parameter space of one exercise, the binaries that are
+run for every point of it, and the CSV layout of the results:
+
+    Sweep(
+        "exercise_6/jacobi",
+        space=Space(N=[2048, 4096], IT=[10, 100, 1000], precision=["double", "float"])
+              .zip(D1=[8, 4, 2, 1], D2=[32, 64, 128, 256]),
+        targets=[Target("jacobi_ocl_N{N}_IT{IT}_DIM1-{D1}_DIM2-{D2}{float}_V3")],
+        columns=JACOBI_COLUMNS,
+    )
+
+{float} expands to "_float" for precision == "float" and to "" otherwise,
+matching the Makefile suffixes. Every configuration (point x target) is a
+unit of work in a bounded pool of subprocesses. Timed configurations, of
+kind "gpu" or "cpu", all go through a single worker, so no measurement
+overlaps another one (a CPU baseline next to a kernel skews both); only
+"untimed" ones (warm-ups, input generators) spread over --jobs workers
+next to them. stdout is parsed line by line while the binary runs, by the
+parser its Target names in gpubench.parsers, and the rows are appended to
+the results CSV as soon as the run finishes, which is where
+gpubench.results picks them up. Output
+that fails the parser's schema or the binary's own validation kills the
+run at once. Missing binaries, non-zero exits, timeouts, garbage output and
+failed validations never stop the sweep; each becomes one JSON line in
+<results>.errors.jsonl.
+
+How often a configuration runs is decided by gpubench.sampling: by default
+exactly `runs` times, with --rel-ci until the CI of the median of the
+sweep's metric column is narrow enough (within --min-runs, --max-runs and a
+per-configuration --budget). Why each configuration stopped is appended to
+<results>.sampling.jsonl next to its run count, median and CI, so the CSV
+layout the plot scripts read stays unchanged.
+
+Sweeps are resumable. Every finished run is journaled in
+<results>.journal.jsonl (see ResultWriter), and running the same command
+again skips what is done, drops rows that were cut off mid-write and goes
+on with the next run. SIGTERM (SLURM preemption, time limit) or
+--stop-after let the running binaries finish and exit with status 75, so
+a batch script can requeue itself; --restart starts from scratch.
+
+    python -m gpubench.sweep exercise_6/jacobi --device amd --jobs 4
+    python -m gpubench.sweep exercise_6/jacobi --rel-ci 0.02 --max-runs 30 --budget 120
+    python -m gpubench.sweep exercise_8 --bin-dir /tmp/fake --dry-run
+    python -m gpubench.sweep exercise_6/jacobi/convergence --device 2070
+
+Binaries are looked up in --bin-dir (default: the sweep's bin_dir inside the
+exercise directory) and started with the exercise directory as working
+directory, because the hosts load their .cl files relative to it. Any
+executable with the right name works, so stand-in scripts that print canned
+output are enough to test a sweep without a GPU.
+"""
+
+import argparse
+import collections
+import copy
+import csv
+import io
+import itertools
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from gpubench import parsers, provenance, trace
+from gpubench.parsers import ParseError, ValidationFailed
+from gpubench.sampling import Sampling
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TIMEOUT = 600.0
+
+KINDS = ("gpu", "cpu", "untimed")
+
+
+# -------------------------------------------------------
+# Declaring sweeps
+# -------------------------------------------------------
+
+class Space:
+    """Cartesian product of axes; axes passed to one zip() call vary together."""
+
+    def __init__(self, **axes):
+        self.groups = [{name: list(values)} for name, values in axes.items()]
+
+    def zip(self, **axes):
+        lengths = {len(v) for v in axes.values()}
+        if len(lengths) != 1:
+            raise ValueError(f"zipped axes need equal lengths: {sorted(axes)}")
+        self.groups.append({name: list(values) for name, values in axes.items()})
+        return self
+
+    def __iter__(self):
+        choices = [
+            [dict(zip(group, values)) for values in zip(*group.values())]
+            for group in self.groups
+        ]
+        for combo in itertools.product(*choices):
+            point = {}
+            for part in combo:
+                point.update(part)
+            yield point
+
+    def __len__(self):
+        n = 1
+        for group in self.groups:
+            n *= len(next(iter(group.values())))
+        return n
+
+
+class Target:
+    """
+    One binary family of a sweep.
+
+    template:  file name, formatted with the space point plus {float}
+    kind:      "gpu" or "cpu" (timed: serialized with every other timed
+               target), or "untimed" (runs in parallel)
+    parse:     name of its stdout dialect in gpubench.parsers (default: "csv"),
+               or a func(job) -> Parser
+    args:      command-line arguments of every run
+    """
+
+    def __init__(self, template, kind="gpu", parse="csv", args=()):
+        if kind not in KINDS:
+            raise ValueError(f"unknown target kind {kind!r}")
+        self.template = template
+        self.kind = kind
+        self.parser = parsers.get(parse) if isinstance(parse, str) else parse
+        self.args = list(args)
+
+    @property
+    def timed(self):
+        return self.kind != "untimed"
+
+    def binary(self, point):
+        suffix = "_float" if point.get("precision") == "float" else ""
+        return self.template.format(float=suffix, **point)
+
+
+class Sweep:
+    """
+    metric:  the column adaptive sampling watches (one series per output row)
+    name:    key in SWEEPS (default: the exercise), for a second sweep of
+             the same exercise directory
+    """
+
+    def __init__(self, exercise, space, targets, columns, runs=5, bin_dir=".",
+                 results="results/results_{device}.csv", timeout=DEFAULT_TIMEOUT,
+                 metric="elapsed_ms", name=None):
+        self.exercise = exercise
+        self.name = name or exercise
+        self.space = space
+        self.targets = list(targets)
+        self.columns = list(columns)
+        self.runs = runs
+        self.metric = metric
+        self.bin_dir = bin_dir
+        self.results = results
+        self.timeout = timeout
+
+    @property
+    def directory(self):
+        return os.path.join(REPO_ROOT, self.exercise)
+
+    def with_space(self, space):
+        """The same sweep over another space (e.g. tuned or narrowed points)."""
+        other = copy.copy(self)
+        other.space = space
+        return other
+
+    def configs(self, bin_dir=None):
+        """Every (point, target, binary path) in execution order."""
+        bin_dir = os.path.join(self.directory, bin_dir or self.bin_dir)
+        for point in self.space:
+            for target in self.targets:
+                yield point, target, os.path.join(bin_dir, target.binary(point))
+
+    def jobs(self, bin_dir=None, runs=None):
+        """Every (point, target, run) of a fixed number of runs, in execution order."""
+        runs = self.runs if runs is None else runs
+        for point, target, path in self.configs(bin_dir):
+            for run in range(1, runs + 1):
+                yield Job(self, point, target, path, run)
+
+
+class Job:
+    def __init__(self, sweep, point, target, path, run):
+        self.sweep = sweep
+        self.point = point
+        self.target = target
+        self.path = path
+        self.run = run
+
+    @property
+    def binary(self):
+        return os.path.basename(self.path)
+
+    def context(self):
+        """Column values known without running: the space point, run and host."""
+        return {"run": self.run, "host": HOST, **self.point}
+
+
+HOST = socket.gethostname()
+
+
+# -------------------------------------------------------
+# Running
+# -------------------------------------------------------
+
+class JournalError(Exception):
+    pass
+
+
+class ResultWriter:
+    """
+    Appends rows to the results CSV (header once), errors and per-configuration
+    sampling records to JSON-lines files next to it.
+
+    With journal=True every finished run is also recorded in
+    <results>.journal.jsonl, after its rows, under the same lock:
+
+        {"start": 0}                                           byte offset at creation
+        {"config": ..., "run": 3, "end": 4711, "values": [...], "seconds": ...}
+        {"config": ..., "run": 4, "error": "exit", "seconds": ...}
+        {"config": ..., "stop": "max_runs", "record": {...}}
+
+    Rows of one run are a single O_APPEND write followed by fsync, and the
+    journal line comes only after it. On open, a torn last journal line is
+    dropped and the CSV is truncated back to the last journaled "end", which
+    discards partially written rows and rows of runs that never got their
+    journal entry; those runs simply run again. `done` maps each config to
+    its journal entries, so run_config() continues where it stopped.
+
+    `env` is the environment id (gpubench.provenance) of this session. New
+    CSVs get an extra `env` column holding it; files started before that
+    keep their header, and the id is only in the journal and sampling log.
+    """
+
+    def __init__(self, path, columns, journal=True, env=None):
+        stem = os.path.splitext(path)[0]
+        self.path = path
+        self.errors_path = stem + ".errors.jsonl"
+        self.sampling_path = stem + ".sampling.jsonl"
+        self.journal_path = stem + ".journal.jsonl" if journal else None
+        self.columns = columns
+        self.env = env
+        self.done = {}
+        self.discarded = 0  # bytes of partial / unjournaled rows dropped on open
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            self._append(self.path, self._csv([columns + (["env"] if env else [])]))
+        with open(path, newline="") as f:
+            self.env_column = env is not None and "env" in next(csv.reader(f), [])
+        if journal:
+            self._recover()
+
+    @staticmethod
+    def _csv(rows):
+        buf = io.StringIO()
+        csv.writer(buf, lineterminator="\n").writerows(rows)
+        return buf.getvalue()
+
+    @staticmethod
+    def _append(path, text, sync=False):
+        """One O_APPEND write; returns the file size after it."""
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, text.encode())
+            if sync:
+                os.fsync(fd)
+            return os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+
+    def _recover(self):
+        if not os.path.exists(self.journal_path):
+            self._append(self.journal_path, json.dumps({"start": os.path.getsize(self.path)}) + "\n")
+        with open(self.journal_path, "rb") as f:
+            data = f.read()
+        good, end = 0, None
+        for line in data.splitlines(keepends=True):
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("torn line")
+                entry = json.loads(line)
+            except ValueError:
+                break
+            good += len(line)
+            if "start" in entry:
+                end = entry["start"] if end is None else end
+                continue
+            end = entry.get("end", end)
+            self.done.setdefault(entry["config"], []).append(entry)
+        if good < len(data):
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good)
+
+        size = os.path.getsize(self.path)
+        if end is None or size < end:
+            raise JournalError(f"{self.path} is shorter than its journal says "
+                               f"({size} < {end} bytes); rerun with --restart")
+        if size > end:
+            with open(self.path, "r+b") as f:
+                f.truncate(end)
+            self.discarded = size - end
+
+    def _journal(self, entry):
+        if self.journal_path:
+            self._append(self.journal_path, json.dumps(entry) + "\n", sync=True)
+
+    def rows(self, rows, config=None, run=None, values=None, seconds=None):
+        extra = [self.env] if self.env_column else []
+        text = self._csv([[row[c] for c in self.columns] + extra for row in rows])
+        with self._lock:
+            end = self._append(self.path, text, sync=self.journal_path is not None)
+            if config is not None:
+                self._journal({"config": config, "run": run, "end": end,
+                               "values": values, "seconds": seconds, "env": self.env})
+
+    def error(self, record, config=None, seconds=None):
+        with self._lock:
+            self._append(self.errors_path, json.dumps(record) + "\n")
+            if config is not None:
+                self._journal({"config": config, "run": record["run"], "error": record["kind"],
+                               "seconds": seconds})
+
+    def sampling(self, record, config=None):
+        with self._lock:
+            self._append(self.sampling_path, json.dumps(record) + "\n")
+            if config is not None:
+                self._journal({"config": config, "stop": record["stop"], "record": record})
+
+    def remove(self):
+        """Delete the results and every file next to them (a fresh start)."""
+        journal = os.path.splitext(self.path)[0] + ".journal.jsonl"
+        for path in (self.path, self.errors_path, self.sampling_path, journal):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+STDBUF = shutil.which("stdbuf") is not None
+
+
+def _command(job):
+    """argv of a run; stdbuf line-buffers the C hosts' stdout so lines arrive as printed."""
+    command = [job.path, *job.target.args]
+    return ["stdbuf", "-oL", *command] if STDBUF else command
+
+
+def run_job(job, timeout):
+    """
+    Run one binary; returns (rows, error record or None).
+
+    stdout goes through the target's parser line by line while the binary
+    runs. Output the parser rejects (kind "parse") or a failed self-check
+    (kind "validation") kills the binary right away.
+    """
+    error = {
+        "sweep": job.sweep.name,
+        "binary": job.binary,
+        "point": job.point,
+        "run": job.run,
+        "kind": None,
+    }
+    if not os.access(job.path, os.X_OK):
+        return [], dict(error, kind="missing", message=f"not an executable: {job.path}")
+
+    parser = job.target.parser(job)
+    parsed, tail, stderr = [], collections.deque(maxlen=40), []
+    failure = None
+    with trace.span(job.binary, cat="run", run=job.run):
+        t0 = time.perf_counter()
+        try:
+            proc = subprocess.Popen(_command(job), cwd=job.sweep.directory, stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE, text=True, errors="replace",
+                                    start_new_session=True)
+        except OSError as e:
+            return [], dict(error, kind="exec", message=str(e))
+
+        def kill():  # the whole process group, so no child keeps the pipes open
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+        timed_out = threading.Event()
+        timer = threading.Timer(timeout, lambda: (timed_out.set(), kill()))
+        drain = threading.Thread(target=lambda: stderr.append(proc.stderr.read()), daemon=True)
+        timer.start()
+        drain.start()
+        try:
+            for line in proc.stdout:
+                tail.append(line)
+                try:
+                    parsed += parser.feed(line)
+                except ParseError as e:
+                    failure = e
+                    kill()
+                    break
+        except BaseException:  # e.g. Ctrl-C: the binary is in its own session
+            kill()
+            raise
+        finally:
+            proc.stdout.close()
+            proc.wait()
+            timer.cancel()
+            drain.join()
+        seconds = time.perf_counter() - t0
+
+    stdout = "".join(tail)[-2000:]
+    if failure is not None:  # killed by us, whatever the exit status says
+        kind = "validation" if isinstance(failure, ValidationFailed) else "parse"
+        return [], dict(error, kind=kind, message=str(failure), seconds=seconds, stdout=stdout)
+    if timed_out.is_set():
+        return [], dict(error, kind="timeout", seconds=timeout)
+    if proc.returncode != 0:
+        return [], dict(error, kind="exit", returncode=proc.returncode, seconds=seconds,
+                        stderr="".join(stderr)[-2000:])
+    try:
+        parsed += parser.close()
+    except ParseError as e:
+        return [], dict(error, kind="parse", message=str(e), stdout=stdout)
+
+    context = job.context()
+    rows = [{**context, **row} for row in parsed]
+    missing = [c for c in job.sweep.columns if c not in rows[0]]
+    if missing:
+        return [], dict(error, kind="parse", message=f"missing columns {missing}")
+    return rows, None
+
+
+def run_config(sweep, point, target, path, sampling, timeout, writer, key=None,
+               interrupted=None):
+    """
+    Run one binary until `sampling` says stop, streaming rows and errors to
+    `writer`; returns (sampling record, error records). A missing binary
+    stops at once, other failures count as runs and the configuration goes on.
+
+    Runs already in the writer's journal under `key` (default: the binary
+    name) are not repeated: a finished configuration returns its journaled
+    record, an unfinished one continues with the next run. Missing binaries
+    are not journaled, so a resumed sweep picks them up once they are built.
+    When interrupted() turns true no further run starts and the record has
+    stop == "interrupted" (nothing is journaled for it).
+    """
+    key = key or os.path.basename(path)
+    prior = writer.done.get(key, [])
+    for entry in prior:
+        if "stop" in entry:
+            return dict(entry["record"], resumed=True, skipped=True), []
+
+    series = []  # metric values per output row (e.g. sequential, opencl)
+    errors = []
+    run, stop, elapsed, failed = 0, None, 0.0, 0
+    for entry in prior:
+        run = max(run, entry["run"])
+        elapsed += entry.get("seconds") or 0.0
+        if "error" in entry:
+            failed += 1
+        for i, value in enumerate(entry.get("values") or []):
+            if i == len(series):
+                series.append([])
+            if value is not None:
+                series[i].append(value)
+    if prior:
+        stop = sampling.stop(series, run, elapsed)
+
+    while stop is None:
+        if interrupted is not None and interrupted():
+            stop = "interrupted"
+            break
+        run += 1
+        job = Job(sweep, point, target, path, run)
+        t0 = time.perf_counter()
+        rows, error = run_job(job, timeout)
+        seconds = time.perf_counter() - t0
+        elapsed += seconds
+        if error is not None:
+            errors.append(error)
+            failed += 1
+            if error["kind"] == "missing":  # not journaled: retried once it is built
+                writer.error(error)
+                stop = "missing"
+                break
+            writer.error(error, key, round(seconds, 6))
+        else:
+            values = []
+            for i, row in enumerate(rows):
+                if i == len(series):
+                    series.append([])
+                try:
+                    values.append(float(row[sweep.metric]))
+                    series[i].append(values[-1])
+                except (KeyError, ValueError):
+                    values.append(None)
+            writer.rows(rows, key, run, values, round(seconds, 6))
+        stop = sampling.stop(series, run, elapsed)
+
+    record = {
+        "sweep": sweep.name,
+        "binary": os.path.basename(path),
+        "point": point,
+        "host": HOST,
+        "env": writer.env,
+        "runs": run,
+        "failed": failed,
+        "seconds": round(elapsed, 3),
+        "stop": stop,
+        "metric": sweep.metric,
+        "series": sampling.summary(series),
+    }
+    if stop != "interrupted":
+        writer.sampling(record, key if stop != "missing" else None)
+    return dict(record, resumed=bool(prior), skipped=False), errors
+
+
+# set by SIGTERM (e.g. SLURM preemption or the end of the time limit)
+_terminate = threading.Event()
+
+
+def run_sweep(sweep, out, bin_dir=None, runs=None, jobs=1, timeout=None, verbose=True,
+              sampling=None, deadline=None, restart=False, select=None):
+    """
+    Run every configuration of `sweep`, streaming rows to `out`; returns the
+    counts. sampling defaults to exactly `runs` (or sweep.runs) runs each.
+    Work recorded in the journal of `out` is skipped unless restart=True;
+    after time.monotonic() passes `deadline` (or on SIGTERM) no new run starts.
+    `select` limits the sweep to these binary names (one shard, gpubench.shard).
+    """
+    if restart:
+        ResultWriter(out, sweep.columns, journal=False).remove()
+    env = provenance.record(os.path.dirname(os.path.abspath(out)), sweep.directory)
+    if verbose:
+        print(f"[INFO] Environment {env} ({provenance.FILENAME} next to the results)")
+    writer = ResultWriter(out, sweep.columns, env=env)
+    if writer.discarded and verbose:
+        print(f"[INFO] Discarded {writer.discarded} bytes of unjournaled rows in {out}")
+    timeout = sweep.timeout if timeout is None else timeout
+    sampling = sampling or Sampling.fixed(sweep.runs if runs is None else runs)
+    counts = {"total": 0, "ok": 0, "failed": 0, "stops": {}, "skipped": 0}
+
+    def interrupted():
+        return _terminate.is_set() or (deadline is not None and time.monotonic() > deadline)
+
+    def one(point, target, path):
+        return run_config(sweep, point, target, path, sampling, timeout, writer,
+                          interrupted=interrupted)
+
+    configs = [(point, target, path) for point, target, path in sweep.configs(bin_dir)
+               if select is None or os.path.basename(path) in select]
+    # parsers with a reference to compute (JacobiChecksum) do it now, outside
+    # the timed window of any run
+    for target in sweep.targets:
+        prepare = getattr(target.parser, "prepare", None)
+        points = [point for point, t, path in configs
+                  if t is target and os.access(path, os.X_OK)]
+        if prepare is not None and points:
+            if verbose:
+                print(f"[INFO] Preparing references of {target.template} ({len(points)} points)")
+            with trace.span(target.template, cat="prepare"):
+                prepare(points)
+
+    # one slot for every timed target, GPU or CPU: measurements never overlap
+    with ThreadPoolExecutor(max_workers=1) as timed_pool, \
+            ThreadPoolExecutor(max_workers=max(1, jobs)) as untimed_pool:
+        futures = [
+            (timed_pool if target.timed else untimed_pool).submit(one, point, target, path)
+            for point, target, path in configs
+        ]
+        for future in futures:
+            record, errors = future.result()
+            counts["skipped"] += record["skipped"]
+            counts["total"] += record["runs"]
+            counts["ok"] += record["runs"] - record["failed"]
+            counts["failed"] += record["failed"]
+            counts["stops"][record["stop"]] = counts["stops"].get(record["stop"], 0) + 1
+            if not verbose:
+                continue
+            for error in errors:
+                print(f"[ERROR] {error['binary']} run {error['run']}: {error['kind']}"
+                      + (f" ({error['message']})" if "message" in error else ""))
+            if sampling.adaptive and record["stop"] not in ("missing", "interrupted"):
+                widths = [s["rel_ci"] for s in record["series"] if "rel_ci" in s]
+                width = f", CI +/-{max(widths):.1%}" if widths else ""
+                print(f"[INFO] {record['binary']}: {record['runs']} run(s), "
+                      f"{record['stop']}{width}")
+    return counts
+
+
+# -------------------------------------------------------
+# Sweeps of the exercises
+# -------------------------------------------------------
+
+JACOBI_COLUMNS = ["version", "precision", "N", "IT",
+                  "LOCAL_WORKGROUP_DIM_1", "LOCAL_WORKGROUP_DIM_2", "elapsed_ms"]
+
+CONVERGENCE_COLUMNS = ["mode", "precision", "N", "iterations", "residual", "time_ms"]
+
+SWEEPS = {
+    s.name: s
+    for s in [
+        Sweep(
+            "exercise_2",
+            space=Space(N=[1024, 2048], IT=[10, 100, 1000], precision=["double", "float"]),
+            targets=[
+                Target("jacobi_N{N}_IT{IT}{float}", kind="cpu", parse="jacobi"),
+                Target("jacobi_omp_N{N}_IT{IT}{float}", kind="cpu", parse="jacobi"),
+                Target("jacobi_ocl_N{N}_IT{IT}{float}_V1", parse="jacobi"),
+                Target("jacobi_ocl_N{N}_IT{IT}{float}_V2", parse="jacobi"),
+            ],
+            columns=["mode", "precision", "N", "IT", "time_ms", "checksum"],
+            runs=1,
+            metric="time_ms",
+            results="results_{device}.csv",
+        ),
+        Sweep(
+            "exercise_4",
+            space=Space(N=[2048, 4096], IT=[10, 100, 1000], precision=["double", "float"])
+            .zip(D1=[8, 4, 2, 2, 1], D2=[32, 64, 128, 256, 256]),
+            targets=[
+                Target("jacobi_ocl_N{N}_IT{IT}_DIM1-{D1}_DIM2-{D2}{float}_V2"),
+                Target("jacobi_ocl_N{N}_IT{IT}_DIM1-{D1}_DIM2-{D2}{float}_V3"),
+            ],
+            columns=JACOBI_COLUMNS,
+        ),
+        Sweep(
+            "exercise_6/jacobi",
+            space=Space(N=[2048, 4096], IT=[10, 100, 1000], precision=["double", "float"])
+            .zip(D1=[8, 4, 2, 1], D2=[32, 64, 128, 256]),
+            targets=[Target("jacobi_ocl_N{N}_IT{IT}_DIM1-{D1}_DIM2-{D2}{float}_V3")],
+            columns=JACOBI_COLUMNS,
+            bin_dir="binaries",
+        ),
+        Sweep(
+            "exercise_6/jacobi",
+            name="exercise_6/jacobi/convergence",
+            space=Space(N=[1024, 2048], IT=[1000000], TOL=["1e-2"], precision=["double", "float"],
+                        D1=[8], D2=[32]),
+            targets=[Target("jacobi_ocl_N{N}_IT{IT}_TOL{TOL}_DIM1-{D1}_DIM2-{D2}{float}_V3")],
+            columns=CONVERGENCE_COLUMNS,
+            runs=3,
+            bin_dir="binaries",
+            results="results/convergence_{device}.csv",
+            metric="time_ms",
+        ),
+        Sweep(
+            "exercise_7",
+            space=Space(),
+            targets=[
+                Target("auto_levels", kind="cpu", parse="auto_levels",
+                       args=["earth-huge.png", "auto_levels_benchmark_out_serial.png"]),
+                Target("auto_levels_cl", parse="auto_levels",
+                       args=["earth-huge.png", "auto_levels_benchmark_out_ocl.png"]),
+            ],
+            columns=["impl", "elapsed_ms", "time_ia", "time_ib"],
+            runs=10,
+            results="results/auto_levels_results_{device}.csv",
+        ),
+        Sweep(
+            "exercise_8",
+            space=Space(N=[1024, 1024**2, 1024**2 * 512], type=["int"]),
+            targets=[
+                Target("scan_N{N}", parse="scan"),
+                Target("scan_opt_N{N}", parse="scan_opt"),
+            ],
+            columns=["run", "impl", "elapsed_ms", "N", "type", "host"],
+            runs=10,
+            results="results/scan_benchmark_int_{device}.csv",
+        ),
+        Sweep(
+            "exercise_10/ex_1",
+            space=Space(N=[512, 1024, 2000, 2048], precision=["float", "double"]),
+            targets=[Target("matrix_mul_N{N}_{precision}")],
+            columns=["precision", "N", "time_ms"],
+            runs=3,
+            results="../results/matrix_mul_results_{device}.csv",
+            metric="time_ms",
+        ),
+        Sweep(
+            "exercise_10/optimized",
+            space=Space(N=[512, 1024, 2000, 2048], precision=["float", "double"], TS=[16]),
+            targets=[Target("matrix_mul_N{N}_{precision}_TS{TS}")],
+            columns=["precision", "N", "time_ms", "gflops"],
+            runs=3,
+            results="../results/matrix_mul_results_{device}_opt.csv",
+            metric="time_ms",
+        ),
+    ]
+}
+
+
+def resolve(exercise):
+    key = os.path.relpath(os.path.abspath(exercise), REPO_ROOT).replace(os.sep, "/")
+    if key not in SWEEPS:
+        key = exercise.strip("/")
+    if key not in SWEEPS:
+        raise SystemExit(f"no sweep for '{exercise}' (known: {', '.join(SWEEPS)})")
+    return SWEEPS[key]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a benchmark sweep and collect CSV results")
+    parser.add_argument("exercise", help=f"one of {', '.join(SWEEPS)}")
+    parser.add_argument("--device", default=HOST.split(".")[0],
+                        help="device label used in the results file name (default: host name)")
+    parser.add_argument("-o", "--output", help="results CSV (default: the exercise's results file)")
+    parser.add_argument("--bin-dir", help="directory holding the binaries")
+    parser.add_argument("--runs", type=int, help="runs per binary (default: per sweep)")
+    parser.add_argument("--rel-ci", type=float,
+                        help="repeat until the 95%% CI half-width of the median is below this "
+                             "fraction of it (e.g. 0.02)")
+    parser.add_argument("--min-runs", type=int, default=3, help="adaptive: at least this many runs")
+    parser.add_argument("--max-runs", type=int, default=50, help="adaptive: at most this many runs")
+    parser.add_argument("--budget", type=float,
+                        help="adaptive: seconds of wall time per configuration")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="concurrent processes for untimed targets; timed ones run one at a time")
+    parser.add_argument("--timeout", type=float, help="seconds before a run is killed")
+    parser.add_argument("--tuned", action="store_true",
+                        help="use the device's tuned workgroup/tile sizes (gpubench.autotune)")
+    parser.add_argument("--restart", action="store_true",
+                        help="delete the results and their journal instead of resuming")
+    parser.add_argument("--stop-after", type=float, metavar="SECONDS",
+                        help="start no new run after this many seconds (exit status 75)")
+    parser.add_argument("--shard", type=int, metavar="I",
+                        help="run only shard I of --shard-plan (e.g. $SLURM_ARRAY_TASK_ID)")
+    parser.add_argument("--shard-plan", metavar="PATH", help="plan.json from gpubench.shard")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="list the binaries that would run and whether they exist")
+    parser.add_argument("--trace", metavar="PREFIX",
+                        help="record a span per run to PREFIX.jsonl and PREFIX.trace.json")
+    args = parser.parse_args(argv)
+    if args.trace:
+        trace.enable(args.trace)
+
+    sweep = resolve(args.exercise)
+    if args.tuned:
+        from gpubench import autotune
+        sweep = autotune.tuned(sweep, args.device)
+    out = args.output or os.path.join(sweep.directory, sweep.results.format(device=args.device))
+    select = None
+    if args.shard is not None:
+        from gpubench import shard
+        plan = shard.Plan.load(args.shard_plan or shard.plan_path(out))
+        select = set(plan.shards[args.shard])
+        out = plan.output(args.shard)
+        print(f"[INFO] Shard {args.shard}/{len(plan.shards)}: {len(select)} configurations")
+
+    if args.dry_run:
+        seen = set()
+        for job in sweep.jobs(args.bin_dir, runs=1):
+            if job.path in seen or (select is not None and job.binary not in select):
+                continue
+            seen.add(job.path)
+            state = "ok" if os.access(job.path, os.X_OK) else "MISSING"
+            print(f"[{state:>7}] {job.target.kind} {job.binary}")
+        print(f"[INFO] {len(seen)} binaries, {len(sweep.space)} points, results -> {out}")
+        return
+
+    sampling = None
+    if args.rel_ci is not None or args.budget is not None:
+        sampling = Sampling(args.min_runs, args.max_runs, args.rel_ci, args.budget)
+
+    deadline = time.monotonic() + args.stop_after if args.stop_after else None
+    signal.signal(signal.SIGTERM, lambda signum, frame: _terminate.set())
+
+    print(f"[INFO] Sweep {sweep.name}: {len(sweep.space)} points x "
+          f"{len(sweep.targets)} target(s) -> {out}")
+    try:
+        counts = run_sweep(sweep, out, args.bin_dir, args.runs, args.jobs, args.timeout,
+                           sampling=sampling, deadline=deadline, restart=args.restart,
+                           select=select)
+    except JournalError as e:
+        raise SystemExit(f"[ERROR] {e}")
+    stops = ", ".join(f"{n} {reason}" for reason, n in sorted(counts["stops"].items()))
+    print(f"[SUMMARY] Total runs: {counts['total']}, successful: {counts['ok']}, "
+          f"failed: {counts['failed']}; configurations stopped: {stops}"
+          + (f"; {counts['skipped']} already done" if counts["skipped"] else ""))
+    if counts["stops"].get("interrupted"):
+        print("[INFO] Sweep interrupted; run the same command again to resume")
+        raise SystemExit(75)
+    if counts["failed"]:
+        print(f"  Errors logged to: {os.path.splitext(out)[0]}.errors.jsonl")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
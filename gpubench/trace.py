@@ -0,0 +1,203 @@
+"""
+Timing and memory spans for the analysis pipeline.
+
+    from gpubench import trace
+
+    with trace.span("load", files=len(FILES)):
+        df = pd.concat(...)
+
+Spans are free until tracing is enabled, either by trace.enable(prefix) or by
+the --trace PREFIX option every plot script understands. Each finished span
+records
+
+  wall_s       wall-clock time
+  cpu_s        CPU time of the process
+  rss_peak_mb  peak resident set size of the process so far (getrusage)
+  py_peak_mb   peak Python allocation inside the span above the level at
+               entry, nested spans included; only with memory=True
+               (--trace-memory), since tracemalloc slows matplotlib down
+               by about an order of magnitude
+
+and is appended to <prefix>.jsonl as one JSON object per line. When the
+process exits the lines are converted into <prefix>.trace.json, which opens
+in chrome://tracing or ui.perfetto.dev. Spans of forked --jobs workers land
+in the same files with their own pid.
+
+The figure builder and the dataflow graph open spans on their own: one per
+plot call and figure (cat "plot" / "figure") and one per computed node
+(cat = node stage). gpubench.sweep --trace records one span per run (cat
+"run"); spans nest per thread, so runs of the parallel pools do not become
+each other's children.
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_tracer = None
+
+
+def enable(prefix, memory=False):
+    """Start writing spans to <prefix>.jsonl / <prefix>.trace.json."""
+    global _tracer
+    if _tracer is None:
+        _tracer = _Tracer(prefix, memory)
+    return _tracer
+
+
+def enabled():
+    return _tracer is not None
+
+
+class _Tracer:
+    def __init__(self, prefix, memory):
+        self.jsonl_path = prefix + ".jsonl"
+        self.chrome_path = prefix + ".trace.json"
+        self.pid = os.getpid()
+        self.t0 = time.perf_counter()
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(prefix)), exist_ok=True)
+        open(self.jsonl_path, "w").close()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        atexit.register(self.finish)
+
+    @property
+    def stack(self):
+        """Open spans of the calling thread, innermost last."""
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def emit(self, record):
+        line = json.dumps(record, default=str) + "\n"
+        # single O_APPEND write per span, so forked workers do not interleave
+        fd = os.open(self.jsonl_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+        try:
+            os.write(fd, line.encode())
+        finally:
+            os.close(fd)
+
+    def finish(self):
+        if os.getpid() != self.pid:
+            return
+        records = read_spans(self.jsonl_path)
+        with open(self.chrome_path, "w") as f:
+            json.dump(chrome_trace(records), f)
+        print(f"[TRACE] {len(records)} span(s) -> {self.jsonl_path}, {self.chrome_path}")
+        for rec in sorted(records, key=lambda r: -r["wall_s"])[:5]:
+            print(f"  {rec['wall_s']:8.3f} s  {rec['cat']:<10} {rec['name']}")
+
+
+class span:
+    """Context manager timing one stage; extra keyword args are stored with it."""
+
+    def __init__(self, name, cat="stage", **args):
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self._tracer = None
+
+    def __enter__(self):
+        tracer = _tracer
+        if tracer is None:
+            return self
+        self._tracer = tracer
+        self._seen_peak = 0
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if tracer.stack:
+                parent = tracer.stack[-1]
+                parent._seen_peak = max(parent._seen_peak, peak)
+            tracemalloc.reset_peak()
+            self._base = current
+        tracer.stack.append(self)
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        tracer = self._tracer
+        if tracer is None:
+            return False
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        if self in tracer.stack:  # also drops children left open by an exception
+            del tracer.stack[tracer.stack.index(self):]
+
+        record = {
+            "name": self.name,
+            "cat": self.cat,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "ts_us": round((self._wall - tracer.t0) * 1e6),
+            "depth": len(tracer.stack),
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "rss_peak_mb": _rss_peak_mb(),
+            "py_peak_mb": None,
+            "error": exc[0].__name__ if exc[0] else None,
+            "args": self.args,
+        }
+        if tracemalloc.is_tracing():
+            _, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self._seen_peak)
+            record["py_peak_mb"] = max(peak - self._base, 0) / 2**20
+            if tracer.stack:
+                parent = tracer.stack[-1]
+                parent._seen_peak = max(parent._seen_peak, peak)
+        tracer.emit(record)
+        self._tracer = None
+        return False
+
+
+def _rss_peak_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+
+
+# -------------------------------------------------------
+# Output formats
+# -------------------------------------------------------
+
+def read_spans(path):
+    records = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+def chrome_trace(records):
+    """Chrome trace event format ("X" complete events, times in microseconds)."""
+    events = []
+    for rec in records:
+        args = dict(rec.get("args") or {})
+        for field in ("cpu_s", "rss_peak_mb", "py_peak_mb", "error"):
+            if rec.get(field) is not None:
+                args[field] = rec[field]
+        events.append({
+            "name": rec["name"],
+            "cat": rec["cat"],
+            "ph": "X",
+            "ts": rec["ts_us"],
+            "dur": round(rec["wall_s"] * 1e6),
+            "pid": rec["pid"],
+            "tid": rec["tid"],
+            "args": args,
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
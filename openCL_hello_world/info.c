@@ -9,6 +9,30 @@ static void print_platform_string(cl_platform_id platform, cl_platform_info para
 	printf("  %s = %s\n", label, buffer);
 }
 
+static void print_device_string(cl_device_id device, cl_device_info param, const char* label) {
+	char buffer[10240] = {0};
+	CLU_ERRCHECK_MSG(clGetDeviceInfo(device, param, sizeof(buffer), buffer, NULL), "clGetDeviceInfo %s", label);
+	printf("    %s = %s\n", label, buffer);
+}
+
+static void print_device_uint(cl_device_id device, cl_device_info param, const char* label) {
+	cl_uint value = 0;
+	CLU_ERRCHECK_MSG(clGetDeviceInfo(device, param, sizeof(value), &value, NULL), "clGetDeviceInfo %s", label);
+	printf("    %s = %u\n", label, value);
+}
+
+static void print_device_ulong(cl_device_id device, cl_device_info param, const char* label) {
+	cl_ulong value = 0;
+	CLU_ERRCHECK_MSG(clGetDeviceInfo(device, param, sizeof(value), &value, NULL), "clGetDeviceInfo %s", label);
+	printf("    %s = %llu\n", label, (unsigned long long)value);
+}
+
+static void print_device_size(cl_device_id device, cl_device_info param, const char* label) {
+	size_t value = 0;
+	CLU_ERRCHECK_MSG(clGetDeviceInfo(device, param, sizeof(value), &value, NULL), "clGetDeviceInfo %s", label);
+	printf("    %s = %zu\n", label, value);
+}
+
 int main(void) {
 	cl_uint platform_count = 0;
 	CLU_ERRCHECK_MSG(clGetPlatformIDs(0, NULL, &platform_count), "clGetPlatformIDs (count)");
@@ -39,6 +63,31 @@ int main(void) {
 		print_platform_string(platforms[i], CL_PLATFORM_NAME, "NAME");
 		print_platform_string(platforms[i], CL_PLATFORM_VENDOR, "VENDOR");
 		print_platform_string(platforms[i], CL_PLATFORM_EXTENSIONS, "EXTENSIONS");
+
+		if(device_count == 0U) {
+			continue;
+		}
+		cl_device_id* devices = (cl_device_id*)malloc(device_count * sizeof(*devices));
+		if(devices == NULL) {
+			fprintf(stderr, "Failed to allocate memory for %u devices.\n", device_count);
+			free(platforms);
+			return EXIT_FAILURE;
+		}
+		CLU_ERRCHECK_MSG(clGetDeviceIDs(platforms[i], CL_DEVICE_TYPE_ALL, device_count, devices, NULL), "clGetDeviceIDs (list)");
+
+		for(cl_uint j = 0; j < device_count; ++j) {
+			printf("  Device %u:\n", j);
+			print_device_string(devices[j], CL_DEVICE_NAME, "NAME");
+			print_device_string(devices[j], CL_DEVICE_VENDOR, "VENDOR");
+			print_device_string(devices[j], CL_DEVICE_VERSION, "VERSION");
+			print_device_string(devices[j], CL_DRIVER_VERSION, "DRIVER_VERSION");
+			print_device_uint(devices[j], CL_DEVICE_MAX_COMPUTE_UNITS, "MAX_COMPUTE_UNITS");
+			print_device_uint(devices[j], CL_DEVICE_MAX_CLOCK_FREQUENCY, "MAX_CLOCK_FREQUENCY");
+			print_device_ulong(devices[j], CL_DEVICE_GLOBAL_MEM_SIZE, "GLOBAL_MEM_SIZE");
+			print_device_ulong(devices[j], CL_DEVICE_LOCAL_MEM_SIZE, "LOCAL_MEM_SIZE");
+			print_device_size(devices[j], CL_DEVICE_MAX_WORK_GROUP_SIZE, "MAX_WORK_GROUP_SIZE");
+		}
+		free(devices);
 	}
 
 	free(platforms);
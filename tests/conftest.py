@@ -0,0 +1,32 @@
+import os
+import stat
+
+import pytest
+
+
+def write_stand_in(directory, name, body):
+    """An executable shell script `name` in directory running `body`."""
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        f.write("#!/bin/sh\n" + body + "\n")
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+    return path
+
+
+# output of scan.c / scan_opt that gpubench.parsers accepts
+SCAN = 'echo "Sequential Time: 2.5 ms"; echo "OpenCL Time: 0.5 ms"; echo "PASSED: ok"'
+SCAN_OPT = 'echo "OpenCL Time: 0.25 ms"; echo "PASSED: ok"'
+
+
+@pytest.fixture
+def exercise_8_bins(tmp_path):
+    """Stand-ins for every binary of the exercise_8 sweep, in tmp_path/bin."""
+    from gpubench import sweep
+
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    s = sweep.SWEEPS["exercise_8"]
+    for point in s.space:
+        write_stand_in(bin_dir, s.targets[0].binary(point), SCAN)
+        write_stand_in(bin_dir, s.targets[1].binary(point), SCAN_OPT)
+    return str(bin_dir)
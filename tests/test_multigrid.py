@@ -0,0 +1,15 @@
+import pytest
+
+from gpubench.multigrid import Multigrid
+
+
+@pytest.mark.parametrize("N", [66, 130, 1000, 1024, 2048])
+def test_vcycle_reduction(N):
+    """Every V-cycle reduces the residual by at least 5x, also with an even number of interior points."""
+    mg = Multigrid(N, "double")
+    residuals = [mg.residual()]
+    for _ in range(8):
+        mg.cycle()
+        residuals.append(mg.residual())
+    rates = [b / a for a, b in zip(residuals, residuals[1:])]
+    assert max(rates) < 0.2, rates
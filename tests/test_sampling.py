@@ -0,0 +1,14 @@
+from gpubench.sampling import Sampling
+
+
+def test_converged_on_the_last_allowed_run():
+    sampling = Sampling(min_runs=3, max_runs=5, rel_ci=0.05)
+    assert sampling.stop([[1.0, 1.2, 0.8, 1.1]], 4, 4.0) is None
+    assert sampling.stop([[1.0] * 5], 5, 5.0) == "converged"
+    assert sampling.stop([[1.0, 1.2, 0.8, 1.1, 0.9]], 5, 5.0) == "max_runs"
+
+
+def test_fixed_runs():
+    sampling = Sampling.fixed(3)
+    assert sampling.stop([[1.0, 1.0]], 2, 2.0) is None
+    assert sampling.stop([[1.0] * 3], 3, 3.0) == "max_runs"
@@ -0,0 +1,26 @@
+import json
+
+from gpubench import shard
+
+
+def local(out, bin_dir, shards):
+    shard.main(["local", "exercise_8", "--shards", str(shards), "--workers", str(shards),
+                "--bin-dir", bin_dir, "--runs", "2", "-o", str(out), "--replan"])
+    journal = []
+    for line in out.with_suffix(".journal.jsonl").read_text().splitlines():
+        entry = json.loads(line)
+        # wall times differ from run to run
+        entry.pop("seconds", None)
+        entry.get("record", {}).pop("seconds", None)
+        journal.append(entry)
+    return out.read_bytes(), journal
+
+
+def test_merge_does_not_depend_on_shard_count(tmp_path, exercise_8_bins):
+    out = tmp_path / "results" / "scan.csv"
+    csv_1, journal_1 = local(out, exercise_8_bins, 1)
+    csv_3, journal_3 = local(out, exercise_8_bins, 3)
+    assert len(list((out.parent / "shards" / "scan").glob("shard-*.csv"))) == 3
+    assert csv_3 == csv_1
+    assert journal_3 == journal_1
+    assert len(journal_1) == 1 + 6 * 2 + 6  # start, runs, stops
@@ -0,0 +1,213 @@
+import csv
+import time
+
+import pytest
+
+from conftest import write_stand_in
+from gpubench import shard, sweep
+from gpubench.sweep import Job, Space, Sweep, Target
+
+COLUMNS = ["impl", "elapsed_ms"]
+
+
+def make_sweep(*targets, space=None, **options):
+    return Sweep("exercise_8", space=space or Space(), targets=targets, columns=COLUMNS,
+                 runs=1, **options)
+
+
+def job(tmp_path, name, body=None, target=None):
+    """Job of one stand-in (missing if body is None) of a one-target sweep."""
+    target = target or Target(name, parse="csv")
+    path = str(tmp_path / name)
+    if body is not None:
+        write_stand_in(tmp_path, name, body)
+    return Job(make_sweep(target), {}, target, path, 1)
+
+
+def read_csv(path):
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+# -------------------------------------------------------
+# Targets
+# -------------------------------------------------------
+
+def test_target_float_suffix():
+    target = Target("jacobi_N{N}_IT{IT}{float}_V{V}")
+    assert target.binary({"N": 64, "IT": 10, "V": 2, "precision": "float"}) == "jacobi_N64_IT10_float_V2"
+    assert target.binary({"N": 64, "IT": 10, "V": 2, "precision": "double"}) == "jacobi_N64_IT10_V2"
+    assert target.binary({"N": 64, "IT": 10, "V": 2}) == "jacobi_N64_IT10_V2"
+
+
+def test_target_kinds():
+    assert Target("a").timed and Target("a", kind="cpu").timed
+    assert not Target("a", kind="untimed").timed
+    with pytest.raises(ValueError):
+        Target("a", kind="fpga")
+
+
+# -------------------------------------------------------
+# run_job
+# -------------------------------------------------------
+
+def test_run_job_rows(tmp_path):
+    rows, error = sweep.run_job(job(tmp_path, "ok", 'echo "opencl,1.5"'), timeout=10)
+    assert error is None
+    assert [(r["impl"], r["elapsed_ms"]) for r in rows] == [("opencl", "1.5")]
+
+
+@pytest.mark.parametrize("name, body, kind", [
+    ("missing", None, "missing"),
+    ("exit", 'echo "opencl,1.5"; exit 3', "exit"),
+    ("garbage", "printf 'opencl,\\001\\000\\n'", "parse"),
+    ("no_rows", 'echo "hello"', "parse"),
+    ("bad_value", 'echo "opencl,fast"', "parse"),
+])
+def test_run_job_errors(tmp_path, name, body, kind):
+    rows, error = sweep.run_job(job(tmp_path, name, body), timeout=10)
+    assert rows == []
+    assert error["kind"] == kind
+    if kind == "exit":
+        assert error["returncode"] == 3
+
+
+def test_run_job_timeout(tmp_path):
+    t0 = time.monotonic()
+    rows, error = sweep.run_job(job(tmp_path, "slow", "sleep 30"), timeout=0.5)
+    assert rows == [] and error["kind"] == "timeout"
+    assert time.monotonic() - t0 < 10  # killed, not waited for
+
+
+def test_run_job_validation(tmp_path):
+    target = Target("scan", parse="scan")
+    body = 'echo "Sequential Time: 1 ms"; echo "FAILED: off by one"; sleep 30'
+    t0 = time.monotonic()
+    rows, error = sweep.run_job(job(tmp_path, "scan", body, target), timeout=60)
+    assert rows == [] and error["kind"] == "validation"
+    assert "FAILED" in error["message"]
+    assert time.monotonic() - t0 < 10  # killed on the failing line
+
+
+# -------------------------------------------------------
+# Scheduling
+# -------------------------------------------------------
+
+def test_timed_targets_never_overlap(tmp_path):
+    log = tmp_path / "log"
+    body = (f'echo "start $(date +%s.%N)" >> {log}; sleep 0.2; '
+            f'echo "end $(date +%s.%N)" >> {log}; echo "opencl,1.0"')
+    targets = [Target("gpu_{i}"), Target("cpu_{i}", kind="cpu"), Target("cpu2_{i}", kind="cpu")]
+    for target in targets:
+        for i in range(2):
+            write_stand_in(tmp_path, target.binary({"i": i}), body)
+    s = make_sweep(*targets, space=Space(i=[0, 1]))
+    counts = sweep.run_sweep(s, str(tmp_path / "out.csv"), bin_dir=str(tmp_path), jobs=4,
+                             verbose=False)
+    assert counts["ok"] == 6
+    events = [line.split() for line in log.read_text().splitlines()]
+    events.sort(key=lambda e: float(e[1]))
+    assert [e[0] for e in events] == ["start", "end"] * 6
+
+
+def test_untimed_targets_run_in_parallel(tmp_path):
+    # each stand-in only succeeds if the other one is running at the same time
+    def body(me, other):
+        return (f"touch {tmp_path}/{me}.up; i=0; "
+                f"while [ ! -e {tmp_path}/{other}.up ]; do "
+                f"i=$((i+1)); [ $i -gt 100 ] && exit 1; sleep 0.05; done; "
+                f'echo "opencl,1.0"')
+    write_stand_in(tmp_path, "a", body("a", "b"))
+    write_stand_in(tmp_path, "b", body("b", "a"))
+    s = make_sweep(Target("a", kind="untimed"), Target("b", kind="untimed"))
+    counts = sweep.run_sweep(s, str(tmp_path / "out.csv"), bin_dir=str(tmp_path), jobs=2,
+                             verbose=False)
+    assert counts["ok"] == 2 and counts["failed"] == 0
+
+
+# -------------------------------------------------------
+# Command line
+# -------------------------------------------------------
+
+def test_stop_after_exits_75_and_resumes(tmp_path, exercise_8_bins):
+    out = str(tmp_path / "results" / "scan.csv")
+    argv = ["exercise_8", "--bin-dir", exercise_8_bins, "-o", out, "--runs", "2"]
+    with pytest.raises(SystemExit) as stopped:
+        sweep.main(argv + ["--stop-after", "1e-9"])
+    assert stopped.value.code == 75
+    assert read_csv(out) == []
+
+    sweep.main(argv)
+    rows = read_csv(out)
+    assert len(rows) == 3 * 2 * 2 + 3 * 2  # scan: 2 rows per run, scan_opt: 1
+
+    sweep.main(argv)  # everything journaled: nothing runs again
+    assert read_csv(out) == rows
+
+
+def test_shard_local_then_plain_rerun(tmp_path, exercise_8_bins, capsys):
+    out = str(tmp_path / "results" / "scan.csv")
+    shard.main(["local", "exercise_8", "--shards", "2", "--bin-dir", exercise_8_bins,
+                "--runs", "2", "-o", out])
+    with open(out, "rb") as f:
+        merged = f.read()
+    assert len(read_csv(out)) == 18
+    capsys.readouterr()
+
+    sweep.main(["exercise_8", "--bin-dir", exercise_8_bins, "-o", out, "--runs", "2"])
+    assert "failed: 0; configurations stopped: 6 max_runs; 6 already done" \
+        in capsys.readouterr().out
+    with open(out, "rb") as f:
+        assert f.read() == merged
+
+
+# -------------------------------------------------------
+# Crash recovery
+# -------------------------------------------------------
+
+def write_runs(path, runs):
+    writer = sweep.ResultWriter(path, COLUMNS)
+    for run in range(1, runs + 1):
+        writer.rows([{"impl": "opencl", "elapsed_ms": str(run)}], "a", run, [float(run)], 0.1)
+    return writer
+
+
+def test_recover_torn_journal_line(tmp_path):
+    path = str(tmp_path / "out.csv")
+    journal = tmp_path / "out.journal.jsonl"
+    write_runs(path, 2)
+    intact = journal.read_bytes()
+    with open(journal, "ab") as f:
+        f.write(b'{"config": "a", "run": 3, "en')
+
+    writer = sweep.ResultWriter(path, COLUMNS)
+    assert journal.read_bytes() == intact
+    assert [entry["run"] for entry in writer.done["a"]] == [1, 2]
+    assert [r["elapsed_ms"] for r in read_csv(path)] == ["1", "2"]
+    assert writer.discarded == 0
+
+
+def test_recover_rows_without_journal_entry(tmp_path):
+    path = str(tmp_path / "out.csv")
+    write_runs(path, 2)
+    with open(path, "rb") as f:
+        intact = f.read()
+    unjournaled = "opencl,3\nopencl,4\nopen"  # the last one torn mid-write
+    with open(path, "a") as f:
+        f.write(unjournaled)
+
+    writer = sweep.ResultWriter(path, COLUMNS)
+    assert writer.discarded == len(unjournaled)
+    with open(path, "rb") as f:
+        assert f.read() == intact
+    assert len(writer.done["a"]) == 2
+
+
+def test_recover_csv_shorter_than_journal(tmp_path):
+    path = str(tmp_path / "out.csv")
+    write_runs(path, 2)
+    with open(path, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 3)
+
+    with pytest.raises(sweep.JournalError, match="shorter than its journal"):
+        sweep.ResultWriter(path, COLUMNS)